@@ -0,0 +1,83 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from asset_processing_service.config import config
+from asset_processing_service.lazy import LazyPrimitive
+from asset_processing_service.models import Asset
+from asset_processing_service.scheduler import TEXT_FILE_TYPES
+
+
+def disk_expansion_factor(asset: Asset) -> float:
+    if asset.fileType == "audio":
+        return config.AUDIO_DISK_EXPANSION_FACTOR
+    if asset.fileType == "video":
+        return config.VIDEO_DISK_EXPANSION_FACTOR
+    return 1.0
+
+
+class ByteBudget:
+    """
+    Admission control for accepted jobs (queued or running), based on the
+    asset sizes known before anything is downloaded. A job is only accepted
+    while both the in-flight byte budget and the disk budget (asset size
+    times the expected expansion from transcoding and segmenting) have room.
+    A job larger than the whole budget is still admitted when nothing else is
+    in flight, so it can't be blocked forever.
+
+    Text jobs are exempt: they are small and run in the fast lane, so they
+    are never held back behind media, even by an oversized job. So are jobs
+    whose asset couldn't be resolved, since their size is unknown.
+    """
+
+    def __init__(self, max_inflight_bytes: int, max_disk_bytes: int):
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.inflight_bytes = 0
+        self.disk_bytes = 0
+        self._reservations: Dict[str, Tuple[int, int]] = {}
+        self._condition: LazyPrimitive[asyncio.Condition] = LazyPrimitive(asyncio.Condition)
+
+    def try_reserve(self, job_id: str, asset: Optional[Asset]) -> bool:
+        if job_id in self._reservations:
+            return True
+
+        inflight_cost, disk_cost = self._costs(asset)
+        if inflight_cost == 0 and disk_cost == 0:
+            return True
+        fits = (
+            self.inflight_bytes + inflight_cost <= self.max_inflight_bytes
+            and self.disk_bytes + disk_cost <= self.max_disk_bytes
+        )
+        if not fits and self._reservations:
+            return False
+
+        self._reservations[job_id] = (inflight_cost, disk_cost)
+        self.inflight_bytes += inflight_cost
+        self.disk_bytes += disk_cost
+        return True
+
+    async def release(self, job_id: str) -> None:
+        inflight_cost, disk_cost = self._reservations.pop(job_id, (0, 0))
+        self.inflight_bytes -= inflight_cost
+        self.disk_bytes -= disk_cost
+
+        condition = self._condition.get()
+        async with condition:
+            condition.notify_all()
+
+    async def wait_for_release(self) -> None:
+        condition = self._condition.get()
+        async with condition:
+            await condition.wait()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "jobs": len(self._reservations),
+            "inflight_bytes": self.inflight_bytes,
+            "disk_bytes": self.disk_bytes,
+        }
+
+    def _costs(self, asset: Optional[Asset]) -> Tuple[int, int]:
+        if asset is None or asset.fileType in TEXT_FILE_TYPES:
+            return 0, 0
+        return asset.size, int(asset.size * disk_expansion_factor(asset))
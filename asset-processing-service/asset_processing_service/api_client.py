@@ -1,13 +1,13 @@
+import asyncio
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 import aiohttp
 
 from asset_processing_service.config import HEADERS, config
 from asset_processing_service.logger import logger
+from asset_processing_service.metrics import stage_bytes, time_stage
 from asset_processing_service.models import Asset, AssetProcessingJob
 
-import tiktoken
-
 
 class ApiError(Exception):
     def __init__(self, message: str, status_code: Optional[int] = None):
@@ -16,94 +16,251 @@ class ApiError(Exception):
         super().__init__(self.message)
 
 
-async def fetch_jobs() -> List[AssetProcessingJob]:
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    Creates the long-lived, connection-pooled session shared by every API call.
+    Must be called from within a running event loop and closed on shutdown.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=config.HTTP_MAX_CONNECTIONS,
+        limit_per_host=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+        ttl_dns_cache=config.HTTP_DNS_CACHE_TTL_SECONDS,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=None,
+        connect=config.HTTP_CONNECT_TIMEOUT_SECONDS,
+        sock_read=config.HTTP_READ_TIMEOUT_SECONDS,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS)
+
+
+async def fetch_jobs(
+    session: aiohttp.ClientSession,
+    updated_since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    wait_seconds: float = 0,
+) -> List[AssetProcessingJob]:
+    """
+    Fetches available jobs. With updated_since only jobs changed after that
+    cursor are returned (oldest first, at most limit), leaving out jobs in
+    progress since their heartbeats change them constantly, and wait_seconds
+    asks the API to hold the request open until a job changes.
+    """
     try:
         url = f"{config.API_BASE_URL}/asset-processing-job"
+        params = {}
+        if updated_since is not None:
+            params["updatedSince"] = updated_since.isoformat()
+        if limit:
+            params["limit"] = str(limit)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=HEADERS) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return [AssetProcessingJob(**item) for item in data]
+        request_options: Dict[str, Any] = {}
+        if wait_seconds > 0:
+            params["wait"] = str(wait_seconds)
+            # The response is deliberately held open, so extend the read timeout
+            request_options["timeout"] = aiohttp.ClientTimeout(
+                total=None,
+                connect=config.HTTP_CONNECT_TIMEOUT_SECONDS,
+                sock_read=wait_seconds + config.HTTP_READ_TIMEOUT_SECONDS,
+            )
 
-                else:
-                    logger.error("Error fetching jobs: %s", response.status)
-                    return []
+        async with session.get(url, params=params, **request_options) as response:
+            if response.status == 200:
+                data = await response.json()
+                return [AssetProcessingJob(**item) for item in data]
+
+            else:
+                logger.error("Error fetching jobs: %s", response.status)
+                return []
     except Exception as e:
         logger.error("Error fetching jobs: %s", e)
         return []
 
 
-async def update_job_details(job_id: str, update_data: Dict[str, Any]) -> None:
-    data = {**update_data, "lastHeartBeat": datetime.now().isoformat()}
+async def claim_job(session: aiohttp.ClientSession, job_id: str) -> bool:
+    """
+    Atomically claims a job for this instance. Returns False when another
+    instance already holds it (409); any other failure raises ApiError, since
+    it says nothing about who owns the job.
+    """
     try:
-        url = f"{config.API_BASE_URL}/asset-processing-job?jobId={job_id}"
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(url, json=data, headers=HEADERS) as response:
-                response.raise_for_status()
+        url = f"{config.API_BASE_URL}/asset-processing-job/claim?jobId={job_id}"
+        data = {"ownerId": config.INSTANCE_ID, "leaseSeconds": config.JOB_LEASE_SECONDS}
+        async with session.post(url, json=data) as response:
+            if response.status == 409:
+                return False
+            response.raise_for_status()
+            return True
+    except aiohttp.ClientResponseError as error:
+        logger.error(f"Failed to claim job {job_id}: {error}")
+        raise ApiError(f"Failed to claim job {job_id}", status_code=error.status)
     except aiohttp.ClientError as error:
-        logger.error(f"Failed to update job details for job {job_id}: {error}")
+        logger.error(f"Failed to claim job {job_id}: {error}")
+        raise ApiError(f"Failed to claim job {job_id}", status_code=500)
 
 
-async def update_job_heartbeat(job_id: str):
+async def update_jobs_bulk(
+    session: aiohttp.ClientSession,
+    heartbeat_job_ids: List[str],
+    updates: List[Dict[str, Any]],
+) -> List[str]:
+    """
+    Sends heartbeats (renewing this instance's leases) and status updates for
+    many jobs in one request. Returns the ids of jobs whose lease was lost.
+    """
     try:
-        url = f"{config.API_BASE_URL}/asset-processing-job?jobId={job_id}"
-        data = {"lastHeartBeat": datetime.now().isoformat()}
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(url, json=data, headers=HEADERS) as response:
-                response.raise_for_status()
+        url = f"{config.API_BASE_URL}/asset-processing-job"
+        data = {
+            "ownerId": config.INSTANCE_ID,
+            "leaseSeconds": config.JOB_LEASE_SECONDS,
+            "heartbeats": heartbeat_job_ids,
+            "updates": updates,
+        }
+        async with session.patch(url, json=data) as response:
+            response.raise_for_status()
+            result = await response.json()
+            return result.get("lostJobIds", [])
     except aiohttp.ClientError as error:
-        logger.error(f"Failed to update job heartbeat for {job_id}: {error}")
+        logger.error(f"Failed to send bulk job update: {error}")
+        raise ApiError("Failed to send bulk job update", status_code=500)
 
 
-async def fetch_asset(asset_id: str) -> Optional[Asset]:
+async def fetch_asset(session: aiohttp.ClientSession, asset_id: str) -> Optional[Asset]:
     try:
         url = f"{config.API_BASE_URL}/asset?assetId={asset_id}"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=HEADERS) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data:
-                        return Asset(**data)
-                    else:
-                        return None
-
+        async with session.get(url) as response:
+            if response.status == 200:
+                data = await response.json()
+                if data:
+                    return Asset(**data)
                 else:
-                    logger.error(f"Error fetching asset {asset_id}: {response.status}")
                     return None
+
+            else:
+                logger.error(f"Error fetching asset {asset_id}: {response.status}")
+                return None
     except Exception as e:
         logger.error("Error fetching asset %s: %s", asset_id, e)
         return None
 
 
-async def fetch_asset_file(file_url: str) -> bytes:
+async def fetch_assets(session: aiohttp.ClientSession, asset_ids: List[str]) -> Dict[str, Asset]:
+    """
+    Resolves many assets with one request per ASSET_FETCH_BATCH_SIZE ids.
+    Assets that don't exist, or whose batch failed, are left out.
+    """
+    assets: Dict[str, Asset] = {}
+    unique_ids = list(dict.fromkeys(asset_ids))
+    for start in range(0, len(unique_ids), config.ASSET_FETCH_BATCH_SIZE):
+        batch = unique_ids[start:start + config.ASSET_FETCH_BATCH_SIZE]
+        try:
+            url = f"{config.API_BASE_URL}/asset"
+            async with session.get(url, params={"assetIds": ",".join(batch)}) as response:
+                if response.status != 200:
+                    logger.error(f"Error fetching {len(batch)} assets: {response.status}")
+                    continue
+                for data in await response.json():
+                    asset = Asset(**data)
+                    assets[asset.id] = asset
+        except Exception as e:
+            logger.error(f"Error fetching {len(batch)} assets: {e}")
+    return assets
+
+
+async def download_asset_file(session: aiohttp.ClientSession, file_url: str, dest_path: str) -> int:
+    """
+    Streams an asset file straight to dest_path instead of buffering it in memory.
+    Returns the number of bytes written.
+    """
+    bytes_written = 0
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(file_url, headers=HEADERS) as response:
-                response.raise_for_status()
-                return await response.read()
+        async with session.get(file_url) as response:
+            response.raise_for_status()
+
+            if response.content_length and response.content_length > config.MAX_DOWNLOAD_SIZE_BYTES:
+                raise ApiError(
+                    f"Asset file is {response.content_length} bytes, "
+                    f"exceeding the {config.MAX_DOWNLOAD_SIZE_BYTES} byte limit",
+                    status_code=413,
+                )
+
+            # File I/O runs in a thread so a slow disk never stalls the event loop
+            f = await asyncio.to_thread(open, dest_path, "wb")
+            try:
+                async for chunk in response.content.iter_chunked(config.DOWNLOAD_CHUNK_SIZE_BYTES):
+                    bytes_written += len(chunk)
+                    if bytes_written > config.MAX_DOWNLOAD_SIZE_BYTES:
+                        raise ApiError(
+                            f"Asset file exceeds the {config.MAX_DOWNLOAD_SIZE_BYTES} byte limit",
+                            status_code=413,
+                        )
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+        return bytes_written
     except aiohttp.ClientError as error:
         logger.error(f"Error fetching asset file: {error}")
         raise ApiError("Failed to fetch asset file", status_code=500)
 
 
-async def update_asset_content(asset_id: str, content: str) -> None:
+async def update_asset_content(
+    session: aiohttp.ClientSession, asset_id: str, content: str, token_count: int
+) -> None:
     try:
-        encoding = tiktoken.encoding_for_model("gpt-4o")
-        tokens = encoding.encode(content)
-        token_count = len(tokens)
-
         update_data = {
             "content": content,
             "tokenCount": token_count,
         }
 
-        async with aiohttp.ClientSession() as session:
-            url = f"{config.API_BASE_URL}/asset?assetId={asset_id}"
-            async with session.patch(url, json=update_data, headers=HEADERS) as response:
+        url = f"{config.API_BASE_URL}/asset?assetId={asset_id}"
+        with time_stage("upload"):
+            async with session.patch(url, json=update_data) as response:
                 response.raise_for_status()
+        stage_bytes.observe(len(content.encode("utf-8")), stage="upload")
 
     except aiohttp.ClientError as error:
         logger.error(f"Failed to update asset content for asset {asset_id}: {error}")
         raise ApiError("Failed to update asset content", status_code=500)
+
+
+async def reset_asset_content(session: aiohttp.ClientSession, asset_id: str) -> None:
+    """
+    Clears the asset's content and marks it incomplete, ready for chunks to
+    be appended with append_asset_content.
+    """
+    try:
+        url = f"{config.API_BASE_URL}/asset?assetId={asset_id}"
+        update_data = {"content": "", "tokenCount": 0, "complete": False}
+        async with session.patch(url, json=update_data) as response:
+            response.raise_for_status()
+
+    except aiohttp.ClientError as error:
+        logger.error(f"Failed to reset asset content for asset {asset_id}: {error}")
+        raise ApiError("Failed to reset asset content", status_code=500)
+
+
+async def append_asset_content(
+    session: aiohttp.ClientSession, asset_id: str, chunk_index: int, text: str, token_count: int
+) -> None:
+    """
+    Appends one chunk of content to the asset, adding its tokens to the
+    asset's running token count. Chunks must be appended in order.
+    """
+    try:
+        update_data = {
+            "append": text,
+            "tokenCountDelta": token_count,
+            "chunkIndex": chunk_index,
+        }
+
+        url = f"{config.API_BASE_URL}/asset?assetId={asset_id}"
+        with time_stage("append"):
+            async with session.patch(url, json=update_data) as response:
+                response.raise_for_status()
+        stage_bytes.observe(len(text.encode("utf-8")), stage="append")
+
+    except aiohttp.ClientError as error:
+        logger.error(f"Failed to append chunk {chunk_index} to asset {asset_id}: {error}")
+        raise ApiError("Failed to append asset content", status_code=500)
@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from asset_processing_service.config import config
+from asset_processing_service.logger import logger
+from asset_processing_service.media_processor import transcription_request_stats
+from asset_processing_service.scheduler import JobScheduler
+from asset_processing_service.stage_pools import STAGE_POOLS
+
+
+class WorkerAutoscaler:
+    """
+    Grows and shrinks the pool of media workers between MIN_NUM_WORKERS and
+    MAX_NUM_WORKERS, starting from MAX_NUM_WORKERS. Every interval the
+    target is adjusted from:
+
+    - the transcription API's 429 rate: too many rate-limited requests means
+      more concurrency only adds retries, so the pool shrinks;
+    - per-stage latency: when jobs spend longer queued for a stage pool than
+      running in it, the node's CPU is the bottleneck, so the pool shrinks;
+    - queue depth: otherwise, queued media jobs grow the pool, and an empty
+      queue with idle workers shrinks it.
+
+    Scaling down never interrupts a job: surplus workers exit once they
+    finish their current job (idle ones are woken to exit straight away).
+    """
+
+    def __init__(self, scheduler: JobScheduler, spawn_worker: Callable[[int], "asyncio.Task[None]"]):
+        self.scheduler = scheduler
+        self.spawn_worker = spawn_worker
+        self.min_workers = max(1, config.MIN_NUM_WORKERS)
+        self.max_workers = max(self.min_workers, config.MAX_NUM_WORKERS)
+        # MAX_NUM_WORKERS was the fixed pool size before autoscaling, so the
+        # pool starts there and only shrinks once workers go idle
+        self.target = self.max_workers
+        self.busy_workers = 0
+        self._workers: Dict[int, "asyncio.Task[None]"] = {}
+        # Ids 1..FAST_LANE_WORKERS belong to the fixed fast-lane workers
+        self._worker_ids = itertools.count(config.FAST_LANE_WORKERS + 1)
+        self._last_request_stats = dict(transcription_request_stats)
+        self._last_stage_stats = {pool.name: (pool.completed, pool.busy_seconds, pool.wait_seconds) for pool in STAGE_POOLS}
+
+    def start(self) -> None:
+        self._scale_to(self.target)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(config.AUTOSCALE_INTERVAL_SECONDS)
+            try:
+                await self.adjust()
+            except Exception as e:
+                logger.error(f"Error adjusting worker pool: {e}")
+
+    async def adjust(self) -> None:
+        target, reason = self._next_target()
+        if target == self.target:
+            return
+
+        logger.info(f"Scaling workers from {self.target} to {target}: {reason}")
+        self.target = target
+        self._scale_to(target)
+        # Wake idle workers so surplus ones notice they should exit
+        await self.scheduler.wake_all()
+
+    def should_retire(self, worker_id: int) -> bool:
+        if len(self._workers) <= self.target or worker_id not in self._workers:
+            return False
+        del self._workers[worker_id]
+        logger.info(f"Worker {worker_id} retiring")
+        return True
+
+    def worker_busy(self) -> None:
+        self.busy_workers += 1
+
+    def worker_idle(self) -> None:
+        self.busy_workers -= 1
+
+    def worker_tasks(self) -> List["asyncio.Task[None]"]:
+        return list(self._workers.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "workers": len(self._workers),
+            "busy": self.busy_workers,
+            "min": self.min_workers,
+            "max": self.max_workers,
+        }
+
+    def _next_target(self) -> Tuple[int, str]:
+        queue_depth = self.scheduler.qsize() - self.scheduler.fast_lane_size()
+        rate_limited_ratio = self._rate_limited_ratio()
+        saturated_stage = self._saturated_stage()
+
+        if rate_limited_ratio is not None and rate_limited_ratio > config.AUTOSCALE_MAX_RATE_LIMITED_RATIO:
+            return self._clamp(self.target - 1), f"{rate_limited_ratio:.0%} of transcription requests rate limited"
+        if saturated_stage is not None:
+            return self._clamp(self.target - 1), f"{saturated_stage} stage is saturated"
+        if queue_depth > 0 and self.busy_workers >= self.target:
+            return self._clamp(self.target + min(queue_depth, config.AUTOSCALE_STEP)), f"{queue_depth} jobs queued"
+        if queue_depth == 0 and self.busy_workers < self.target:
+            return self._clamp(max(self.busy_workers, self.target - 1)), "workers idle"
+        return self.target, ""
+
+    def _rate_limited_ratio(self) -> Optional[float]:
+        current = dict(transcription_request_stats)
+        requests = current["requests"] - self._last_request_stats["requests"]
+        rate_limited = current["rate_limited"] - self._last_request_stats["rate_limited"]
+        self._last_request_stats = current
+        if requests <= 0:
+            return None
+        return rate_limited / requests
+
+    def _saturated_stage(self) -> Optional[str]:
+        saturated = None
+        for pool in STAGE_POOLS:
+            completed, busy_seconds, wait_seconds = self._last_stage_stats[pool.name]
+            self._last_stage_stats[pool.name] = (pool.completed, pool.busy_seconds, pool.wait_seconds)
+            if pool.completed <= completed:
+                continue
+            # Compare time spent waiting for the pool with time spent running in it
+            busy = pool.busy_seconds - busy_seconds
+            waited = pool.wait_seconds - wait_seconds
+            if busy > 0 and waited / busy > config.AUTOSCALE_MAX_STAGE_WAIT_RATIO:
+                saturated = pool.name
+        return saturated
+
+    def _clamp(self, target: int) -> int:
+        return max(self.min_workers, min(self.max_workers, target))
+
+    def _scale_to(self, target: int) -> None:
+        # Dropping the target is enough to scale down, workers retire themselves
+        while len(self._workers) < target:
+            worker_id = next(self._worker_ids)
+            self._workers[worker_id] = self.spawn_worker(worker_id)
@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+from asset_processing_service.config import config
+from asset_processing_service.logger import logger
+from asset_processing_service.models import Asset
+
+STATE_FILE_NAME = "state.json"
+TRANSCRIPTS_DIR_NAME = "transcripts"
+
+
+class JobCheckpoint:
+    """
+    Records the completed pipeline stages of a job (downloaded file, produced
+    segments, per-chunk transcripts) in the job's directory under
+    JOB_WORK_DIR, so a retried job resumes from the last completed stage.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.job_dir = os.path.join(config.JOB_WORK_DIR, job_id)
+        self.state_path = os.path.join(self.job_dir, STATE_FILE_NAME)
+        self.transcripts_dir = os.path.join(self.job_dir, TRANSCRIPTS_DIR_NAME)
+        self.state: Dict = {}
+
+    @classmethod
+    def load(cls, job_id: str, asset: Asset) -> "JobCheckpoint":
+        checkpoint = cls(job_id)
+        os.makedirs(checkpoint.job_dir, exist_ok=True)
+
+        try:
+            with open(checkpoint.state_path, "r") as f:
+                checkpoint.state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            checkpoint.state = {}
+
+        # A checkpoint only applies to the exact file it was made from
+        fingerprint = asset_fingerprint(asset)
+        if checkpoint.state.get("asset") != fingerprint:
+            if checkpoint.state:
+                logger.info(f"Discarding stale checkpoint for job {job_id}")
+            checkpoint.reset()
+            checkpoint.state = {"asset": fingerprint}
+            checkpoint._save()
+
+        return checkpoint
+
+    def reset(self) -> None:
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+        os.makedirs(self.job_dir, exist_ok=True)
+        self.state = {}
+
+    def discard(self) -> None:
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+
+    def downloaded_file(self) -> Optional[str]:
+        download = self.state.get("download")
+        if download and os.path.exists(download["path"]) and os.path.getsize(download["path"]) == download["size"]:
+            return download["path"]
+        return None
+
+    def mark_downloaded(self, path: str, size: int) -> None:
+        self.state["download"] = {"path": path, "size": size}
+        self._save()
+
+    def segments(self) -> Optional[List[dict]]:
+        chunks = self.state.get("segments")
+        if chunks is None:
+            return None
+        if not all(os.path.exists(chunk["path"]) for chunk in chunks):
+            return None
+        return chunks
+
+    def mark_segmented(self, chunks: List[dict]) -> None:
+        # Transcripts are stored by chunk index, so ones from an earlier
+        # segmentation would be attached to the wrong audio
+        shutil.rmtree(self.transcripts_dir, ignore_errors=True)
+        self.state["segments"] = [
+            {key: value for key, value in chunk.items() if key != "data"}
+            for chunk in chunks
+        ]
+        self._save()
+
+    def transcript(self, index: int) -> Optional[str]:
+        try:
+            with open(self._transcript_path(index), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save_transcript(self, index: int, text: str) -> None:
+        os.makedirs(self.transcripts_dir, exist_ok=True)
+        path = self._transcript_path(index)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(f"{path}.tmp", path)
+
+    def _transcript_path(self, index: int) -> str:
+        return os.path.join(self.transcripts_dir, f"{index:05d}.txt")
+
+    def _save(self) -> None:
+        with open(f"{self.state_path}.tmp", "w") as f:
+            json.dump(self.state, f)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+
+
+def asset_fingerprint(asset: Asset) -> str:
+    return f"{asset.id}:{asset.fileUrl}:{asset.size}"
+
+
+def discard_checkpoint(job_id: str) -> None:
+    JobCheckpoint(job_id).discard()
+
+
+def prune_stale_checkpoints() -> None:
+    """
+    Removes job directories that have not been touched for
+    JOB_STATE_TTL_SECONDS, e.g. jobs deleted from the webapp mid-retry.
+    """
+    if not os.path.isdir(config.JOB_WORK_DIR):
+        return
+
+    cutoff = time.time() - config.JOB_STATE_TTL_SECONDS
+    for name in os.listdir(config.JOB_WORK_DIR):
+        path = os.path.join(config.JOB_WORK_DIR, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            logger.info(f"Removing stale job directory {path}")
+            shutil.rmtree(path, ignore_errors=True)
@@ -1,6 +1,8 @@
 import os
+import socket
+import uuid
 from dotenv import load_dotenv
-from asset_processing_service.logger import logger
+from asset_processing_service.logger import configure_logging, logger
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,13 +18,95 @@ class Config:
     SERVER_API_KEY = get_required_env("SERVER_API_KEY")
     STUCK_JOB_THRESHOLD_SECONDS = int(os.getenv("STUCK_JOB_THRESHOLD_SECONDS", "30"))
     MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "3"))
+    JOB_LONG_POLL_SECONDS = float(os.getenv("JOB_LONG_POLL_SECONDS", "20"))
+    JOB_FETCH_LIMIT = int(os.getenv("JOB_FETCH_LIMIT", "100"))
+    ASSET_FETCH_BATCH_SIZE = int(os.getenv("ASSET_FETCH_BATCH_SIZE", "100"))
+    JOB_FULL_SYNC_INTERVAL_SECONDS = float(os.getenv("JOB_FULL_SYNC_INTERVAL_SECONDS", "15"))
+    MIN_NUM_WORKERS = int(os.getenv("MIN_NUM_WORKERS", "1"))
     MAX_NUM_WORKERS = int(os.getenv("MAX_NUM_WORKERS", "2"))
+    AUTOSCALE_INTERVAL_SECONDS = float(os.getenv("AUTOSCALE_INTERVAL_SECONDS", "10"))
+    AUTOSCALE_STEP = int(os.getenv("AUTOSCALE_STEP", "2"))
+    AUTOSCALE_MAX_RATE_LIMITED_RATIO = float(os.getenv("AUTOSCALE_MAX_RATE_LIMITED_RATIO", "0.05"))
+    AUTOSCALE_MAX_STAGE_WAIT_RATIO = float(os.getenv("AUTOSCALE_MAX_STAGE_WAIT_RATIO", "1.0"))
+    FAST_LANE_WORKERS = int(os.getenv("FAST_LANE_WORKERS", "1"))
+    SCHEDULER_AUDIO_BYTES_PER_SECOND = float(os.getenv("SCHEDULER_AUDIO_BYTES_PER_SECOND", str(1024 * 1024)))
+    SCHEDULER_VIDEO_BYTES_PER_SECOND = float(os.getenv("SCHEDULER_VIDEO_BYTES_PER_SECOND", str(5 * 1024 * 1024)))
+    SCHEDULER_UNKNOWN_JOB_COST_SECONDS = float(os.getenv("SCHEDULER_UNKNOWN_JOB_COST_SECONDS", "60"))
+    SCHEDULER_AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", "0.5"))
+    SCHEDULER_PROJECT_SHARE_PENALTY_SECONDS = float(os.getenv("SCHEDULER_PROJECT_SHARE_PENALTY_SECONDS", "300"))
+    MAX_INFLIGHT_BYTES = int(os.getenv("MAX_INFLIGHT_BYTES", str(4 * 1024 * 1024 * 1024)))
+    MAX_INFLIGHT_DISK_BYTES = int(os.getenv("MAX_INFLIGHT_DISK_BYTES", str(20 * 1024 * 1024 * 1024)))
+    AUDIO_DISK_EXPANSION_FACTOR = float(os.getenv("AUDIO_DISK_EXPANSION_FACTOR", "3"))
+    VIDEO_DISK_EXPANSION_FACTOR = float(os.getenv("VIDEO_DISK_EXPANSION_FACTOR", "1.5"))
+    # Input files downloaded ahead of their job starting; 0 disables prefetching
+    PREFETCH_MAX_BYTES = int(os.getenv("PREFETCH_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+    PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+    INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "30"))
     HEARBEAT_INTERVAL_SECONDS = int(os.getenv("HEARBEAT_INTERVAL_SECONDS", "10"))
+    STATUS_UPDATE_FLUSH_DELAY_SECONDS = float(os.getenv("STATUS_UPDATE_FLUSH_DELAY_SECONDS", "0.2"))
     MAX_CHUNK_SIZE_BYTES = int(os.getenv("MAX_CHUNK_SIZE_BYTES", str(24 * 1024 * 1024)))
+    CHUNKING_MODE = os.getenv("CHUNKING_MODE", "silence").lower()
+    CHUNK_TARGET_SECONDS = float(os.getenv("CHUNK_TARGET_SECONDS", "180"))
+    CHUNK_SILENCE_SEARCH_SECONDS = float(os.getenv("CHUNK_SILENCE_SEARCH_SECONDS", "30"))
+    SILENCE_NOISE_DB = float(os.getenv("SILENCE_NOISE_DB", "-35"))
+    SILENCE_MIN_SECONDS = float(os.getenv("SILENCE_MIN_SECONDS", "0.4"))
+    SINGLE_PASS_VIDEO_EXTRACTION = os.getenv("SINGLE_PASS_VIDEO_EXTRACTION", "true").lower() == "true"
+    PARALLEL_TRANSCODING = os.getenv("PARALLEL_TRANSCODING", "true").lower() == "true"
+    PARALLEL_TRANSCODING_MIN_SECONDS = float(os.getenv("PARALLEL_TRANSCODING_MIN_SECONDS", "600"))
+    AUDIO_ENCODING_PROFILE = os.getenv("AUDIO_ENCODING_PROFILE", "speech")
+    VIDEO_ENCODING_PROFILE = os.getenv("VIDEO_ENCODING_PROFILE", "speech")
+    FFMPEG_STAGE_WORKERS = int(os.getenv("FFMPEG_STAGE_WORKERS", str(os.cpu_count() or 2)))
+    PROBE_STAGE_WORKERS = int(os.getenv("PROBE_STAGE_WORKERS", "4"))
+    TOKENIZE_STAGE_WORKERS = int(os.getenv("TOKENIZE_STAGE_WORKERS", "2"))
+    STAGE_STATS_LOG_INTERVAL_SECONDS = float(os.getenv("STAGE_STATS_LOG_INTERVAL_SECONDS", "60"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "whisper-1")
     OPENAI_API_KEY = get_required_env("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+    TOKENIZER_MODEL = os.getenv("TOKENIZER_MODEL", "gpt-4o")
+    TIKTOKEN_CACHE_DIR = os.getenv("TIKTOKEN_CACHE_DIR", os.path.join(os.getcwd(), "cache", "tiktoken"))
+    PROGRESSIVE_PUBLISHING = os.getenv("PROGRESSIVE_PUBLISHING", "true").lower() == "true"
+    MAX_CONCURRENT_TRANSCRIPTIONS = int(os.getenv("MAX_CONCURRENT_TRANSCRIPTIONS", "8"))
+    TRANSCRIPTION_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIPTION_TIMEOUT_SECONDS", "300"))
+    TRANSCRIPTION_MAX_RETRIES = int(os.getenv("TRANSCRIPTION_MAX_RETRIES", "4"))
+    TRANSCRIPTION_RETRY_BASE_DELAY_SECONDS = float(os.getenv("TRANSCRIPTION_RETRY_BASE_DELAY_SECONDS", "1"))
+    TRANSCRIPTION_RETRY_MAX_DELAY_SECONDS = float(os.getenv("TRANSCRIPTION_RETRY_MAX_DELAY_SECONDS", "30"))
+    # Each request's timeout: base + audio length * per-second, capped at TRANSCRIPTION_TIMEOUT_SECONDS
+    TRANSCRIPTION_DEADLINE_BASE_SECONDS = float(os.getenv("TRANSCRIPTION_DEADLINE_BASE_SECONDS", "30"))
+    TRANSCRIPTION_DEADLINE_SECONDS_PER_AUDIO_SECOND = float(os.getenv("TRANSCRIPTION_DEADLINE_SECONDS_PER_AUDIO_SECOND", "0.5"))
+    TRANSCRIPTION_HEDGING = os.getenv("TRANSCRIPTION_HEDGING", "true").lower() == "true"
+    TRANSCRIPTION_HEDGE_PERCENTILE = float(os.getenv("TRANSCRIPTION_HEDGE_PERCENTILE", "0.95"))
+    TRANSCRIPTION_HEDGE_MIN_SAMPLES = int(os.getenv("TRANSCRIPTION_HEDGE_MIN_SAMPLES", "20"))
+    TRANSCRIPTION_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("TRANSCRIPTION_HEDGE_MIN_DELAY_SECONDS", "5"))
+    TRANSCRIPTION_CHUNK_ATTEMPTS = int(os.getenv("TRANSCRIPTION_CHUNK_ATTEMPTS", "2"))
+    TRANSCRIPTION_CACHE_DIR = os.getenv("TRANSCRIPTION_CACHE_DIR", os.path.join(os.getcwd(), "cache", "transcriptions"))
+    TRANSCRIPTION_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+    HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+    HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "60"))
+    HTTP_DNS_CACHE_TTL_SECONDS = int(os.getenv("HTTP_DNS_CACHE_TTL_SECONDS", "300"))
+    JOB_WORK_DIR = os.getenv("JOB_WORK_DIR", os.path.join(os.getcwd(), "temp"))
+    JOB_STATE_TTL_SECONDS = int(os.getenv("JOB_STATE_TTL_SECONDS", str(2 * 24 * 60 * 60)))
+    DOWNLOAD_CHUNK_SIZE_BYTES = int(os.getenv("DOWNLOAD_CHUNK_SIZE_BYTES", str(1024 * 1024)))
+    MAX_DOWNLOAD_SIZE_BYTES = int(os.getenv("MAX_DOWNLOAD_SIZE_BYTES", str(5 * 1024 * 1024 * 1024)))
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+    LOG_THROTTLE_SECONDS = float(os.getenv("LOG_THROTTLE_SECONDS", "30"))
 
 logger.info("Config loaded successfully")
 
 config = Config()
+configure_logging(
+    level=config.LOG_LEVEL,
+    json_format=config.LOG_FORMAT == "json",
+    queue_size=config.LOG_QUEUE_SIZE,
+    max_message_chars=config.LOG_MAX_MESSAGE_CHARS,
+    throttle_seconds=config.LOG_THROTTLE_SECONDS,
+)
 HEADERS = {"Authorization": f"Bearer {config.SERVER_API_KEY}"}
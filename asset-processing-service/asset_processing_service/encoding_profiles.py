@@ -0,0 +1,57 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+from asset_processing_service.config import config
+
+
+class EncodingProfile(NamedTuple):
+    """
+    How audio is encoded before it is uploaded for transcription. Profiles
+    are constant bitrate so the bytes per second of audio, and therefore the
+    longest chunk that fits MAX_CHUNK_SIZE_BYTES, are known upfront.
+    """
+
+    name: str
+    codec: str
+    container: str
+    bitrate_kbps: int
+    # None keeps the input's sample rate / channel layout
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    # Inputs already in this container are split without re-encoding
+    passthrough: bool = False
+
+    def output_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            "acodec": self.codec,
+            "audio_bitrate": f"{self.bitrate_kbps}k",
+        }
+        if self.sample_rate is not None:
+            options["ar"] = self.sample_rate
+        if self.channels is not None:
+            options["ac"] = self.channels
+        if self.codec == "libopus":
+            # libopus defaults to VBR, which would make chunk sizes unpredictable
+            options["vbr"] = "off"
+        return options
+
+
+ENCODING_PROFILES = {
+    profile.name: profile
+    for profile in [
+        # Speech recognition models work on 16 kHz mono, so anything more is wasted upload
+        EncodingProfile("speech", codec="libmp3lame", container="mp3", bitrate_kbps=32, sample_rate=16000, channels=1),
+        EncodingProfile("speech_opus", codec="libopus", container="ogg", bitrate_kbps=24, sample_rate=16000, channels=1),
+        # Closest to the old pipeline, which kept MP3 inputs as they were and
+        # encoded everything else as VBR MP3 (-q:a 0, roughly 245 kbps); here
+        # the re-encode is CBR at a rate speech doesn't lose anything at
+        EncodingProfile("hq", codec="libmp3lame", container="mp3", bitrate_kbps=128, passthrough=True),
+    ]
+}
+
+
+def profile_for_file_type(file_type: str) -> EncodingProfile:
+    name = config.VIDEO_ENCODING_PROFILE if file_type == "video" else config.AUDIO_ENCODING_PROFILE
+    try:
+        return ENCODING_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown encoding profile for {file_type} files: {name}")
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from asset_processing_service.api_client import update_jobs_bulk
+from asset_processing_service.config import config
+from asset_processing_service.lazy import LazyPrimitive
+from asset_processing_service.logger import logger
+
+
+class HeartbeatAggregator:
+    """
+    Collects the heartbeats of every job this instance is working on, plus
+    any pending status transitions, and sends them to the API as one bulk
+    request per tick. Heartbeat traffic therefore scales with the number of
+    service instances rather than the number of in-flight jobs.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self._live_jobs: Dict[str, asyncio.Event] = {}
+        self._pending_updates: Dict[str, Dict[str, Any]] = {}
+        self._update_waiters: List[asyncio.Future] = []
+        self._wakeup: LazyPrimitive[asyncio.Event] = LazyPrimitive(asyncio.Event)
+
+    def track(self, job_id: str) -> asyncio.Event:
+        """
+        Starts heartbeating a job. The returned event is set if the job's
+        lease is lost to another instance. Tracking a job that is already
+        tracked returns its existing event, so a loss isn't missed.
+        """
+        return self._live_jobs.setdefault(job_id, asyncio.Event())
+
+    def untrack(self, job_id: str) -> None:
+        self._live_jobs.pop(job_id, None)
+
+    async def update(self, job_id: str, update_data: Dict[str, Any], owner_id: Optional[str] = None) -> None:
+        """
+        Queues a status update and waits until the batch carrying it has been
+        sent. Updates are flushed shortly after being queued rather than on the
+        next heartbeat tick, so transitions are not delayed, but concurrent ones
+        still share a request.
+        """
+        data = {**update_data, "jobId": job_id}
+        if owner_id:
+            data["ownerId"] = owner_id
+        # A newer update for the same job supersedes one that hasn't been sent
+        self._pending_updates[job_id] = {**self._pending_updates.get(job_id, {}), **data}
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._update_waiters.append(waiter)
+        self._wakeup.get().set()
+        await waiter
+
+    async def run(self) -> None:
+        wakeup = self._wakeup.get()
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=config.HEARBEAT_INTERVAL_SECONDS)
+                # Give concurrent status updates a moment to join the batch
+                await asyncio.sleep(config.STATUS_UPDATE_FLUSH_DELAY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        job_ids = list(self._live_jobs)
+        updates = list(self._pending_updates.values())
+        waiters = self._update_waiters
+        self._pending_updates = {}
+        self._update_waiters = []
+
+        if not job_ids and not updates:
+            self._resolve(waiters)
+            return
+
+        try:
+            lost_job_ids = await update_jobs_bulk(self.session, job_ids, updates)
+        except Exception as e:
+            logger.error(f"Failed to send {len(job_ids)} heartbeats and {len(updates)} job updates: {e}")
+            # Retry the updates on the next tick unless they were superseded
+            for update in updates:
+                self._pending_updates.setdefault(update["jobId"], update)
+            self._resolve(waiters)
+            return
+
+        for job_id in lost_job_ids:
+            lease_lost = self._live_jobs.get(job_id)
+            if lease_lost is not None:
+                lease_lost.set()
+        self._resolve(waiters)
+
+    def _resolve(self, waiters: List[asyncio.Future]) -> None:
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
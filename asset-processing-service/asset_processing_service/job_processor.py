@@ -1,87 +1,226 @@
 import asyncio
 import os
+from typing import List, Optional, Tuple
 
+import aiohttp
+
+from asset_processing_service.checkpoint import JobCheckpoint, discard_checkpoint
 from asset_processing_service.config import config
-from asset_processing_service.api_client import fetch_asset, fetch_asset_file, update_asset_content, update_job_details, update_job_heartbeat
+from asset_processing_service.heartbeat import HeartbeatAggregator
+from asset_processing_service.api_client import (
+    ApiError,
+    append_asset_content,
+    claim_job,
+    download_asset_file,
+    fetch_asset,
+    reset_asset_content,
+    update_asset_content,
+)
 from asset_processing_service.logger import logger
-from asset_processing_service.media_processor import extract_audio_and_split, split_audio_file, transcribe_chunks
-from asset_processing_service.models import AssetProcessingJob
-
-
-async def process_job(job: AssetProcessingJob) -> None:
+from asset_processing_service.media_processor import extract_audio_and_split, iter_transcriptions, split_audio_file
+from asset_processing_service.metrics import jobs_total, stage_bytes, time_stage
+from asset_processing_service.models import Asset, AssetProcessingJob
+from asset_processing_service.tokenizer import count_tokens_async
+
+
+async def process_job(
+    session: aiohttp.ClientSession,
+    heartbeats: HeartbeatAggregator,
+    job: AssetProcessingJob,
+    asset: Optional[Asset] = None,
+    claimed: Optional[bool] = None,
+) -> None:
+    """
+    `claimed` is the outcome of an earlier claim on the job (by the download
+    prefetcher); when it is None the job is claimed here.
+    """
     logger.info(f"Processing job {job.id}")
 
-    heartbeat_task = asyncio.create_task(heartbeat_updater(job.id));
+    if claimed is None:
+        try:
+            claimed = await claim_job(session, job.id)
+        except ApiError as e:
+            # The claim may or may not have gone through, and the job may be
+            # owned elsewhere, so it isn't failed; the next poll returns it
+            # while it's still claimable
+            logger.warning(f"Claiming job {job.id} failed, leaving it for the next poll: {e}")
+            jobs_total.inc(outcome="claim_failed")
+            return
+    if not claimed:
+        # The claim endpoint answered 409 (other failures raise), so the job
+        # is owned elsewhere and a checkpoint left here is of no use
+        logger.info(f"Job {job.id} is already claimed by another instance. Skipping.")
+        jobs_total.inc(outcome="skipped")
+        await asyncio.to_thread(discard_checkpoint, job.id)
+        return
+
+    # Heartbeats (and lease renewals) are batched across jobs by the aggregator
+    lease_lost = heartbeats.track(job.id)
+    pipeline_task = asyncio.create_task(run_job_pipeline(session, heartbeats, job, asset))
+    lease_lost_task = asyncio.create_task(lease_lost.wait())
 
     try:
-        await update_job_details(job.id, {"status": "in_progress"});
-        asset = await fetch_asset(job.assetId);
+        await asyncio.wait({pipeline_task, lease_lost_task}, return_when=asyncio.FIRST_COMPLETED)
+        if pipeline_task.done():
+            pipeline_task.result()
+        else:
+            logger.error(f"Lost lease on job {job.id} to another instance. Abandoning job.")
+            jobs_total.inc(outcome="lease_lost")
+
+    finally:
+        heartbeats.untrack(job.id)
+        pipeline_task.cancel()
+        lease_lost_task.cancel()
+        await asyncio.gather(pipeline_task, lease_lost_task, return_exceptions=True)
+
+
+async def run_job_pipeline(
+    session: aiohttp.ClientSession,
+    heartbeats: HeartbeatAggregator,
+    job: AssetProcessingJob,
+    asset: Optional[Asset] = None,
+) -> None:
+    try:
+        if asset is None:
+            asset = await fetch_asset(session, job.assetId);
         if asset is None:
             raise ValueError(f"Asset {job.assetId} not found")
 
-        file_buffer = await fetch_asset_file(asset.fileUrl)
+        checkpoint = await asyncio.to_thread(JobCheckpoint.load, job.id, asset)
+        input_path = await download_input(session, asset, checkpoint)
 
         content_type = asset.fileType
         content = ""
 
         if content_type in [ "text", "markdown" ]:
             logger.info(f"Processing text file: {asset.fileName}")
-            content = file_buffer.decode("utf-8")
-
-        elif content_type == "audio":
-            logger.info(f"Processing audio file: {asset.fileName}")
-            chunks = await split_audio_file(
-                file_buffer,
-                config.MAX_CHUNK_SIZE_BYTES,
-                os.path.basename(asset.fileName),
-            )
-            transcribed_chunks = await transcribe_chunks(chunks)
-            content = "\n\n".join(transcribed_chunks)
-
-        elif content_type == "video":
-            logger.info(f"Processing video file: {asset.fileName}")
-            chunks = await extract_audio_and_split(
-                file_buffer,
-                config.MAX_CHUNK_SIZE_BYTES,
-                os.path.basename(asset.fileName),
-            )
-            transcribed_chunks = await transcribe_chunks(chunks)
-            content = "\n\n".join(transcribed_chunks)
+            content = await asyncio.to_thread(read_text_file, input_path)
+            token_count = await count_tokens_async(content)
+
+        elif content_type in [ "audio", "video" ]:
+            logger.info(f"Processing {content_type} file: {asset.fileName}")
+            chunks = await segment_input(asset, input_path, checkpoint)
+            with time_stage("transcribe_all"):
+                transcribed_chunks, token_count = await transcribe_and_publish(
+                    session, asset, chunks, checkpoint, publish=config.PROGRESSIVE_PUBLISHING
+                )
+            content = "".join(transcribed_chunks)
 
         else:
             raise ValueError(f"Unsupported content type: {content_type}")
 
-        logger.info(f"Final content: {content}")
+        logger.info(f"Final content for asset {asset.id}: {len(content)} characters, {token_count} tokens")
 
-        # update asset content
-        await update_asset_content(asset.id, content)
+        # update asset content (replaces any progressively published content and marks it complete)
+        await update_asset_content(session, asset.id, content, token_count)
 
         #  Update job status to completed
-        await update_job_details(job.id, {"status": "completed"})
+        await heartbeats.update(job.id, {"status": "completed"}, owner_id=config.INSTANCE_ID)
+
+        await asyncio.to_thread(checkpoint.discard)
+        jobs_total.inc(outcome="completed")
 
     except Exception as e:
         logger.exception(f"Error processing job '{job.id}': {e}")
+        jobs_total.inc(outcome="failed")
         error_message = str(e)
-        await update_job_details(
+        await heartbeats.update(
             job.id,
             {
                 "status": "failed",
                 "errorMessage": error_message,
                 "attempts": job.attempts + 1,
             },
+            owner_id=config.INSTANCE_ID,
         )
 
-    finally:
-        heartbeat_task.cancel()
-        try:
-            await heartbeat_task
-        except asyncio.CancelledError:
-            pass
 
-async def heartbeat_updater(job_id: str):
-    while True:
+async def download_input(session: aiohttp.ClientSession, asset: Asset, checkpoint: JobCheckpoint) -> str:
+    input_path = await asyncio.to_thread(checkpoint.downloaded_file)
+    if input_path:
+        logger.info(f"Resuming job {checkpoint.job_id} from downloaded file {input_path}")
+        return input_path
+
+    input_path = os.path.join(checkpoint.job_dir, os.path.basename(asset.fileName))
+    partial_path = f"{input_path}.part"
+    with time_stage("download"):
+        downloaded_size = await download_asset_file(session, asset.fileUrl, partial_path)
+    stage_bytes.observe(downloaded_size, stage="download")
+    await asyncio.to_thread(os.replace, partial_path, input_path)
+    logger.info(f"Downloaded {downloaded_size} bytes to {input_path}")
+
+    await asyncio.to_thread(checkpoint.mark_downloaded, input_path, downloaded_size)
+    return input_path
+
+
+async def segment_input(asset: Asset, input_path: str, checkpoint: JobCheckpoint) -> List[dict]:
+    chunks = await asyncio.to_thread(checkpoint.segments)
+    if chunks is not None:
+        logger.info(f"Resuming job {checkpoint.job_id} from {len(chunks)} existing segments")
+        return chunks
+
+    if asset.fileType == "video":
+        chunks = await extract_audio_and_split(
+            input_path,
+            config.MAX_CHUNK_SIZE_BYTES,
+            checkpoint.job_dir,
+        )
+    else:
+        chunks = await split_audio_file(
+            input_path,
+            config.MAX_CHUNK_SIZE_BYTES,
+            checkpoint.job_dir,
+        )
+
+    await asyncio.to_thread(checkpoint.mark_segmented, chunks)
+    return chunks
+
+
+async def transcribe_and_publish(
+    session: aiohttp.ClientSession,
+    asset: Asset,
+    chunks: List[dict],
+    checkpoint: JobCheckpoint,
+    publish: bool = True,
+) -> Tuple[List[str], int]:
+    """
+    Transcribes the chunks and, when `publish` is set, appends each
+    transcript to the asset as soon as every chunk before it is done, so
+    users see content while the job is still running. Publishing is best
+    effort: if an append fails the rest are skipped, and the final content
+    update fills in the full transcript.
+
+    Returns the transcript pieces (separators included, so they join with
+    "") and their total token count. Tokens are counted per piece as it
+    arrives, overlapping with the remaining transcriptions.
+    """
+    publishing = publish
+    if publishing:
+        try:
+            await reset_asset_content(session, asset.id)
+        except Exception as e:
+            logger.warning(f"Progressive publishing disabled for asset {asset.id}: {e}")
+            publishing = False
+
+    pieces = []
+    token_count = 0
+    async for index, text in iter_transcriptions(chunks, checkpoint):
+        piece = text if index == 0 else f"\n\n{text}"
+        piece_token_count = await count_tokens_async(piece)
+        pieces.append(piece)
+        token_count += piece_token_count
+
+        if not publishing:
+            continue
         try:
-            await update_job_heartbeat(job_id)
-            await asyncio.sleep(config.HEARBEAT_INTERVAL_SECONDS)
+            await append_asset_content(session, asset.id, index, piece, piece_token_count)
         except Exception as e:
-            logger.error(f"Error updating heartbeat for {job_id}: {e}")
+            logger.warning(f"Progressive publishing stopped for asset {asset.id} at chunk {index}: {e}")
+            publishing = False
+
+    return pieces, token_count
+
+
+def read_text_file(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
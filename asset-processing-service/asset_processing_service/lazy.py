@@ -0,0 +1,21 @@
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyPrimitive(Generic[T]):
+    """
+    An asyncio primitive (Condition, Semaphore, Event, ...) that is created
+    on first use. The objects owning one are usually built before the event
+    loop starts, and on Python 3.9 a primitive binds to whichever loop exists
+    when it is constructed; creating it lazily binds it to the running loop.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value: Optional[T] = None
+
+    def get(self) -> T:
+        if self._value is None:
+            self._value = self._factory()
+        return self._value
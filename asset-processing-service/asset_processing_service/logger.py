@@ -1,18 +1,203 @@
+import atexit
+import copy
+import json
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
 import sys
+import threading
+import time
+from typing import Dict, Tuple
+
+# Overridden from Config by configure_logging once the environment is loaded
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_MAX_MESSAGE_CHARS = 2000
+DEFAULT_THROTTLE_SECONDS = 30.0
+
+# Pass as `extra=THROTTLED` for messages logged on every loop iteration
+THROTTLED = {"throttle": True}
+
+
+class TruncatingFilter(logging.Filter):
+    """
+    Caps the length of a formatted message, so logging a large payload
+    costs neither queue memory nor a long stdout write. Tracebacks are
+    formatted later, on the writer thread, and capped by the formatters.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if self.max_chars > 0 and len(message) > self.max_chars:
+            record.msg = f"{message[:self.max_chars]}... [{len(message) - self.max_chars} more characters]"
+            record.args = None
+        return True
+
+
+def truncate_traceback(text: str, max_chars: int) -> str:
+    # The end of a traceback (the innermost frames and the error) matters most
+    if max_chars > 0 and len(text) > max_chars:
+        return f"[{len(text) - max_chars} earlier characters]...{text[-max_chars:]}"
+    return text
+
+
+class ThrottleFilter(logging.Filter):
+    """
+    Lets a throttled message through at most once per interval per call
+    site; the next one that passes says how many were suppressed. Warnings
+    and errors are never throttled.
+    """
+
+    def __init__(self, interval_seconds: float):
+        super().__init__()
+        self.interval_seconds = interval_seconds
+        self._last_emitted: Dict[Tuple[str, int], float] = {}
+        self._suppressed: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "throttle", False) or record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_emitted.get(key, float("-inf")) < self.interval_seconds:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last_emitted[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without blocking. When the
+    queue is full the record is dropped and counted, and the count is
+    reported once there is room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats the record here and drops exc_info. Only the
+        # message is resolved now (its args may change once the call
+        # returns); formatting, tracebacks included, is left to the writer.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                self.queue.put_nowait(
+                    logging.makeLogRecord(
+                        {
+                            "name": record.name,
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": f"Dropped {self.dropped} log messages because the log queue was full",
+                        }
+                    )
+                )
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room rather than failing on a full queue; the writer
+        # thread keeps draining it, so everything queued is still written
+        self.queue.put(self._sentinel)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self, max_traceback_chars: int = DEFAULT_MAX_MESSAGE_CHARS):
+        super().__init__('%(asctime)s [%(levelname)s]: %(message)s')
+        self.max_traceback_chars = max_traceback_chars
+
+    def formatException(self, ei) -> str:
+        return truncate_traceback(super().formatException(ei), self.max_traceback_chars)
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, max_traceback_chars: int = DEFAULT_MAX_MESSAGE_CHARS):
+        super().__init__()
+        self.max_traceback_chars = max_traceback_chars
+
+    def formatException(self, ei) -> str:
+        return truncate_traceback(super().formatException(ei), self.max_traceback_chars)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=DEFAULT_QUEUE_SIZE)
+_console_handler = logging.StreamHandler(sys.stdout)
+_truncating_filter = TruncatingFilter(DEFAULT_MAX_MESSAGE_CHARS)
+_throttle_filter = ThrottleFilter(DEFAULT_THROTTLE_SECONDS)
+
 
 def setup_logger():
+    """
+    Log calls only filter the record and put it on a bounded queue; a
+    background thread does the formatting and the writes to stdout, so a
+    slow or blocked stdout never stalls the event loop.
+    """
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
-    # Create a formatter
-    formatter = logging.Formatter('%(asctime)s [%(levelname)s]: %(message)s')
+    _console_handler.setFormatter(TextFormatter())
 
-    # Create a console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    queue_handler = DroppingQueueHandler(_log_queue)
+    queue_handler.addFilter(_throttle_filter)
+    queue_handler.addFilter(_truncating_filter)
+    logger.addHandler(queue_handler)
+
+    listener = DrainingQueueListener(_log_queue, _console_handler, respect_handler_level=True)
+    listener.start()
+    # Flushes whatever is still queued when the process exits
+    atexit.register(listener.stop)
 
     return logger
 
+
+def configure_logging(
+    level: str = "INFO",
+    json_format: bool = False,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    max_message_chars: int = DEFAULT_MAX_MESSAGE_CHARS,
+    throttle_seconds: float = DEFAULT_THROTTLE_SECONDS,
+) -> None:
+    logging.getLogger().setLevel(level.upper())
+    formatter_class = JsonFormatter if json_format else TextFormatter
+    _console_handler.setFormatter(formatter_class(max_message_chars))
+    # Read under the queue's own lock on every put, so it can be changed in place
+    _log_queue.maxsize = queue_size
+    _truncating_filter.max_chars = max_message_chars
+    _throttle_filter.interval_seconds = throttle_seconds
+
+
 logger = setup_logger()
@@ -1,117 +1,341 @@
 import asyncio
+import signal
 from collections import defaultdict
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
-from asset_processing_service.api_client import fetch_jobs, update_job_details
+import aiohttp
+
+from asset_processing_service.admission import ByteBudget
+from asset_processing_service.api_client import create_http_session, fetch_assets, fetch_jobs
+from asset_processing_service.autoscaler import WorkerAutoscaler
+from asset_processing_service.checkpoint import discard_checkpoint, prune_stale_checkpoints
 from asset_processing_service.config import config
-from asset_processing_service.logger import logger
+from asset_processing_service.heartbeat import HeartbeatAggregator
+from asset_processing_service.logger import THROTTLED, logger
 from asset_processing_service.job_processor import process_job
+from asset_processing_service.media_processor import close_transcription_client
+from asset_processing_service.metrics import (
+    active_workers,
+    jobs_total,
+    queue_depth,
+    start_metrics_server,
+    transcription_cache_bytes,
+    worker_target,
+)
+from asset_processing_service.models import Asset, AssetProcessingJob
+from asset_processing_service.prefetch import DownloadPrefetcher
+from asset_processing_service.scheduler import JobScheduler
+from asset_processing_service.stage_pools import shutdown_stage_pools, stage_pool_stats
+from asset_processing_service.transcription_cache import transcription_cache
+from asset_processing_service.tokenizer import preload_encoding
 
 
-async def job_fetcher(job_queue: asyncio.Queue, jobs_pending_or_in_progress: set):
-    while True:
-        try:
-            current_time = datetime.now().timestamp()          
-            logger.info(f"Fetching jobs: {current_time}")
-            jobs = await fetch_jobs()
-
-            for job in jobs:
-                if job.status == "in_progress" and job.lastHeartBeat:
-                    last_heartbeat_time = job.lastHeartBeat.timestamp()
-                    time_since_last_heartbeat = abs(current_time - last_heartbeat_time)
-                    logger.info(f"Time since last heartbeat for job {job.id}: {time_since_last_heartbeat}")
-
-                    if time_since_last_heartbeat > config.STUCK_JOB_THRESHOLD_SECONDS:
-                        logger.info(f"Job {job.id} is stuck. Failing job.")
-                        await update_job_details(job.id, {
-                            "status": "failed",
-                            "errorMessage": "Job is stuck - no heartbeat received recently",
-                            "attempts": job.attempts + 1
-                        })
-                        if job.id in jobs_pending_or_in_progress:
-                            jobs_pending_or_in_progress.remove(job.id)
+async def job_fetcher(
+    session: aiohttp.ClientSession,
+    heartbeats: HeartbeatAggregator,
+    scheduler: JobScheduler,
+    budget: ByteBudget,
+    prefetcher: DownloadPrefetcher,
+    jobs_pending_or_in_progress: set,
+):
+    cursor = None
+    last_full_sync_time = 0.0
+    # Jobs that didn't fit the byte budget yet, oldest first. Polling carries
+    # on regardless, so text jobs, stuck-job detection and max-attempts
+    # updates never wait behind large media.
+    deferred_jobs: Dict[str, Tuple[AssetProcessingJob, Optional[Asset]]] = {}
+    admitter_task = asyncio.create_task(deferred_job_admitter(scheduler, budget, prefetcher, deferred_jobs))
 
-                elif job.status in ["created", "failed"]:
-                    if job.attempts >= config.MAX_JOB_ATTEMPTS:
-                        logger.info(f"Job {job.id} has exceeded max attempts. Failing job.")
-                        await update_job_details(job.id, {
-                            "status": "max_attempts_exceeded",
-                            "errorMessage": "Max attempts exceeded"
-                        })
+    try:
+        while True:
+            try:
+                current_time = datetime.now().timestamp()
+                # Incremental fetches leave out jobs in progress, so a periodic full
+                # sync is still needed to notice jobs that stopped heartbeating.
+                full_sync = cursor is None or current_time - last_full_sync_time >= config.JOB_FULL_SYNC_INTERVAL_SECONDS
 
-                    elif job.id not in jobs_pending_or_in_progress:
-                        logger.info(f"Adding job to queue: {job.id}")
-                        jobs_pending_or_in_progress.add(job.id)
-                        await job_queue.put(job)
+                wait_seconds = 0.0
 
-            await asyncio.sleep(3)
+                if full_sync:
+                    logger.info(f"Fetching all jobs: {current_time}", extra=THROTTLED)
+                    jobs = await fetch_jobs(session)
+                    last_full_sync_time = current_time
+                else:
+                    # Don't let a long-poll run past the next full sync
+                    wait_seconds = max(0.0, min(
+                        config.JOB_LONG_POLL_SECONDS,
+                        last_full_sync_time + config.JOB_FULL_SYNC_INTERVAL_SECONDS - current_time,
+                    ))
+                    logger.info(f"Fetching jobs updated since {cursor.isoformat()}", extra=THROTTLED)
+                    jobs = await fetch_jobs(
+                        session,
+                        updated_since=cursor,
+                        limit=config.JOB_FETCH_LIMIT,
+                        wait_seconds=wait_seconds,
+                    )
 
-        except Exception as e:
-            logger.error(f"Error fetching jobs: {e}")
-            await asyncio.sleep(3)
+                if jobs:
+                    latest_update = max(job.updatedAt for job in jobs)
+                    if cursor is None or latest_update > cursor:
+                        cursor = latest_update
+
+                # Status transitions are sent together in one batched request
+                status_updates = []
+                new_jobs = []
+
+                for job in jobs:
+                    if job.status == "in_progress" and job.lastHeartBeat:
+                        # Claimed elsewhere while it waited for budget here
+                        if deferred_jobs.pop(job.id, None) is not None:
+                            jobs_pending_or_in_progress.discard(job.id)
+
+                        last_heartbeat_time = job.lastHeartBeat.timestamp()
+                        time_since_last_heartbeat = abs(current_time - last_heartbeat_time)
+                        logger.info(f"Time since last heartbeat for job {job.id}: {time_since_last_heartbeat}", extra=THROTTLED)
+
+                        if time_since_last_heartbeat > config.STUCK_JOB_THRESHOLD_SECONDS:
+                            logger.info(f"Job {job.id} is stuck. Failing job.")
+                            status_updates.append(heartbeats.update(job.id, {
+                                "status": "failed",
+                                "errorMessage": "Job is stuck - no heartbeat received recently",
+                                "attempts": job.attempts + 1
+                            }))
+                            if job.id in jobs_pending_or_in_progress:
+                                jobs_pending_or_in_progress.remove(job.id)
+
+                    elif job.status in ["created", "failed"]:
+                        if job.attempts >= config.MAX_JOB_ATTEMPTS:
+                            logger.info(f"Job {job.id} has exceeded max attempts. Failing job.")
+                            status_updates.append(heartbeats.update(job.id, {
+                                "status": "max_attempts_exceeded",
+                                "errorMessage": "Max attempts exceeded"
+                            }))
+                            if deferred_jobs.pop(job.id, None) is not None:
+                                jobs_pending_or_in_progress.discard(job.id)
+                            await asyncio.to_thread(discard_checkpoint, job.id)
+
+                        elif job.id not in jobs_pending_or_in_progress:
+                            jobs_pending_or_in_progress.add(job.id)
+                            new_jobs.append(job)
+
+                await asyncio.gather(*status_updates)
+
+                # The scheduler orders jobs by asset size and type, so resolve assets up front
+                assets = await fetch_assets(session, [job.assetId for job in new_jobs]) if new_jobs else {}
+                for job in new_jobs:
+                    deferred_jobs[job.id] = (job, assets.get(job.assetId))
+                await admit_deferred_jobs(scheduler, budget, prefetcher, deferred_jobs)
+                if deferred_jobs:
+                    logger.info(f"Byte budget exhausted. {len(deferred_jobs)} jobs deferred", extra=THROTTLED)
+
+                # A long-poll waits server-side, so only sleep when polling or when the
+                # API answered an empty long-poll early
+                fetch_duration = datetime.now().timestamp() - current_time
+                if config.JOB_LONG_POLL_SECONDS <= 0 or (not full_sync and not jobs and fetch_duration < wait_seconds / 2):
+                    await asyncio.sleep(config.JOB_POLL_INTERVAL_SECONDS)
+
+            except Exception as e:
+                logger.error(f"Error fetching jobs: {e}")
+                await asyncio.sleep(config.JOB_POLL_INTERVAL_SECONDS)
+    finally:
+        admitter_task.cancel()
+        await asyncio.gather(admitter_task, return_exceptions=True)
+
+
+async def admit_deferred_jobs(
+    scheduler: JobScheduler,
+    budget: ByteBudget,
+    prefetcher: DownloadPrefetcher,
+    deferred_jobs: Dict[str, Tuple[AssetProcessingJob, Optional[Asset]]],
+) -> None:
+    """
+    Queues every deferred job that now fits the byte budget. A job that
+    doesn't fit stays deferred without holding back smaller ones behind it.
+    """
+    for job_id, (job, asset) in list(deferred_jobs.items()):
+        if not budget.try_reserve(job_id, asset):
+            continue
+        del deferred_jobs[job_id]
+        logger.info(f"Adding job to queue: {job_id}")
+        await scheduler.put(job, asset)
+        prefetcher.submit(job, asset)
+
+
+async def deferred_job_admitter(
+    scheduler: JobScheduler,
+    budget: ByteBudget,
+    prefetcher: DownloadPrefetcher,
+    deferred_jobs: Dict[str, Tuple[AssetProcessingJob, Optional[Asset]]],
+) -> None:
+    # Admits deferred jobs as soon as running ones free up budget, rather
+    # than at the next poll
+    while True:
+        await budget.wait_for_release()
+        if deferred_jobs:
+            await admit_deferred_jobs(scheduler, budget, prefetcher, deferred_jobs)
+
+async def stage_stats_reporter(autoscaler: WorkerAutoscaler, prefetcher: DownloadPrefetcher):
+    while True:
+        await asyncio.sleep(config.STAGE_STATS_LOG_INTERVAL_SECONDS)
+        logger.info(f"Stage pool stats: {stage_pool_stats()}")
+        logger.info(f"Worker pool stats: {autoscaler.stats()}")
+        logger.info(f"Prefetch stats: {prefetcher.stats()}")
 
 
 async def worker(
+    session: aiohttp.ClientSession,
+    heartbeats: HeartbeatAggregator,
     worker_id: int,
-    job_queue: asyncio.Queue,
+    scheduler: JobScheduler,
+    budget: ByteBudget,
     job_pending_or_in_progress: set,
     job_locks: dict,
+    fast_lane_only: bool = False,
+    autoscaler: Optional[WorkerAutoscaler] = None,
+    prefetcher: Optional[DownloadPrefetcher] = None,
 ):
+    # Autoscaled workers exit between jobs once the pool is scaled down
+    should_exit = (lambda: autoscaler.should_retire(worker_id)) if autoscaler is not None else None
+
     while True:
         try:
-            job = await job_queue.get()
+            entry = await scheduler.get(fast_lane_only=fast_lane_only, should_exit=should_exit)
+            if entry is None:
+                return
+            job = entry.job
 
+            if autoscaler is not None:
+                autoscaler.worker_busy()
+            active_workers.inc()
             async with job_locks[job.id]:
                 logger.info(f"Worker {worker_id} processing {job.id}...")
                 try:
-                    await process_job(job)
+                    claimed = await prefetcher.take(job.id) if prefetcher is not None else None
+                    await process_job(session, heartbeats, job, entry.asset, claimed=claimed)
                 except Exception as e:
                     logger.exception(f"Error processing job {job.id}: {e}")
+                    jobs_total.inc(outcome="failed")
                     error_message = str(e)
-                    await update_job_details(
+                    # Fenced by the lease, so a job that another instance owns
+                    # (or that was never claimed here) is left alone
+                    await heartbeats.update(
                         job.id,
                         {
                             "status": "failed",
                             "errorMessage": error_message,
                             "attempts": job.attempts + 1
                         },
+                        owner_id=config.INSTANCE_ID,
                     )
                 finally:
-                    job_pending_or_in_progress.remove(job.id)
+                    job_pending_or_in_progress.discard(job.id)
                     job_locks.pop(job.id, None)
+                    scheduler.task_done(entry)
+                    await budget.release(job.id)
+                    if autoscaler is not None:
+                        autoscaler.worker_idle()
+                    active_workers.dec()
 
-            job_queue.task_done()
         except Exception as e:
             logger.error(f"Error in worker {worker_id}: {e}")
             await asyncio.sleep(5)
 
 
 async def async_main():
-    job_queue = asyncio.Queue()
+    scheduler = JobScheduler()
+    budget = ByteBudget(config.MAX_INFLIGHT_BYTES, config.MAX_INFLIGHT_DISK_BYTES)
     jobs_pending_or_inprogress = set()
     job_locks = defaultdict(asyncio.Lock)
 
-    job_fetcher_task = asyncio.create_task(job_fetcher(job_queue, jobs_pending_or_inprogress))
+    main_task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, main_task.cancel)
+    except NotImplementedError:
+        pass
+
+    await asyncio.to_thread(prune_stale_checkpoints)
+    await preload_encoding()
+
+    session = create_http_session()
+    heartbeats = HeartbeatAggregator(session)
+
+    heartbeat_task = asyncio.create_task(heartbeats.run())
+    prefetcher = DownloadPrefetcher(session, heartbeats, config.PREFETCH_MAX_BYTES, config.PREFETCH_CONCURRENCY)
+    job_fetcher_task = asyncio.create_task(
+        job_fetcher(session, heartbeats, scheduler, budget, prefetcher, jobs_pending_or_inprogress)
+    )
 
-    workers = [
+    def spawn_media_worker(worker_id: int) -> "asyncio.Task[None]":
+        return asyncio.create_task(
+            worker(
+                session,
+                heartbeats,
+                worker_id,
+                scheduler,
+                budget,
+                jobs_pending_or_inprogress,
+                job_locks,
+                autoscaler=autoscaler,
+                prefetcher=prefetcher,
+            )
+        )
+
+    autoscaler = WorkerAutoscaler(scheduler, spawn_media_worker)
+    autoscaler.start()
+
+    queue_depth.set_function(scheduler.fast_lane_size, lane="fast")
+    queue_depth.set_function(lambda: scheduler.qsize() - scheduler.fast_lane_size(), lane="media")
+    worker_target.set_function(lambda: autoscaler.target)
+    transcription_cache_bytes.set_function(lambda: transcription_cache.stats()["size_bytes"])
+    metrics_runner = await start_metrics_server()
+
+    # Fast-lane workers only take text assets, so they are never stuck behind media
+    fast_lane_workers = [
         asyncio.create_task(
             worker(
+                session,
+                heartbeats,
                 i + 1,
-                job_queue,
+                scheduler,
+                budget,
                 jobs_pending_or_inprogress,
                 job_locks,
+                fast_lane_only=True,
             )
         )
-        for i in range(config.MAX_NUM_WORKERS)
+        for i in range(config.FAST_LANE_WORKERS)
     ]
 
-    await asyncio.gather(job_fetcher_task, *workers)
+    autoscaler_task = asyncio.create_task(autoscaler.run())
+    stage_stats_task = asyncio.create_task(stage_stats_reporter(autoscaler, prefetcher))
+    background_tasks = [job_fetcher_task, autoscaler_task, stage_stats_task, *fast_lane_workers]
+
+    try:
+        await asyncio.gather(heartbeat_task, *background_tasks)
+    finally:
+        logger.info("Shutting down job fetcher and workers")
+        background_tasks.extend(autoscaler.worker_tasks())
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await prefetcher.close()
+        # Deliver any status updates queued during shutdown before closing
+        heartbeat_task.cancel()
+        await asyncio.gather(heartbeat_task, return_exceptions=True)
+        await heartbeats.flush()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await session.close()
+        await close_transcription_client()
+        shutdown_stage_pools()
 
 
 def main():
     try:
         asyncio.run(async_main())
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("Program terminated")
         exit()
 
@@ -1,227 +1,796 @@
 import asyncio
+from collections import deque
+from contextlib import contextmanager
+import io
+import math
 import os
+import random
+import re
 import shutil
 import tempfile
-from typing import List
-import uuid
+import time
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Deque, Iterator, List, Optional, Tuple
 import ffmpeg
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
 
+from asset_processing_service.checkpoint import JobCheckpoint
 from asset_processing_service.config import config
+from asset_processing_service.encoding_profiles import EncodingProfile, profile_for_file_type
+from asset_processing_service.lazy import LazyPrimitive
 from asset_processing_service.logger import logger
+from asset_processing_service.metrics import (
+    hedged_transcriptions_total,
+    inflight_transcriptions,
+    retries_total,
+    stage_bytes,
+    time_stage,
+)
+from asset_processing_service.stage_pools import ffmpeg_pool, probe_pool
+from asset_processing_service.transcription_cache import transcription_cache
+
+
+async def split_audio_file(
+    input_path: str,
+    max_chunk_size_bytes: int,
+    work_dir: str,
+    profile: Optional[EncodingProfile] = None,
+):
+    """
+    Splits an audio file into chunks encoded with `profile` (by default the
+    one configured for audio files).
+    """
+    profile = profile or profile_for_file_type("audio")
+    file_extension = os.path.splitext(input_path)[1].lower().lstrip(".")
 
+    if profile.passthrough and file_extension == profile.container:
+        logger.info(f"Input is already {profile.container}. Skipping conversion.")
+        return await split_encoded_audio(input_path, max_chunk_size_bytes, work_dir)
 
-async def split_audio_file(audio_buffer: bytes, max_chunk_size_bytes: int, original_file_name: str):
-    file_name_without_ext, file_extension = os.path.splitext(original_file_name)
-    chunks = []
-    temp_dir = tempfile.mkdtemp()
+    return await encode_audio_segments(input_path, max_chunk_size_bytes, work_dir, profile)
 
-    try:
-        # Write the original audio buffer to a temporary file
-        temp_input_path = os.path.join(temp_dir, original_file_name)
-        with open(temp_input_path, "wb") as f:
-            f.write(audio_buffer)
-
-        # Check if the file is an MP3 file
-        if file_extension.lower() == ".mp3":
-            logger.info("Input is an MP3 file. Skipping conversion.")
-            temp_mp3_path = temp_input_path
-        else:
-            logger.info("Converting input audio to MP3 format.")
-            temp_mp3_path = os.path.join(
-                temp_dir, f"{file_name_without_ext}_converted.mp3"
-            )
-            await convert_audio_to_mp3(temp_input_path, temp_mp3_path)
 
+async def split_encoded_audio(input_path: str, max_chunk_size_bytes: int, work_dir: str):
+    """
+    Splits an already encoded audio file into chunks without re-encoding.
+    The input's bitrate is unknown, so it is probed to size the chunks.
+    """
+    file_name_without_ext, file_extension = os.path.splitext(os.path.basename(input_path))
+    # Chunks outlive this call; they are uploaded from here and removed with the work dir
+    chunk_dir = tempfile.mkdtemp(prefix="chunks-", dir=work_dir)
+
+    try:
         # Probe the audio file to get total size and duration
-        probe = await asyncio.to_thread(ffmpeg.probe, temp_mp3_path)
+        with time_stage("probe"):
+            probe = await probe_pool.run(ffmpeg.probe, input_path)
         format_info = probe.get("format", {})
         total_size = int(format_info.get("size", 0))
         duration = float(format_info.get("duration", 0.0))
 
-         # Calculate the number of chunks needed
-        num_chunks = max(
-            1, int((total_size + max_chunk_size_bytes - 1) // max_chunk_size_bytes)
-        )
+        logger.info(f"Total size: {total_size}")
+        logger.info(f"Duration: {duration}")
 
-        # Calculate chunk duration
-        chunk_duration = duration / num_chunks
+        if config.CHUNKING_MODE == "silence" and duration > 0:
+            max_chunk_seconds = max_chunk_size_bytes * 0.95 / (total_size / duration) if total_size else duration
+            silences = await detect_silences_near_cuts(input_path, duration, max_chunk_seconds)
+            split_points = silence_aligned_split_points(duration, silences, max_chunk_seconds)
+            logger.info(f"Splitting at silences into {len(split_points) + 1} chunks.")
+            segment_options = {"segment_times": format_segment_times(split_points)}
+        else:
+            # Calculate the number of chunks needed
+            num_chunks = max(
+                1, int((total_size + max_chunk_size_bytes - 1) // max_chunk_size_bytes)
+            )
 
+            # Calculate chunk duration
+            chunk_duration = duration / num_chunks
+            split_points = [chunk_duration * i for i in range(1, num_chunks)]
 
-        logger.info(f"Total size: {total_size}")
-        logger.info(f"Duration: {duration}")
-        logger.info(f"Splitting into {num_chunks} chunks of {chunk_duration} seconds each.")
+            logger.info(f"Splitting into {num_chunks} chunks of {chunk_duration} seconds each.")
+            segment_options = {"segment_time": chunk_duration}
 
         # Split the audio file into chunks
         output_pattern = os.path.join(
-            temp_dir, f"{file_name_without_ext}_chunk_%03d.mp3" 
+            chunk_dir, f"{file_name_without_ext}_chunk_%03d{file_extension}"
         )
-        split_cmd = ffmpeg.input(temp_mp3_path).output(
+        split_cmd = ffmpeg.input(input_path).output(
             output_pattern,
             format="segment",
-            segment_time=chunk_duration,
             c="copy",
             reset_timestamps=1,
+            **segment_options,
         )
-        await asyncio.to_thread(
-            ffmpeg.run, split_cmd, capture_stdout=True, capture_stderr=True
+        with time_stage("segment"):
+            await run_ffmpeg(split_cmd)
+
+        chunks = collect_chunk_files(
+            chunk_dir,
+            file_name_without_ext,
+            max_chunk_size_bytes,
+            [0.0, *split_points, duration],
+            extension=file_extension,
         )
-
-        chunk_files = sorted(
-            [
-                f
-                for f in os.listdir(temp_dir)
-                if f.startswith(f"{file_name_without_ext}_chunk_")
-                and f.endswith(".mp3")
-            ]
-        )
-
-        for chunk_file_name in chunk_files:
-            chunk_path = os.path.join(temp_dir, chunk_file_name)
-            with open(chunk_path, "rb") as f:
-                chunk_data = f.read()
-            chunk_size = len(chunk_data)
-
-            if chunk_size <= max_chunk_size_bytes:
-                chunks.append(
-                    {
-                        "data": chunk_data,
-                        "size": chunk_size,
-                        "file_name": chunk_file_name,
-                    }
-                )
-            else:
-                logger.info(
-                    f"Chunk {chunk_file_name} exceeds the maximum size after splitting."
-                )
-                raise ValueError("Chunk size exceeds the maximum size after splitting.")
+        stage_bytes.observe(sum(chunk["size"] for chunk in chunks), stage="segment")
 
         return chunks
 
-
     except Exception as e:
         logger.error(f"Error splitting audio file: {e}")
+        shutil.rmtree(chunk_dir, ignore_errors=True)
         raise
-    finally:
-        # Clean up temporary files
-        shutil.rmtree(temp_dir)
 
 
-async def convert_audio_to_mp3(input_path: str, output_path: str):
+def collect_chunk_files(
+    chunk_dir: str,
+    file_name_without_ext: str,
+    max_chunk_size_bytes: int,
+    boundaries: Optional[List[float]] = None,
+    extension: str = ".mp3",
+) -> List[dict]:
+    """
+    Lists the segments ffmpeg wrote, in order. If the cut points are known
+    (`boundaries`: 0, each split point, then the total duration), chunks also
+    get their "start" and "duration" in seconds.
+    """
+    chunks = []
+    chunk_files = sorted(
+        [
+            f
+            for f in os.listdir(chunk_dir)
+            if f.startswith(f"{file_name_without_ext}_chunk_")
+            and f.endswith(extension)
+        ]
+    )
+
+    for chunk_file_name in chunk_files:
+        chunk_path = os.path.join(chunk_dir, chunk_file_name)
+        chunk_size = os.path.getsize(chunk_path)
+
+        if chunk_size <= max_chunk_size_bytes:
+            chunks.append(
+                {
+                    "path": chunk_path,
+                    "size": chunk_size,
+                    "file_name": chunk_file_name,
+                }
+            )
+        else:
+            logger.info(
+                f"Chunk {chunk_file_name} exceeds the maximum size after splitting."
+            )
+            raise ValueError("Chunk size exceeds the maximum size after splitting.")
+
+    if boundaries is not None and len(boundaries) == len(chunks) + 1:
+        for chunk, start, end in zip(chunks, boundaries, boundaries[1:]):
+            chunk["start"] = round(start, 3)
+            chunk["duration"] = round(end - start, 3)
+
+    return chunks
+
+
+async def convert_audio(input_path: str, output_path: str, profile: EncodingProfile):
     """
-    Converts an audio file to MP3 format.
+    Converts the first audio stream of a file using the given encoding profile.
     """
     try:
-        # Use FFmpeg to convert the audio file to MP3
         conversion_cmd = ffmpeg.input(input_path).output(
             output_path,
-            format="mp3",
-            acodec="libmp3lame",
-            q=0,
-        )
-        await asyncio.to_thread(
-            ffmpeg.run, conversion_cmd, capture_stdout=True, capture_stderr=True
+            map="a:0",
+            format=profile.container,
+            **profile.output_options(),
         )
+        with time_stage("convert"):
+            await run_ffmpeg(conversion_cmd)
 
-        mp3_file_size = os.path.getsize(output_path)
+        converted_file_size = os.path.getsize(output_path)
+        stage_bytes.observe(converted_file_size, stage="convert")
         logger.info(
-            f"Converted MP3 file size: ({round(mp3_file_size / 1024 / 1024)} MB bytes"
+            f"Converted {profile.name} file size: {round(converted_file_size / 1024 / 1024)} MB"
         )
     except ffmpeg.Error as e:
-        logger.error(f"Error converting audio to MP3: {e.stderr.decode()}")
+        logger.error(f"Error converting audio: {e.stderr.decode()}")
         raise
 
 
-async def extract_audio_and_split(video_buffer: bytes, max_chunk_size_bytes: int, original_file_name: str):
-    temp_dir = os.path.join(os.getcwd(), "temp", str(uuid.uuid4()))
-    os.makedirs(temp_dir, exist_ok=True)
+async def extract_audio_and_split(
+    input_path: str,
+    max_chunk_size_bytes: int,
+    work_dir: str,
+    profile: Optional[EncodingProfile] = None,
+):
+    profile = profile or profile_for_file_type("video")
+    if config.SINGLE_PASS_VIDEO_EXTRACTION:
+        return await encode_audio_segments(input_path, max_chunk_size_bytes, work_dir, profile)
+
+    temp_dir = tempfile.mkdtemp(dir=work_dir)
 
-    base_file_name = os.path.basename(original_file_name)
-    input_file = os.path.join(temp_dir, base_file_name)
-    file_name_without_ext = os.path.splitext(base_file_name)[0]
-    output_mp3 = os.path.join(temp_dir, f"{file_name_without_ext}.mp3")
+    file_name_without_ext = os.path.splitext(os.path.basename(input_path))[0]
+    output_audio = os.path.join(temp_dir, f"{file_name_without_ext}.{profile.container}")
 
     try:
-        with open(input_file, "wb") as f:
-            f.write(video_buffer)
+        await convert_audio(input_path, output_audio, profile)
+        return await split_encoded_audio(output_audio, max_chunk_size_bytes, work_dir)
 
-        stream = ffmpeg.input(input_file)
-        stream = ffmpeg.output(stream, output_mp3, acodec="libmp3lame", q=0, map="a")
+    except Exception as e:
+        logger.error(f"Error extracting audio and splitting: {e}")
+        raise
+
+    finally:
+        shutil.rmtree(temp_dir)
 
-        await asyncio.to_thread(
-            ffmpeg.run, stream, capture_stdout=True, capture_stderr=True
+
+async def encode_audio_segments(
+    input_path: str,
+    max_chunk_size_bytes: int,
+    work_dir: str,
+    profile: EncodingProfile,
+):
+    """
+    Encodes the first audio stream of an audio or video file into
+    size-bounded segments in a single ffmpeg pass. The profile's constant
+    bitrate lets the segment length be computed upfront, so no intermediate
+    file is needed. The input is only probed for its duration, which gives
+    each chunk its time range (used for transcription deadlines and hedging).
+    """
+    chunk_dir = tempfile.mkdtemp(prefix="chunks-", dir=work_dir)
+    file_name_without_ext = os.path.splitext(os.path.basename(input_path))[0]
+
+    try:
+        duration = await probe_duration(input_path)
+        if config.PARALLEL_TRANSCODING and duration is not None and duration >= config.PARALLEL_TRANSCODING_MIN_SECONDS:
+            return await encode_audio_slices(
+                input_path, duration, max_chunk_size_bytes, chunk_dir, profile
+            )
+
+        segment_time = segment_time_for_bitrate(max_chunk_size_bytes, profile.bitrate_kbps)
+        boundaries = None
+
+        if config.CHUNKING_MODE == "silence":
+            if duration is None:
+                # Without a duration the cut windows are unknown, so scan it all
+                duration, silences = await detect_silences(input_path)
+            else:
+                silences = await detect_silences_near_cuts(input_path, duration, segment_time)
+            split_points = silence_aligned_split_points(duration, silences, segment_time)
+            boundaries = [0.0, *split_points, duration]
+            logger.info(
+                f"Encoding audio into {len(split_points) + 1} silence-aligned segments "
+                f"with the {profile.name} profile."
+            )
+            segment_options = {"segment_times": format_segment_times(split_points)}
+        else:
+            logger.info(
+                f"Encoding audio into segments of {segment_time} seconds "
+                f"with the {profile.name} profile."
+            )
+            segment_options = {"segment_time": segment_time}
+            if duration is not None:
+                # The segment muxer cuts at the first frame past each multiple of segment_time
+                num_chunks = max(1, math.ceil(duration / segment_time))
+                boundaries = [0.0, *(round(segment_time * i, 3) for i in range(1, num_chunks)), duration]
+
+        output_pattern = os.path.join(
+            chunk_dir, f"{file_name_without_ext}_chunk_%03d.{profile.container}"
         )
+        stream = ffmpeg.input(input_path).output(
+            output_pattern,
+            map="a:0",
+            format="segment",
+            segment_format=profile.container,
+            reset_timestamps=1,
+            **profile.output_options(),
+            **segment_options,
+        )
+        with time_stage("extract"):
+            await run_ffmpeg(stream)
+
+        chunks = collect_chunk_files(
+            chunk_dir,
+            file_name_without_ext,
+            max_chunk_size_bytes,
+            boundaries,
+            extension=f".{profile.container}",
+        )
+        stage_bytes.observe(sum(chunk["size"] for chunk in chunks), stage="extract")
+        return chunks
+
+    except ffmpeg.Error as e:
+        logger.error(f"Error encoding audio segments: {e.stderr.decode()}")
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        raise
+    except Exception as e:
+        logger.error(f"Error encoding audio segments: {e}")
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        raise
 
-        with open(output_mp3, "rb") as f:
-            mp3_buffer = f.read()
 
-        chunks = await split_audio_file(
-            mp3_buffer, max_chunk_size_bytes, f"{file_name_without_ext}.mp3"
+async def encode_audio_slices(
+    input_path: str,
+    duration: float,
+    max_chunk_size_bytes: int,
+    chunk_dir: str,
+    profile: EncodingProfile,
+) -> List[dict]:
+    """
+    Encodes each chunk's time range with its own ffmpeg process, seeking
+    into the input, so a long file is transcoded on as many cores as the
+    ffmpeg stage pool has instead of one.
+    """
+    file_name_without_ext = os.path.splitext(os.path.basename(input_path))[0]
+    max_chunk_seconds = segment_time_for_bitrate(max_chunk_size_bytes, profile.bitrate_kbps)
+
+    if config.CHUNKING_MODE == "silence":
+        silences = await detect_silences_near_cuts(input_path, duration, max_chunk_seconds)
+        split_points = silence_aligned_split_points(duration, silences, max_chunk_seconds)
+    else:
+        # At least one chunk per ffmpeg worker, so short files still use every core
+        num_chunks = max(math.ceil(duration / max_chunk_seconds), ffmpeg_pool.max_workers)
+        split_points = [round(duration * i / num_chunks, 3) for i in range(1, num_chunks)]
+    boundaries = [0.0, *split_points, duration]
+
+    logger.info(
+        f"Encoding audio as {len(boundaries) - 1} slices in parallel "
+        f"with the {profile.name} profile."
+    )
+
+    def encode_slice(index: int, start: float, end: float):
+        output_path = os.path.join(
+            chunk_dir, f"{file_name_without_ext}_chunk_{index:03d}.{profile.container}"
+        )
+        stream = ffmpeg.input(input_path, ss=start, t=round(end - start, 3)).output(
+            output_path,
+            map="a:0",
+            format=profile.container,
+            **profile.output_options(),
         )
+        return run_ffmpeg(stream)
 
-        return chunks
+    with time_stage("extract"):
+        await gather_or_cancel(
+            [
+                encode_slice(index, start, end)
+                for index, (start, end) in enumerate(zip(boundaries, boundaries[1:]))
+            ]
+        )
+
+    chunks = collect_chunk_files(
+        chunk_dir,
+        file_name_without_ext,
+        max_chunk_size_bytes,
+        boundaries,
+        extension=f".{profile.container}",
+    )
+    stage_bytes.observe(sum(chunk["size"] for chunk in chunks), stage="extract")
+    return chunks
 
+
+async def run_ffmpeg(stream) -> Tuple[bytes, bytes]:
+    """
+    Runs an ffmpeg-python stream in the ffmpeg stage pool, like ffmpeg.run
+    with stdout and stderr captured. Cancelling the caller kills ffmpeg, so
+    nothing keeps writing into a chunk dir that is about to be removed.
+    """
+    returncode, stdout, stderr = await ffmpeg_pool.run_process(stream.compile())
+    if returncode != 0:
+        raise ffmpeg.Error("ffmpeg", stdout, stderr)
+    return stdout, stderr
+
+
+async def gather_or_cancel(coroutines: List[Awaitable[Any]]) -> List[Any]:
+    """
+    Like asyncio.gather, but the first failure cancels whatever has not
+    finished yet instead of leaving it running.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def probe_duration(input_path: str) -> Optional[float]:
+    """
+    Reads the container's duration, or None if it can't be probed (in which
+    case callers fall back to a single ffmpeg pass).
+    """
+    try:
+        with time_stage("probe"):
+            probe = await probe_pool.run(ffmpeg.probe, input_path)
+        duration = float(probe.get("format", {}).get("duration", 0.0))
     except Exception as e:
-        logger.error(f"Error extracting audio and splitting: {e}")
+        logger.warning(f"Could not probe the duration of {input_path}: {e}")
+        return None
+    return duration if duration > 0 else None
+
+
+def segment_time_for_bitrate(max_chunk_size_bytes: int, bitrate_kbps: int) -> float:
+    # Leave headroom for frame padding and container overhead
+    bytes_per_second = bitrate_kbps * 1000 / 8
+    return round(max_chunk_size_bytes * 0.95 / bytes_per_second, 3)
+
+
+async def detect_silences(
+    input_path: str, start: float = 0.0, length: Optional[float] = None
+) -> Tuple[float, List[Tuple[float, float]]]:
+    """
+    Runs ffmpeg's silencedetect filter over the first audio stream and
+    returns the media duration and the (start, end) of each silence. With
+    `length`, only that range from `start` is scanned; silence times are
+    still relative to the start of the file.
+    """
+    input_options = {"ss": start, "t": length} if length is not None else {}
+    stream = ffmpeg.input(input_path, **input_options).output(
+        "-",
+        format="null",
+        map="a:0",
+        af=f"silencedetect=noise={config.SILENCE_NOISE_DB}dB:d={config.SILENCE_MIN_SECONDS}",
+    )
+    try:
+        with time_stage("silencedetect"):
+            _, stderr = await run_ffmpeg(stream)
+    except ffmpeg.Error as e:
+        logger.error(f"Error detecting silences: {e.stderr.decode(errors='replace')}")
         raise
 
-    finally:
-        shutil.rmtree(temp_dir)
+    duration, silences = parse_silencedetect_output(stderr.decode(errors="replace"))
+    if start:
+        silences = [(silence_start + start, silence_end + start) for silence_start, silence_end in silences]
+    return duration, silences
+
+
+async def detect_silences_near_cuts(
+    input_path: str, duration: float, max_chunk_seconds: float
+) -> List[Tuple[float, float]]:
+    """
+    Scans only the stretches where silence_aligned_split_points may place a
+    cut, each in its own ffmpeg process, instead of decoding the whole
+    file. A silence crossing a window edge is clipped to the window, which
+    is harmless for picking cut points.
+    """
+    results = await gather_or_cancel(
+        [
+            detect_silences(input_path, start=start, length=length)
+            for start, length in silence_search_windows(duration, max_chunk_seconds)
+        ]
+    )
+    return [silence for _, silences in results for silence in silences]
+
+
+def parse_silencedetect_output(output: str) -> Tuple[float, List[Tuple[float, float]]]:
+    # The decoded length ("time=" progress) is more reliable than the header's Duration
+    times = re.findall(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)", output)
+    if not times:
+        times = re.findall(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", output)
+    hours, minutes, seconds = times[-1] if times else (0, 0, 0)
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    silences = []
+    silence_start = None
+    for match in re.finditer(r"silence_(start|end): (-?\d+(?:\.\d+)?)", output):
+        kind, value = match.group(1), max(0.0, float(match.group(2)))
+        if kind == "start":
+            silence_start = value
+        elif silence_start is not None:
+            silences.append((silence_start, value))
+            silence_start = None
+    if silence_start is not None:
+        silences.append((silence_start, duration))
+
+    return duration, silences
+
+
+def silence_aligned_split_points(
+    duration: float, silences: List[Tuple[float, float]], max_chunk_seconds: float
+) -> List[float]:
+    """
+    Picks cut points near multiples of CHUNK_TARGET_SECONDS, moving each one
+    to the middle of the nearest silence within CHUNK_SILENCE_SEARCH_SECONDS
+    so words are not cut in half. The targets don't drift with earlier cuts,
+    so only the windows from silence_search_windows need to be scanned. No
+    chunk is longer than `max_chunk_seconds`.
+    """
+    target, window = silence_search_params(max_chunk_seconds)
+    midpoints = [(start + end) / 2 for start, end in silences]
+
+    split_points = []
+    position = 0.0
+    while duration - position > min(target + window, max_chunk_seconds):
+        ideal = target * (len(split_points) + 1)
+        earliest = ideal - window
+        latest = min(ideal + window, position + max_chunk_seconds)
+        candidates = [midpoint for midpoint in midpoints if earliest <= midpoint <= latest]
+        cut = min(candidates, key=lambda midpoint: abs(midpoint - ideal)) if candidates else min(ideal, latest)
+        split_points.append(round(cut, 3))
+        position = cut
+
+    return split_points
+
+
+def silence_search_windows(duration: float, max_chunk_seconds: float) -> List[Tuple[float, float]]:
+    """
+    The (start, length) of each stretch silence_aligned_split_points may
+    look for a silence in.
+    """
+    target, window = silence_search_params(max_chunk_seconds)
+    windows = []
+    ideal = target
+    while ideal - window < duration:
+        start = max(0.0, ideal - window)
+        windows.append((round(start, 3), round(min(ideal + window, duration) - start, 3)))
+        ideal += target
+    return windows
+
+
+def silence_search_params(max_chunk_seconds: float) -> Tuple[float, float]:
+    # The search window is at most half the target, so windows never overlap
+    target = min(config.CHUNK_TARGET_SECONDS, max_chunk_seconds)
+    return target, min(config.CHUNK_SILENCE_SEARCH_SECONDS, target / 2)
+
+
+def format_segment_times(split_points: List[float]) -> str:
+    # The segment muxer needs at least one time; one past the end yields a single chunk
+    return ",".join(str(point) for point in split_points) or "999999"
+
+
+_transcription_client: Optional[AsyncOpenAI] = None
+_transcription_semaphore: LazyPrimitive[asyncio.Semaphore] = LazyPrimitive(
+    lambda: asyncio.Semaphore(config.MAX_CONCURRENT_TRANSCRIPTIONS)
+)
+
+# Cumulative API request counts, read by the worker autoscaler
+transcription_request_stats = {"requests": 0, "rate_limited": 0}
+
+
+def get_transcription_client() -> AsyncOpenAI:
+    global _transcription_client
+    if _transcription_client is None:
+        _transcription_client = AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            base_url=config.OPENAI_BASE_URL,
+            timeout=config.TRANSCRIPTION_TIMEOUT_SECONDS,
+            # Retries are handled by transcribe_with_retry
+            max_retries=0,
+        )
+    return _transcription_client
+
+
+def get_transcription_semaphore() -> asyncio.Semaphore:
+    # Shared by every job so the number of in-flight API requests is capped process-wide
+    return _transcription_semaphore.get()
+
+
+async def close_transcription_client() -> None:
+    global _transcription_client
+    if _transcription_client is not None:
+        await _transcription_client.close()
+        _transcription_client = None
+
 
+def is_retryable_transcription_error(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
 
-async def transcribe_chunks(chunks: List[dict]) -> List[str]:
 
-    async def transcribe_chunk(index: int, chunk: dict) -> dict:
+def transcription_retry_delay(error: Exception, attempt: int) -> float:
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
         try:
-            logger.info(
-                f"Starting transcription for chunk {index}: {chunk['file_name']}"
-            )
-            temp_file_path = os.path.join(os.getcwd(), "temp", chunk["file_name"])
-            os.makedirs(os.path.dirname(temp_file_path), exist_ok=True)
-
-            # Write chunk data to a temporary file
-            with open(temp_file_path, "wb") as f:
-                f.write(chunk["data"])
-            logger.info(f"Chunk {index} written to temporary file: {temp_file_path}")
-
-            # Open the temporary file for reading
-            with open(temp_file_path, "rb") as audio_file:
-                # Call OpenAI's asynchronous transcription method
-                client = OpenAI(api_key=config.OPENAI_API_KEY)
-                transcription = client.audio.translations.create(
-                    model=config.OPENAI_MODEL, file=audio_file
-                )
-            logger.info(
-                f"Transcription completed for chunk {index}: {chunk['file_name']}"
+            return min(float(retry_after), config.TRANSCRIPTION_RETRY_MAX_DELAY_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    delay = config.TRANSCRIPTION_RETRY_BASE_DELAY_SECONDS * (2 ** attempt)
+    return min(delay, config.TRANSCRIPTION_RETRY_MAX_DELAY_SECONDS) * random.uniform(0.5, 1.0)
+
+
+@contextmanager
+def open_chunk(chunk: dict) -> Iterator[BinaryIO]:
+    """
+    Opens a chunk for upload. Chunks are either a file inside the job's work
+    dir ("path") or an in-memory buffer ("data"); neither is copied to disk.
+    """
+    if "path" in chunk:
+        with open(chunk["path"], "rb") as f:
+            yield f
+    else:
+        data = chunk["data"]
+        buffer = data if isinstance(data, io.BytesIO) else io.BytesIO(data)
+        buffer.seek(0)
+        yield buffer
+
+
+class TranscriptionLatencyTracker:
+    """
+    Keeps a window of recent request latencies, per second of audio so
+    chunks of different lengths are comparable, and says when a request
+    has taken long enough to be worth hedging.
+    """
+
+    def __init__(self, window: int = 200):
+        self._seconds_per_audio_second: Deque[float] = deque(maxlen=window)
+
+    def record(self, chunk: dict, latency_seconds: float) -> None:
+        duration = chunk.get("duration")
+        if duration:
+            self._seconds_per_audio_second.append(latency_seconds / duration)
+
+    def hedge_delay(self, chunk: dict) -> Optional[float]:
+        """
+        How long to wait for a request before sending a hedged one, or None
+        if it shouldn't be hedged.
+        """
+        duration = chunk.get("duration")
+        samples = self._seconds_per_audio_second
+        if not config.TRANSCRIPTION_HEDGING or not duration or len(samples) < config.TRANSCRIPTION_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        rank = min(len(ordered) - 1, int(config.TRANSCRIPTION_HEDGE_PERCENTILE * len(ordered)))
+        return max(config.TRANSCRIPTION_HEDGE_MIN_DELAY_SECONDS, ordered[rank] * duration)
+
+
+transcription_latency = TranscriptionLatencyTracker()
+
+
+def chunk_deadline_seconds(chunk: dict) -> float:
+    duration = chunk.get("duration")
+    if not duration:
+        return config.TRANSCRIPTION_TIMEOUT_SECONDS
+    deadline = config.TRANSCRIPTION_DEADLINE_BASE_SECONDS + duration * config.TRANSCRIPTION_DEADLINE_SECONDS_PER_AUDIO_SECOND
+    return min(deadline, config.TRANSCRIPTION_TIMEOUT_SECONDS)
+
+
+async def send_transcription_request(chunk: dict) -> str:
+    """
+    Sends one API request. The caller holds a transcription semaphore slot.
+    A request that runs past the chunk's deadline fails with a (retryable)
+    timeout.
+    """
+    client = get_transcription_client()
+    transcription_request_stats["requests"] += 1
+    inflight_transcriptions.inc()
+    started = time.monotonic()
+    try:
+        with time_stage("transcribe"), open_chunk(chunk) as audio_file:
+            transcription = await client.audio.translations.create(
+                model=config.OPENAI_MODEL,
+                file=(chunk["file_name"], audio_file),
+                timeout=chunk_deadline_seconds(chunk),
             )
+    finally:
+        inflight_transcriptions.dec()
+    transcription_latency.record(chunk, time.monotonic() - started)
+    stage_bytes.observe(chunk.get("size", 0), stage="transcribe")
+    return transcription.text
+
 
-            # Remove the temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-            logger.info(f"Temporary file removed for chunk {index}: {temp_file_path}")
+async def send_hedged_transcription_request(index: int, chunk: dict) -> str:
+    """
+    Sends a request and, if it is slower than TRANSCRIPTION_HEDGE_PERCENTILE
+    of recent ones, a second identical one. The first
+    successful answer wins and the other request is cancelled.
+    """
+    semaphore = get_transcription_semaphore()
 
-            return {
-                "index": index,
-                "content": transcription.text,
-            }
+    async def send_hedge() -> str:
+        async with semaphore:
+            return await send_transcription_request(chunk)
+
+    async with semaphore:
+        primary = asyncio.create_task(send_transcription_request(chunk))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=transcription_latency.hedge_delay(chunk))
+            # The hedge waits for a slot like any request, so it queues behind
+            # chunks that are already waiting rather than overtaking them
+            hedged = bool(pending)
+            if hedged:
+                logger.info(f"Transcription of chunk {index} is slow, sending a hedged request")
+                pending.add(asyncio.create_task(send_hedge()))
+
+            while True:
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if hedged:
+                            hedged_transcriptions_total.inc(winner="primary" if task is primary else "hedge")
+                        return task.result()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def transcribe_with_retry(index: int, chunk: dict) -> str:
+    for attempt in range(config.TRANSCRIPTION_MAX_RETRIES + 1):
+        try:
+            return await send_hedged_transcription_request(index, chunk)
 
         except Exception as e:
-            logger.error(f"Error transcribing chunk {index}: {e}")
-            raise
+            if isinstance(e, APIStatusError) and e.status_code == 429:
+                transcription_request_stats["rate_limited"] += 1
+            if attempt >= config.TRANSCRIPTION_MAX_RETRIES or not is_retryable_transcription_error(e):
+                raise
+            delay = transcription_retry_delay(e, attempt)
+            retries_total.inc(operation="transcription")
+            logger.warning(
+                f"Transcription of chunk {index} failed ({e}), retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{config.TRANSCRIPTION_MAX_RETRIES})"
+            )
+            await asyncio.sleep(delay)
+
+
+async def transcribe_chunk(index: int, chunk: dict, checkpoint: Optional[JobCheckpoint] = None) -> str:
+    try:
+        if checkpoint is not None:
+            checkpointed_text = await asyncio.to_thread(checkpoint.transcript, index)
+            if checkpointed_text is not None:
+                logger.info(f"Using checkpointed transcript for chunk {index}: {chunk['file_name']}")
+                return checkpointed_text
 
+        cache_key, cached_text = await transcription_cache.lookup(chunk)
+        if cached_text is not None:
+            logger.info(f"Transcription cache hit for chunk {index}: {chunk['file_name']}")
+            return cached_text
 
-    logger.info("Starting transcription of audio chunks.")
-    tasks = [transcribe_chunk(index, chunk) for index, chunk in enumerate(chunks)]
+        logger.info(
+            f"Starting transcription for chunk {index}: {chunk['file_name']}"
+        )
+        text = await transcribe_with_retry(index, chunk)
+        logger.info(
+            f"Transcription completed for chunk {index}: {chunk['file_name']}"
+        )
+        await transcription_cache.store(cache_key, text)
+        if checkpoint is not None:
+            await asyncio.to_thread(checkpoint.save_transcript, index, text)
+        return text
 
-    transcribed_chunks = await asyncio.gather(*tasks)
-    logger.info("all transcribed")
+    except Exception as e:
+        logger.error(f"Error transcribing chunk {index}: {e}")
+        raise
 
-    # Sort the transcribed chunks based on their original indices to maintain order
-    transcribed_chunks.sort(key=lambda x: x["index"])
-    logger.info("Transcribed chunks sorted by original indices.")
 
-     # Extract the 'content' from the sorted results
-    transcribed_texts = [chunk["content"] for chunk in transcribed_chunks]
-    logger.info("Transcription content extracted from transcribed chunks.")
+async def iter_transcriptions(
+    chunks: List[dict], checkpoint: Optional[JobCheckpoint] = None
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Transcribes all chunks concurrently and yields (index, text) pairs in
+    chunk order as soon as each prefix of the transcript is available.
+
+    A chunk that fails with a retryable error after all its request retries
+    is transcribed again, up to TRANSCRIPTION_CHUNK_ATTEMPTS times, while the
+    others carry on. If it still fails, the others are allowed to finish
+    before the error is raised, so their transcripts are checkpointed and
+    retrying the job only redoes the chunks that failed.
+    """
+    tasks = [
+        asyncio.create_task(transcribe_chunk(index, chunk, checkpoint))
+        for index, chunk in enumerate(chunks)
+    ]
+    try:
+        for index, chunk in enumerate(chunks):
+            for attempt in range(1, config.TRANSCRIPTION_CHUNK_ATTEMPTS + 1):
+                try:
+                    text = await tasks[index]
+                    break
+                except Exception as e:
+                    if attempt >= config.TRANSCRIPTION_CHUNK_ATTEMPTS or not is_retryable_transcription_error(e):
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                        raise
+                    logger.warning(
+                        f"Chunk {index} failed ({e}), transcribing it again "
+                        f"(attempt {attempt + 1}/{config.TRANSCRIPTION_CHUNK_ATTEMPTS})"
+                    )
+                    tasks[index] = asyncio.create_task(transcribe_chunk(index, chunk, checkpoint))
+            yield index, text
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-    return transcribed_texts
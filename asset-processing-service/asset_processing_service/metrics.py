@@ -0,0 +1,234 @@
+import bisect
+from contextlib import contextmanager
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from asset_processing_service.config import config
+from asset_processing_service.logger import logger
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(12))  # 1 KiB .. 4 GiB
+
+LabelValues = Tuple[str, ...]
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """
+    Base class for metrics exposed in the Prometheus text format. Metrics
+    register themselves on creation; label values are passed as keyword
+    arguments to the recording methods.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        REGISTRY.append(self)
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, values))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        formatted = [f'{name}="{escape_label_value(value)}"' for name, value in pairs]
+        return "{" + ",".join(formatted) + "}"
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. Instead of being set, a gauge can read its
+    value from a function at scrape time.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+        if not self.label_names:
+            self._values[()] = 0
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        self._functions[self._label_values(labels)] = function
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        values = dict(self._values)
+        for key, function in self._functions.items():
+            values[key] = function()
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in values.items()]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (plus +Inf), sum, count
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        if key not in self._values:
+            self._values[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        counts, totals = self._values[key]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, totals) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', str(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {totals[0]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {totals[1]}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+stage_duration_seconds = Histogram(
+    "asset_processing_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"],
+)
+stage_bytes = Histogram(
+    "asset_processing_stage_bytes",
+    "Bytes handled by each pipeline stage.",
+    ["stage"],
+    buckets=BYTES_BUCKETS,
+)
+jobs_total = Counter(
+    "asset_processing_jobs_total",
+    "Jobs finished by this instance, by outcome.",
+    ["outcome"],
+)
+retries_total = Counter(
+    "asset_processing_retries_total",
+    "Retried operations, by operation.",
+    ["operation"],
+)
+hedged_transcriptions_total = Counter(
+    "asset_processing_hedged_transcriptions_total",
+    "Transcriptions that sent a hedged second request, by which request answered first.",
+    ["winner"],
+)
+transcription_cache_lookups_total = Counter(
+    "asset_processing_transcription_cache_lookups_total",
+    "Transcription cache lookups, by result (hit or miss).",
+    ["result"],
+)
+transcription_cache_evictions_total = Counter(
+    "asset_processing_transcription_cache_evictions_total",
+    "Transcription cache entries evicted to stay under the size limit.",
+)
+transcription_cache_bytes = Gauge(
+    "asset_processing_transcription_cache_bytes",
+    "Size of the transcription cache on disk.",
+)
+queue_depth = Gauge(
+    "asset_processing_queue_depth",
+    "Jobs waiting in the scheduler, by lane.",
+    ["lane"],
+)
+active_workers = Gauge(
+    "asset_processing_active_workers",
+    "Workers currently processing a job.",
+)
+worker_target = Gauge(
+    "asset_processing_worker_target",
+    "Number of media workers the autoscaler is aiming for.",
+)
+inflight_transcriptions = Gauge(
+    "asset_processing_inflight_transcriptions",
+    "Transcription API requests currently in flight.",
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        stage_duration_seconds.observe(time.monotonic() - started, stage=stage)
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server() -> Optional[web.AppRunner]:
+    """
+    Serves the metrics on METRICS_HOST:METRICS_PORT/metrics. Returns None if
+    the endpoint is disabled (METRICS_PORT=0).
+    """
+    if config.METRICS_PORT <= 0:
+        return None
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, config.METRICS_HOST, config.METRICS_PORT)
+    try:
+        await site.start()
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Serving metrics on http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+    return runner
@@ -12,6 +12,8 @@ class AssetProcessingJob(BaseModel):
     updatedAt: datetime
     lastHeartBeat: datetime
     errorMessage: Optional[str] = None
+    ownerId: Optional[str] = None
+    leaseExpiresAt: Optional[datetime] = None
 
 
 class Asset(BaseModel):
@@ -0,0 +1,143 @@
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+import aiohttp
+
+from asset_processing_service.api_client import claim_job
+from asset_processing_service.checkpoint import JobCheckpoint, discard_checkpoint
+from asset_processing_service.heartbeat import HeartbeatAggregator
+from asset_processing_service.job_processor import download_input
+from asset_processing_service.lazy import LazyPrimitive
+from asset_processing_service.logger import logger
+from asset_processing_service.models import Asset, AssetProcessingJob
+
+
+class DownloadPrefetcher:
+    """
+    Downloads the input files of queued media jobs into their job dirs while
+    workers are busy with earlier jobs. The download is recorded in the
+    job's checkpoint, so when a worker picks the job up download_input
+    finds the file and goes straight to transcoding.
+
+    A job is claimed right before its download starts, and its lease is
+    heartbeated from then on, so with several replicas only the one that
+    owns a job downloads it. A job claimed elsewhere isn't downloaded.
+
+    Files that are prefetched but whose job hasn't started are capped at
+    `max_bytes` (a job larger than that is still prefetched when nothing
+    else is waiting), and at most `concurrency` downloads run at once.
+    The jobs themselves are already admitted by the ByteBudget, which
+    accounts for their disk use.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        heartbeats: HeartbeatAggregator,
+        max_bytes: int,
+        concurrency: int,
+    ):
+        self.session = session
+        self.heartbeats = heartbeats
+        self.max_bytes = max_bytes
+        self.concurrency = max(1, concurrency)
+        self.reserved_bytes = 0
+        self.completed = 0
+        self.failed = 0
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._reservations: Dict[str, int] = {}
+        self._started: Set[str] = set()
+        self._claims: Dict[str, bool] = {}
+        self._condition: LazyPrimitive[asyncio.Condition] = LazyPrimitive(asyncio.Condition)
+        self._semaphore: LazyPrimitive[asyncio.Semaphore] = LazyPrimitive(lambda: asyncio.Semaphore(self.concurrency))
+
+    def submit(self, job: AssetProcessingJob, asset: Optional[Asset]) -> None:
+        if self.max_bytes <= 0 or asset is None or asset.fileType not in ["audio", "video"]:
+            return
+        if job.id in self._tasks:
+            return
+        self._tasks[job.id] = asyncio.create_task(self._prefetch(job, asset))
+
+    async def take(self, job_id: str) -> Optional[bool]:
+        """
+        Called by a worker before it starts a job. A download in progress is
+        waited for, since it is further along than a fresh one would be; one
+        that hasn't started is cancelled and left to the worker.
+
+        Returns the outcome of the prefetcher's claim on the job (True if
+        this instance owns it, False if another one does), or None if it
+        wasn't claimed here and the worker has to claim it.
+        """
+        task = self._tasks.pop(job_id, None)
+        if task is not None:
+            if job_id not in self._started:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self._release(job_id)
+        return self._claims.pop(job_id, None)
+
+    async def close(self) -> None:
+        """
+        Called on shutdown. Jobs that were claimed here but never taken by a
+        worker are given up: their leases are no longer renewed, so another
+        instance can claim them once they expire, and their prefetched files
+        are deleted.
+        """
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        untaken = [job_id for job_id, claimed in self._claims.items() if claimed]
+        self._claims.clear()
+        for job_id in untaken:
+            self.heartbeats.untrack(job_id)
+            await asyncio.to_thread(discard_checkpoint, job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "waiting": sum(1 for task in self._tasks.values() if not task.done()) - len(self._started),
+            "downloading": len(self._started),
+            "reserved_bytes": self.reserved_bytes,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def _prefetch(self, job: AssetProcessingJob, asset: Asset) -> None:
+        size = asset.size or 0
+        condition = self._condition.get()
+        async with condition:
+            await condition.wait_for(
+                lambda: not self._reservations or self.reserved_bytes + size <= self.max_bytes
+            )
+            self._reservations[job.id] = size
+            self.reserved_bytes += size
+
+        async with self._semaphore.get():
+            self._started.add(job.id)
+            try:
+                claimed = await claim_job(self.session, job.id)
+                self._claims[job.id] = claimed
+                if not claimed:
+                    return
+                # Keeps the lease alive until the worker takes the job over
+                self.heartbeats.track(job.id)
+                checkpoint = await asyncio.to_thread(JobCheckpoint.load, job.id, asset)
+                await download_input(self.session, asset, checkpoint)
+                self.completed += 1
+            except Exception as e:
+                # The worker downloads it again when it gets to the job
+                self.failed += 1
+                logger.warning(f"Prefetching {asset.fileName} for job {job.id} failed: {e}")
+            finally:
+                self._started.discard(job.id)
+
+    async def _release(self, job_id: str) -> None:
+        size = self._reservations.pop(job_id, None)
+        if size is None:
+            return
+        condition = self._condition.get()
+        async with condition:
+            self.reserved_bytes -= size
+            condition.notify_all()
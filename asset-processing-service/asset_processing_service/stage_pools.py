@@ -0,0 +1,125 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import functools
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from asset_processing_service.config import config
+from asset_processing_service.lazy import LazyPrimitive
+
+
+class StagePool:
+    """
+    A bounded executor for one CPU-bound pipeline stage, kept separate from
+    the default executor so a burst of ffmpeg runs cannot starve probing or
+    token counting (and vice versa). ffmpeg runs as an asyncio subprocess
+    (run_process) and tiktoken releases the GIL while encoding in a thread
+    (run), so either way the work gets real multi-core parallelism.
+
+    Jobs wait on a semaphore in the event loop rather than in the executor's
+    internal queue, which lets queue depth be observed. A slot is only freed
+    once its work has actually stopped: a cancelled subprocess is killed and
+    reaped first, and a cancelled thread is waited for, since it can't be
+    interrupted.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: LazyPrimitive[asyncio.Semaphore] = LazyPrimitive(lambda: asyncio.Semaphore(self.max_workers))
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        async with self._slot():
+            future = loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                await asyncio.wait([future])
+                raise
+
+    async def run_process(self, args: List[str]) -> Tuple[int, bytes, bytes]:
+        """
+        Runs a command and returns its exit code, stdout and stderr. If the
+        caller is cancelled, the process is killed.
+        """
+        async with self._slot():
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await process.communicate()
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                raise
+            return process.returncode, stdout, stderr
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        self.queued += 1
+        enqueued = time.monotonic()
+        try:
+            await self._semaphore.get().acquire()
+        finally:
+            self.queued -= 1
+            self.wait_seconds += time.monotonic() - enqueued
+
+        self.running += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.busy_seconds += time.monotonic() - started
+            self._semaphore.get().release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=f"{self.name}-stage"
+            )
+        return self._executor
+
+
+ffmpeg_pool = StagePool("ffmpeg", config.FFMPEG_STAGE_WORKERS)
+probe_pool = StagePool("probe", config.PROBE_STAGE_WORKERS)
+tokenize_pool = StagePool("tokenize", config.TOKENIZE_STAGE_WORKERS)
+
+STAGE_POOLS = [ffmpeg_pool, probe_pool, tokenize_pool]
+
+
+def stage_pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {pool.name: pool.stats() for pool in STAGE_POOLS}
+
+
+def shutdown_stage_pools() -> None:
+    for pool in STAGE_POOLS:
+        pool.shutdown()
@@ -0,0 +1,49 @@
+import os
+import threading
+from typing import Optional
+
+import tiktoken
+
+from asset_processing_service.config import config
+from asset_processing_service.logger import logger
+from asset_processing_service.metrics import time_stage
+from asset_processing_service.stage_pools import tokenize_pool
+from asset_processing_service.tokenizer_cache import load_encoding
+
+# tiktoken reads its BPE files from TIKTOKEN_CACHE_DIR and only downloads
+# them on a cache miss, so a populated cache dir makes counting work offline
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", config.TIKTOKEN_CACHE_DIR)
+
+_encoding: Optional[tiktoken.Encoding] = None
+_encoding_lock = threading.Lock()
+
+
+def get_encoding() -> tiktoken.Encoding:
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = load_encoding(config.TOKENIZER_MODEL)
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    # Transcripts are plain text, so special token markers in them are counted as text
+    return len(get_encoding().encode_ordinary(text))
+
+
+async def preload_encoding() -> None:
+    """
+    Loads the encoder at startup, off the event loop, so the first job
+    doesn't pay for it.
+    """
+    try:
+        await tokenize_pool.run(get_encoding)
+        logger.info(f"Loaded {config.TOKENIZER_MODEL} tokenizer from {os.environ['TIKTOKEN_CACHE_DIR']}")
+    except Exception as e:
+        logger.error(f"Failed to load the {config.TOKENIZER_MODEL} tokenizer: {e}")
+
+
+async def count_tokens_async(text: str) -> int:
+    with time_stage("tokenize"):
+        return await tokenize_pool.run(count_tokens, text)
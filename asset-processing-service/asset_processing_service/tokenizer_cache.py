@@ -0,0 +1,25 @@
+"""
+Loads tiktoken encodings without touching Config, so the BPE cache can be
+filled where no service settings exist, e.g. while building an image:
+
+    python -m asset_processing_service.tokenizer_cache gpt-4o
+"""
+
+import os
+import sys
+
+import tiktoken
+
+
+def load_encoding(name: str) -> tiktoken.Encoding:
+    # Accepts a model name (gpt-4o) or an encoding name (o200k_base)
+    try:
+        return tiktoken.encoding_for_model(name)
+    except KeyError:
+        return tiktoken.get_encoding(name)
+
+
+if __name__ == "__main__":
+    name = sys.argv[1]
+    load_encoding(name)
+    print(f"Cached {name} tokenizer in {os.environ.get('TIKTOKEN_CACHE_DIR', 'the default tiktoken cache dir')}")
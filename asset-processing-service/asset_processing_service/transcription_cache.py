@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from asset_processing_service.config import config
+from asset_processing_service.logger import logger
+from asset_processing_service.metrics import transcription_cache_evictions_total, transcription_cache_lookups_total
+
+
+class TranscriptionCache:
+    """
+    On-disk cache of chunk transcripts keyed by the SHA-256 of the chunk's
+    audio bytes and the transcription model. Entries are evicted least
+    recently used first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, namespace: str):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size_bytes": self._size_bytes or 0,
+        }
+
+    async def lookup(self, chunk: dict) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns (key, transcript). The transcript is None on a miss; the key
+        is None when the cache is disabled.
+        """
+        if not self.enabled:
+            return None, None
+
+        key = await asyncio.to_thread(self._key_for_chunk, chunk)
+        text = await asyncio.to_thread(self._read, key)
+        if text is None:
+            self.misses += 1
+            transcription_cache_lookups_total.inc(result="miss")
+        else:
+            self.hits += 1
+            transcription_cache_lookups_total.inc(result="hit")
+        return key, text
+
+    async def store(self, key: Optional[str], text: str) -> None:
+        if key is None:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, text)
+        except OSError as e:
+            logger.error(f"Failed to write transcription cache entry {key}: {e}")
+
+    def _key_for_chunk(self, chunk: dict) -> str:
+        digest = hashlib.sha256(self.namespace.encode("utf-8"))
+        if "path" in chunk:
+            with open(chunk["path"], "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        else:
+            data = chunk["data"]
+            digest.update(data.getbuffer() if hasattr(data, "getbuffer") else data)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        # Touching the entry marks it as recently used for eviction
+        os.utime(path)
+        return text
+
+    def _write(self, key: str, text: str) -> None:
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        # Rewriting an existing entry replaces its bytes rather than adding to them
+        try:
+            replaced_size = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._size_bytes is None:
+                self._size_bytes = self._scan_size()
+            else:
+                self._size_bytes += os.path.getsize(path) - replaced_size
+            if self._size_bytes > self.max_bytes:
+                self._evict()
+
+    def _list_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._list_entries())
+
+    def _evict(self) -> None:
+        # Evict down to 90% of the limit so we don't rescan on every write
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._list_entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+            transcription_cache_evictions_total.inc()
+
+        self._size_bytes = total
+
+
+transcription_cache = TranscriptionCache(
+    config.TRANSCRIPTION_CACHE_DIR,
+    config.TRANSCRIPTION_CACHE_MAX_BYTES,
+    namespace=f"{config.OPENAI_MODEL}:translations",
+)
@@ -0,0 +1,34 @@
+import os
+
+import ffmpeg
+
+
+def generate_audio(path: str, duration_seconds: float, frequency: int = 440) -> int:
+    """
+    Writes a sine tone of the given length using ffmpeg's built-in lavfi
+    source. Returns the file size in bytes.
+    """
+    stream = ffmpeg.input(
+        f"sine=frequency={frequency}:sample_rate=44100:duration={duration_seconds}", f="lavfi"
+    ).output(path, acodec="libmp3lame", audio_bitrate="128k")
+    ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+    return os.path.getsize(path)
+
+
+def generate_video(path: str, duration_seconds: float, size: str = "640x360", frame_rate: int = 25) -> int:
+    """
+    Writes a test pattern video with a sine tone audio track. Returns the
+    file size in bytes.
+    """
+    video = ffmpeg.input(f"testsrc=size={size}:rate={frame_rate}:duration={duration_seconds}", f="lavfi")
+    audio = ffmpeg.input(f"sine=frequency=440:sample_rate=44100:duration={duration_seconds}", f="lavfi")
+    stream = ffmpeg.output(video, audio, path, vcodec="mpeg4", acodec="aac", shortest=None)
+    ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+    return os.path.getsize(path)
+
+
+def generate_text(path: str, size_bytes: int) -> int:
+    line = "The quick brown fox jumps over the lazy dog.\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(line * max(1, size_bytes // len(line)))
+    return os.path.getsize(path)
@@ -0,0 +1,278 @@
+"""
+End-to-end benchmark for the asset processing service.
+
+Generates synthetic media with ffmpeg's lavfi sources, serves it from an
+in-process stub of the webapp API and the OpenAI translations endpoint, runs
+the real service against the stub as a subprocess, and prints the results as
+JSON. Needs ffmpeg and ffprobe on PATH but no network access: unless
+--real-tokenizer is given, tokens are counted with a byte-level encoding
+from benchmarks/tokenizer_plugin instead of downloading BPE files. Exits
+non-zero unless every job completed.
+
+Run from the asset-processing-service directory:
+
+    python -m benchmarks.run --audio-jobs 10 --video-jobs 5 --media-seconds 300
+    python -m benchmarks.run --transcription-error-rate 0.1 --output results.json
+    python -m benchmarks.run --api-error-rate 0.05 --conflict-rate 0.05
+    python -m benchmarks.run --env MAX_NUM_WORKERS=4 --env SINGLE_PASS_VIDEO_EXTRACTION=false
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.media import generate_audio, generate_text, generate_video
+from benchmarks.stub_backend import StubBackend
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKENIZER_PLUGIN_DIR = os.path.join(SERVICE_ROOT, "benchmarks", "tokenizer_plugin")
+SAMPLE_INTERVAL_SECONDS = 0.25
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the asset processing service against synthetic jobs.")
+    parser.add_argument("--audio-jobs", type=int, default=4)
+    parser.add_argument("--video-jobs", type=int, default=2)
+    parser.add_argument("--text-jobs", type=int, default=4)
+    parser.add_argument("--projects", type=int, default=2, help="Number of projects the jobs are spread across")
+    parser.add_argument("--media-seconds", type=float, default=120, help="Length of the generated audio and video")
+    parser.add_argument("--text-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--api-latency", type=float, default=0.01, help="Seconds added to every webapp API call")
+    parser.add_argument("--transcription-latency", type=float, default=0.5, help="Seconds per transcription request")
+    parser.add_argument("--transcription-error-rate", type=float, default=0.0, help="Fraction of transcription requests answered with a 429")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="Fraction of job, claim and asset API calls answered with a 503")
+    parser.add_argument("--conflict-rate", type=float, default=0.0, help="Fraction of claims and job updates answered with a 409")
+    parser.add_argument("--timeout", type=float, default=600, help="Give up after this many seconds")
+    parser.add_argument("--use-cache", action="store_true", help="Keep the transcription cache enabled")
+    parser.add_argument(
+        "--real-tokenizer",
+        action="store_true",
+        help="Count tokens with TOKENIZER_MODEL (needs a populated tiktoken cache or network access)",
+    )
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra service configuration")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--keep-work-dir", action="store_true", help="Don't delete the generated media and work dir")
+    return parser.parse_args(argv)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    Nearest-rank percentile.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def read_status_kib(pid: int, field: str) -> int:
+    """
+    Reads a memory field (e.g. VmRSS, VmHWM) from /proc/<pid>/status, in bytes.
+    """
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return 0
+
+
+def process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    for task_dir in os.listdir(f"/proc/{pid}/task") if os.path.isdir(f"/proc/{pid}/task") else []:
+        try:
+            with open(f"/proc/{pid}/task/{task_dir}/children", "r") as f:
+                for child in f.read().split():
+                    pids.extend(process_tree(int(child)))
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return pids
+
+
+def disk_usage(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file_name))
+            except FileNotFoundError:
+                continue
+    return total
+
+
+async def create_jobs(backend: StubBackend, args: argparse.Namespace, media_dir: str) -> Dict[str, int]:
+    sizes = {}
+    kinds = []
+    if args.audio_jobs:
+        path = os.path.join(media_dir, "audio.mp3")
+        sizes["audio"] = await asyncio.to_thread(generate_audio, path, args.media_seconds)
+        kinds.extend([("audio", "audio/mpeg", path)] * args.audio_jobs)
+    if args.video_jobs:
+        path = os.path.join(media_dir, "video.mp4")
+        sizes["video"] = await asyncio.to_thread(generate_video, path, args.media_seconds)
+        kinds.extend([("video", "video/mp4", path)] * args.video_jobs)
+    if args.text_jobs:
+        path = os.path.join(media_dir, "text.txt")
+        sizes["text"] = await asyncio.to_thread(generate_text, path, args.text_bytes)
+        kinds.extend([("text", "text/plain", path)] * args.text_jobs)
+
+    for index, (file_type, mime_type, path) in enumerate(kinds):
+        backend.add_job(path, file_type, mime_type, sizes[file_type], f"project-{index % max(1, args.projects)}")
+    return sizes
+
+
+def service_env(args: argparse.Namespace, base_url: str, work_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "API_BASE_URL": f"{base_url}/api",
+            "SERVER_API_KEY": "benchmark",
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"{base_url}/v1",
+            "JOB_WORK_DIR": os.path.join(work_dir, "jobs"),
+            "TRANSCRIPTION_CACHE_DIR": os.path.join(work_dir, "cache"),
+            "METRICS_PORT": "0",
+            "JOB_POLL_INTERVAL_SECONDS": "0.5",
+        }
+    )
+    if not args.use_cache:
+        env["TRANSCRIPTION_CACHE_MAX_BYTES"] = "0"
+    if not args.real_tokenizer:
+        env["TOKENIZER_MODEL"] = "benchmark_bytes"
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [TOKENIZER_PLUGIN_DIR, env.get("PYTHONPATH")]))
+    for assignment in args.env:
+        key, _, value = assignment.partition("=")
+        env[key] = value
+    return env
+
+
+async def stop_service(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    process.send_signal(signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=15)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    work_dir = tempfile.mkdtemp(prefix="asset-benchmark-")
+    media_dir = os.path.join(work_dir, "media")
+    os.makedirs(media_dir)
+
+    backend = StubBackend(
+        api_latency_seconds=args.api_latency,
+        transcription_latency_seconds=args.transcription_latency,
+        transcription_error_rate=args.transcription_error_rate,
+        api_error_rate=args.api_error_rate,
+        conflict_rate=args.conflict_rate,
+    )
+    base_url = await backend.start()
+
+    try:
+        media_sizes = await create_jobs(backend, args, media_dir)
+
+        log_path = os.path.join(work_dir, "service.log")
+        with open(log_path, "wb") as log_file:
+            started = time.monotonic()
+            backend.start_clock()
+
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "asset_processing_service.main",
+                cwd=SERVICE_ROOT,
+                env=service_env(args, base_url, work_dir),
+                stdout=log_file,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+
+            peak_rss = 0
+            peak_tree_rss = 0
+            peak_disk = 0
+            timed_out = False
+            try:
+                while not backend.all_done():
+                    if process.returncode is not None:
+                        break
+                    if time.monotonic() - started > args.timeout:
+                        timed_out = True
+                        break
+                    peak_rss = max(peak_rss, read_status_kib(process.pid, "VmHWM"))
+                    tree_rss = sum(read_status_kib(pid, "VmRSS") for pid in process_tree(process.pid))
+                    peak_tree_rss = max(peak_tree_rss, tree_rss)
+                    peak_disk = max(peak_disk, await asyncio.to_thread(disk_usage, os.path.join(work_dir, "jobs")))
+                    await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+                elapsed = time.monotonic() - started
+                peak_rss = max(peak_rss, read_status_kib(process.pid, "VmHWM"))
+            finally:
+                await stop_service(process)
+
+        latencies = backend.job_latencies()
+        first_content = backend.first_content_latencies()
+        completed = len(latencies)
+        return {
+            "jobs": len(backend.jobs),
+            "statuses": backend.status_counts(),
+            "timed_out": timed_out,
+            "service_exit_code": process.returncode,
+            "elapsed_seconds": round(elapsed, 3),
+            "jobs_per_minute": round(completed / elapsed * 60, 3) if elapsed > 0 else None,
+            "job_latency_seconds": {
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "max": max(latencies) if latencies else None,
+            },
+            "time_to_first_content_seconds": {
+                "p50": percentile(first_content, 0.50),
+                "p95": percentile(first_content, 0.95),
+            },
+            "peak_rss_bytes": peak_rss,
+            "peak_process_tree_rss_bytes": peak_tree_rss,
+            "peak_disk_bytes": peak_disk,
+            "transcription": {
+                "requests": backend.transcription_requests,
+                "injected_errors": backend.transcription_errors,
+                "peak_in_flight": backend.peak_transcription_in_flight,
+            },
+            "api": {
+                "injected_errors": backend.api_errors,
+                "injected_conflicts": backend.conflicts,
+            },
+            "media_bytes": media_sizes,
+            "parameters": {key: value for key, value in vars(args).items() if key not in ["output", "keep_work_dir"]},
+            "work_dir": work_dir if args.keep_work_dir else None,
+        }
+
+    finally:
+        await backend.stop()
+        if not args.keep_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    if results["timed_out"] or results["statuses"].get("completed", 0) != results["jobs"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+TERMINAL_STATUSES = ["completed", "max_attempts_exceeded"]
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class StubBackend:
+    """
+    An in-memory stand-in for the webapp API routes the service calls, plus
+    the OpenAI translations endpoint, served from one aiohttp app. Every
+    route can be slowed down, and requests can fail at configurable rates,
+    to mimic a real deployment: transcriptions with a 429, the job, claim
+    and asset routes with a 503, and claims and single job updates with a
+    409 as if another replica had got to the job first.
+    """
+
+    def __init__(
+        self,
+        api_latency_seconds: float = 0.0,
+        transcription_latency_seconds: float = 0.5,
+        transcription_error_rate: float = 0.0,
+        api_error_rate: float = 0.0,
+        conflict_rate: float = 0.0,
+    ):
+        self.api_latency_seconds = api_latency_seconds
+        self.transcription_latency_seconds = transcription_latency_seconds
+        self.transcription_error_rate = transcription_error_rate
+        self.api_error_rate = api_error_rate
+        self.conflict_rate = conflict_rate
+        # Statuses the next transcription requests fail with, in order, before
+        # the random error rate applies
+        self.transcription_failure_statuses: List[int] = []
+        # Latencies of the next successful transcription requests, in order,
+        # before transcription_latency_seconds applies
+        self.transcription_latencies: List[float] = []
+        self.transcribed_files: List[str] = []
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.assets: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, str] = {}
+        self.job_started_at: Dict[str, float] = {}
+        self.job_finished_at: Dict[str, float] = {}
+        self.first_content_at: Dict[str, float] = {}
+        self.transcription_requests = 0
+        self.transcription_errors = 0
+        self.transcription_in_flight = 0
+        self.api_errors = 0
+        self.conflicts = 0
+        self.peak_transcription_in_flight = 0
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    def add_job(self, file_path: str, file_type: str, mime_type: str, size: int, project_id: str) -> str:
+        index = len(self.jobs)
+        asset_id = f"asset-{index}"
+        job_id = f"job-{index}"
+        timestamp = now_iso()
+        self.files[asset_id] = file_path
+        self.assets[asset_id] = {
+            "id": asset_id,
+            "projectId": project_id,
+            "title": f"Benchmark asset {index}",
+            "fileName": f"{asset_id}{file_path[file_path.rfind('.'):]}",
+            "fileUrl": f"{self.base_url}/files/{asset_id}",
+            "fileType": file_type,
+            "mimeType": mime_type,
+            "size": size,
+            "content": None,
+            "tokenCount": 0,
+            "contentChunkCount": 0,
+            "contentComplete": False,
+            "createdAt": timestamp,
+            "updatedAt": timestamp,
+        }
+        self.jobs[job_id] = {
+            "id": job_id,
+            "assetId": asset_id,
+            "status": "created",
+            "attempts": 0,
+            "errorMessage": None,
+            "lastHeartBeat": timestamp,
+            "ownerId": None,
+            "leaseExpiresAt": None,
+            "createdAt": timestamp,
+            "updatedAt": timestamp,
+        }
+        return job_id
+
+    def start_clock(self) -> None:
+        """
+        Job latency is measured from here, when the service is started.
+        """
+        started = time.monotonic()
+        for job_id in self.jobs:
+            self.job_started_at[job_id] = started
+
+    def all_done(self) -> bool:
+        return all(job["status"] in TERMINAL_STATUSES for job in self.jobs.values())
+
+    def job_latencies(self) -> List[float]:
+        return [
+            self.job_finished_at[job_id] - self.job_started_at[job_id]
+            for job_id, job in self.jobs.items()
+            if job["status"] == "completed" and job_id in self.job_started_at and job_id in self.job_finished_at
+        ]
+
+    def first_content_latencies(self) -> List[float]:
+        return [
+            self.first_content_at[job["assetId"]] - self.job_started_at[job_id]
+            for job_id, job in self.jobs.items()
+            if job["assetId"] in self.first_content_at and job_id in self.job_started_at
+        ]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(client_max_size=100 * 1024 * 1024)
+        app.router.add_get("/api/asset-processing-job", self.get_jobs)
+        app.router.add_patch("/api/asset-processing-job", self.patch_jobs)
+        app.router.add_post("/api/asset-processing-job/claim", self.claim_job)
+        app.router.add_get("/api/asset", self.get_asset)
+        app.router.add_patch("/api/asset", self.patch_asset)
+        app.router.add_get("/files/{asset_id}", self.get_file)
+        app.router.add_post("/v1/audio/translations", self.create_translation)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def get_jobs(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.api_latency_seconds)
+        if self._injected_error():
+            return self._server_error()
+        updated_since = request.query.get("updatedSince")
+        limit = int(request.query.get("limit", "0")) or None
+        deadline = time.monotonic() + float(request.query.get("wait", "0"))
+
+        while True:
+            jobs = self._select_jobs(updated_since, limit)
+            if jobs or time.monotonic() >= deadline:
+                return web.json_response(jobs)
+            await asyncio.sleep(0.1)
+
+    async def patch_jobs(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.api_latency_seconds)
+        if self._injected_error():
+            return self._server_error()
+        body = await request.json()
+        job_id = request.query.get("jobId")
+
+        if job_id:
+            if self._injected_conflict() or not self._apply_update(job_id, body):
+                return web.json_response({"error": "Job is owned by another instance"}, status=409)
+            return web.json_response(self.jobs[job_id])
+
+        owner_id = body.get("ownerId")
+        lease_seconds = body.get("leaseSeconds", 30)
+        lost_job_ids = []
+        for heartbeat_job_id in body.get("heartbeats", []):
+            job = self.jobs.get(heartbeat_job_id)
+            if job is None or job["ownerId"] != owner_id:
+                lost_job_ids.append(heartbeat_job_id)
+                continue
+            # The route's update bumps updatedAt too (the column's $onUpdate)
+            job["lastHeartBeat"] = job["updatedAt"] = now_iso()
+            job["leaseExpiresAt"] = (datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)).isoformat()
+
+        for update in body.get("updates", []):
+            update = dict(update)
+            update_job_id = update.pop("jobId")
+            if not self._apply_update(update_job_id, update):
+                lost_job_ids.append(update_job_id)
+
+        return web.json_response({"lostJobIds": lost_job_ids})
+
+    async def claim_job(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.api_latency_seconds)
+        if self._injected_error():
+            return self._server_error()
+        body = await request.json()
+        job = self.jobs.get(request.query.get("jobId", ""))
+        if job is None:
+            return web.json_response({"error": "Job not found"}, status=404)
+
+        lease_expired = job["leaseExpiresAt"] is None or datetime.fromisoformat(job["leaseExpiresAt"]) < datetime.now(timezone.utc)
+        claimable = job["status"] in ["created", "failed"] or (job["status"] == "in_progress" and lease_expired)
+        if not claimable or self._injected_conflict():
+            return web.json_response({"error": "Job is not claimable"}, status=409)
+
+        timestamp = now_iso()
+        job.update(
+            status="in_progress",
+            ownerId=body["ownerId"],
+            leaseExpiresAt=(datetime.now(timezone.utc) + timedelta(seconds=body.get("leaseSeconds", 30))).isoformat(),
+            lastHeartBeat=timestamp,
+            updatedAt=timestamp,
+        )
+        return web.json_response(job)
+
+    async def get_asset(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.api_latency_seconds)
+        if self._injected_error():
+            return self._server_error()
+        asset_ids = request.query.get("assetIds")
+        if asset_ids:
+            return web.json_response([self.assets[asset_id] for asset_id in asset_ids.split(",") if asset_id in self.assets])
+        asset = self.assets.get(request.query.get("assetId", ""))
+        if asset is None:
+            return web.json_response({"error": "Asset not found"}, status=404)
+        return web.json_response(asset)
+
+    async def patch_asset(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.api_latency_seconds)
+        if self._injected_error():
+            return self._server_error()
+        body = await request.json()
+        asset = self.assets.get(request.query.get("assetId", ""))
+        if asset is None:
+            return web.json_response({"error": "Asset not found"}, status=404)
+        if "append" in body:
+            # Like the route, a chunk is only applied in order, and one that
+            # was already applied (a retry) or arrives after the final content
+            # is acknowledged without being applied again
+            chunk_index = body["chunkIndex"]
+            if asset["contentComplete"] or asset["contentChunkCount"] > chunk_index:
+                return web.json_response({"success": True, "applied": False})
+            if asset["contentChunkCount"] < chunk_index:
+                return web.json_response(
+                    {"error": f"Expected chunk {asset['contentChunkCount']}, got {chunk_index}"}, status=409
+                )
+            asset["content"] = (asset["content"] or "") + body["append"]
+            asset["tokenCount"] += body["tokenCountDelta"]
+            asset["contentChunkCount"] += 1
+            asset["updatedAt"] = now_iso()
+            self.first_content_at.setdefault(asset["id"], time.monotonic())
+            return web.json_response({"success": True, "applied": True})
+
+        asset.update(
+            content=body["content"],
+            tokenCount=body["tokenCount"],
+            contentChunkCount=0,
+            contentComplete=body.get("complete", True),
+        )
+        if body["content"]:
+            self.first_content_at.setdefault(asset["id"], time.monotonic())
+        asset["updatedAt"] = now_iso()
+        return web.json_response({"success": True})
+
+    async def get_file(self, request: web.Request) -> web.StreamResponse:
+        path = self.files.get(request.match_info["asset_id"])
+        if path is None:
+            raise web.HTTPNotFound()
+        return web.FileResponse(path)
+
+    async def create_translation(self, request: web.Request) -> web.Response:
+        self.transcription_requests += 1
+        data = await request.post()
+        upload = data["file"]
+        size = len(upload.file.read())
+        self.transcribed_files.append(upload.filename)
+
+        if self.transcription_failure_statuses:
+            return self._transcription_error(self.transcription_failure_statuses.pop(0))
+        if random.random() < self.transcription_error_rate:
+            return self._transcription_error(429)
+
+        self.transcription_in_flight += 1
+        self.peak_transcription_in_flight = max(self.peak_transcription_in_flight, self.transcription_in_flight)
+        latency = self.transcription_latencies.pop(0) if self.transcription_latencies else self.transcription_latency_seconds
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            self.transcription_in_flight -= 1
+        return web.json_response({"text": f"Transcript of {upload.filename} ({size} bytes)."})
+
+    def _transcription_error(self, status: int) -> web.Response:
+        self.transcription_errors += 1
+        if status == 429:
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                status=429,
+                headers={"retry-after": "0.5"},
+            )
+        return web.json_response({"error": {"message": "Server error", "type": "server_error"}}, status=status)
+
+    def _injected_error(self) -> bool:
+        if random.random() < self.api_error_rate:
+            self.api_errors += 1
+            return True
+        return False
+
+    def _injected_conflict(self) -> bool:
+        if random.random() < self.conflict_rate:
+            self.conflicts += 1
+            return True
+        return False
+
+    def _server_error(self) -> web.Response:
+        return web.json_response({"error": "Service unavailable"}, status=503)
+
+    def _select_jobs(self, updated_since: Optional[str], limit: Optional[int]) -> List[Dict[str, Any]]:
+        jobs = [job for job in self.jobs.values() if job["status"] in ["created", "failed", "in_progress"]]
+        if updated_since:
+            # Like the webapp route, incremental fetches leave out running jobs
+            jobs = [job for job in jobs if job["status"] != "in_progress"]
+            cursor = datetime.fromisoformat(updated_since.replace("Z", "+00:00"))
+            jobs = sorted(
+                (job for job in jobs if datetime.fromisoformat(job["updatedAt"]) > cursor),
+                key=lambda job: job["updatedAt"],
+            )
+        return jobs[:limit] if limit else jobs
+
+    def _apply_update(self, job_id: str, update: Dict[str, Any]) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        owner_id = update.pop("ownerId", None)
+        update.pop("leaseSeconds", None)
+        if owner_id and job["ownerId"] != owner_id:
+            return False
+
+        job.update(update)
+        job["updatedAt"] = now_iso()
+        if "lastHeartBeat" not in update:
+            job["lastHeartBeat"] = job["updatedAt"]
+        if job["status"] in TERMINAL_STATUSES and job_id not in self.job_finished_at:
+            self.job_finished_at[job_id] = time.monotonic()
+        return True
@@ -0,0 +1,17 @@
+"""
+A byte-level tiktoken encoding, registered through tiktoken's plugin
+namespace so the benchmark can count tokens offline without cached BPE
+files. One token per byte is close enough for measuring throughput.
+"""
+
+
+def benchmark_bytes():
+    return {
+        "name": "benchmark_bytes",
+        "pat_str": r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        "mergeable_ranks": {bytes([i]): i for i in range(256)},
+        "special_tokens": {},
+    }
+
+
+ENCODING_CONSTRUCTORS = {"benchmark_bytes": benchmark_bytes}
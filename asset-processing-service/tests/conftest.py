@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Config is read once, when the package is first imported
+os.environ.setdefault("SERVER_API_KEY", "test-server-api-key")
+os.environ.setdefault("OPENAI_API_KEY", "test-openai-api-key")
+os.environ.setdefault("JOB_WORK_DIR", tempfile.mkdtemp(prefix="asset-processing-tests-"))
+os.environ.setdefault("TRANSCRIPTION_CACHE_MAX_BYTES", "0")
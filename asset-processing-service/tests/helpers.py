@@ -0,0 +1,73 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Tuple
+
+import aiohttp
+
+from asset_processing_service import media_processor
+from asset_processing_service.api_client import create_http_session
+from asset_processing_service.config import config
+from asset_processing_service.lazy import LazyPrimitive
+from asset_processing_service.models import Asset, AssetProcessingJob
+from benchmarks.stub_backend import StubBackend
+
+MB = 1024 * 1024
+
+
+def make_job(job_id: str, asset_id: str = "", status: str = "created", attempts: int = 0) -> AssetProcessingJob:
+    timestamp = datetime.now(timezone.utc)
+    return AssetProcessingJob(
+        id=job_id,
+        assetId=asset_id or f"asset-{job_id}",
+        status=status,
+        attempts=attempts,
+        createdAt=timestamp,
+        updatedAt=timestamp,
+        lastHeartBeat=timestamp,
+    )
+
+
+def make_asset(asset_id: str, file_type: str = "audio", size: int = MB, project_id: str = "project") -> Asset:
+    timestamp = datetime.now(timezone.utc)
+    return Asset(
+        id=asset_id,
+        projectId=project_id,
+        title=asset_id,
+        fileName=f"{asset_id}.bin",
+        fileUrl=f"http://files.invalid/{asset_id}",
+        fileType=file_type,
+        mimeType="application/octet-stream",
+        size=size,
+        content=None,
+        tokenCount=0,
+        createdAt=timestamp,
+        updatedAt=timestamp,
+    )
+
+
+@asynccontextmanager
+async def stub_api(monkeypatch, **backend_options) -> AsyncIterator[Tuple[StubBackend, aiohttp.ClientSession]]:
+    """
+    Serves the benchmark's in-memory backend on a local port and points the
+    API client and the transcription client at it for the duration of the
+    block.
+    """
+    backend = StubBackend(**{"transcription_latency_seconds": 0.0, **backend_options})
+    base_url = await backend.start()
+    monkeypatch.setattr(config, "API_BASE_URL", f"{base_url}/api")
+    monkeypatch.setattr(config, "OPENAI_BASE_URL", f"{base_url}/v1")
+    # Both are bound to the event loop they were first used in
+    monkeypatch.setattr(media_processor, "_transcription_client", None)
+    monkeypatch.setattr(
+        media_processor,
+        "_transcription_semaphore",
+        LazyPrimitive(lambda: asyncio.Semaphore(config.MAX_CONCURRENT_TRANSCRIPTIONS)),
+    )
+    session = create_http_session()
+    try:
+        yield backend, session
+    finally:
+        await media_processor.close_transcription_client()
+        await session.close()
+        await backend.stop()
@@ -0,0 +1,65 @@
+import asyncio
+
+from asset_processing_service.admission import ByteBudget
+from asset_processing_service.config import config
+from tests.helpers import make_asset
+
+
+def test_reserves_until_the_inflight_budget_is_full(monkeypatch):
+    monkeypatch.setattr(config, "AUDIO_DISK_EXPANSION_FACTOR", 1.0)
+    budget = ByteBudget(max_inflight_bytes=100, max_disk_bytes=1000)
+
+    assert budget.try_reserve("job-1", make_asset("a1", size=60))
+    assert not budget.try_reserve("job-2", make_asset("a2", size=60))
+    assert budget.try_reserve("job-3", make_asset("a3", size=40))
+    assert budget.stats() == {"jobs": 2, "inflight_bytes": 100, "disk_bytes": 100}
+
+
+def test_disk_budget_accounts_for_expansion(monkeypatch):
+    monkeypatch.setattr(config, "AUDIO_DISK_EXPANSION_FACTOR", 3.0)
+    budget = ByteBudget(max_inflight_bytes=1000, max_disk_bytes=200)
+
+    assert budget.try_reserve("job-1", make_asset("a1", size=60))
+    assert budget.disk_bytes == 180
+    assert not budget.try_reserve("job-2", make_asset("a2", size=10))
+
+
+def test_oversized_job_is_admitted_only_when_nothing_else_is_in_flight():
+    budget = ByteBudget(max_inflight_bytes=10, max_disk_bytes=10)
+
+    assert budget.try_reserve("job-1", make_asset("a1", size=100))
+    assert not budget.try_reserve("job-2", make_asset("a2", size=1))
+
+
+def test_text_and_unresolved_jobs_are_exempt():
+    budget = ByteBudget(max_inflight_bytes=10, max_disk_bytes=10)
+    assert budget.try_reserve("job-1", make_asset("a1", size=10))
+
+    assert budget.try_reserve("job-2", make_asset("a2", file_type="text", size=10**9))
+    assert budget.try_reserve("job-3", make_asset("a3", file_type="markdown", size=10**9))
+    assert budget.try_reserve("job-4", None)
+    assert budget.stats()["jobs"] == 1
+
+
+def test_reserving_the_same_job_twice_counts_it_once():
+    budget = ByteBudget(max_inflight_bytes=100, max_disk_bytes=1000)
+    asset = make_asset("a1", size=60)
+
+    assert budget.try_reserve("job-1", asset)
+    assert budget.try_reserve("job-1", asset)
+    assert budget.inflight_bytes == 60
+
+
+def test_release_frees_budget_and_wakes_waiters():
+    async def scenario():
+        budget = ByteBudget(max_inflight_bytes=100, max_disk_bytes=1000)
+        assert budget.try_reserve("job-1", make_asset("a1", size=60))
+        waiter = asyncio.create_task(budget.wait_for_release())
+        await asyncio.sleep(0)
+
+        await budget.release("job-1")
+        await asyncio.wait_for(waiter, timeout=1)
+        assert budget.stats() == {"jobs": 0, "inflight_bytes": 0, "disk_bytes": 0}
+        assert budget.try_reserve("job-2", make_asset("a2", size=60))
+
+    asyncio.run(scenario())
@@ -0,0 +1,208 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import time
+
+import pytest
+
+from asset_processing_service.api_client import (
+    ApiError,
+    append_asset_content,
+    claim_job,
+    fetch_assets,
+    fetch_jobs,
+    reset_asset_content,
+    update_asset_content,
+    update_jobs_bulk,
+)
+from asset_processing_service.config import config
+from tests.helpers import stub_api
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def add_jobs(backend, count: int):
+    job_ids = [backend.add_job("input.mp3", "audio", "audio/mpeg", 1000, "project") for _ in range(count)]
+    for offset, job_id in enumerate(job_ids):
+        backend.jobs[job_id]["updatedAt"] = (EPOCH + timedelta(seconds=offset)).isoformat()
+    return job_ids
+
+
+def test_fetch_jobs_returns_jobs_that_are_not_finished(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job_ids = add_jobs(backend, 3)
+            backend.jobs[job_ids[1]]["status"] = "completed"
+            return job_ids, await fetch_jobs(session)
+
+    job_ids, jobs = asyncio.run(scenario())
+    assert sorted(job.id for job in jobs) == [job_ids[0], job_ids[2]]
+
+
+def test_fetch_jobs_after_a_cursor(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job_ids = add_jobs(backend, 4)
+            cursor = EPOCH + timedelta(seconds=1)
+            after_cursor = await fetch_jobs(session, updated_since=cursor)
+            limited = await fetch_jobs(session, updated_since=cursor, limit=1)
+            return job_ids, after_cursor, limited
+
+    job_ids, after_cursor, limited = asyncio.run(scenario())
+    # Oldest change first, so the cursor can advance through a limited page
+    assert [job.id for job in after_cursor] == job_ids[2:]
+    assert [job.id for job in limited] == [job_ids[2]]
+
+
+def test_long_poll_returns_as_soon_as_a_job_changes(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job_ids = add_jobs(backend, 2)
+
+            async def fail_job_later():
+                await asyncio.sleep(0.2)
+                backend._apply_update(job_ids[1], {"status": "failed"})
+
+            changer = asyncio.create_task(fail_job_later())
+            started = time.monotonic()
+            jobs = await fetch_jobs(session, updated_since=EPOCH + timedelta(seconds=1), wait_seconds=5)
+            await changer
+            return job_ids, jobs, time.monotonic() - started
+
+    job_ids, jobs, elapsed = asyncio.run(scenario())
+    assert [(job.id, job.status) for job in jobs] == [(job_ids[1], "failed")]
+    assert elapsed < 2
+
+
+def test_long_poll_returns_nothing_when_no_job_changes(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            add_jobs(backend, 1)
+            started = time.monotonic()
+            jobs = await fetch_jobs(session, updated_since=EPOCH, wait_seconds=0.3)
+            return jobs, time.monotonic() - started
+
+    jobs, elapsed = asyncio.run(scenario())
+    assert jobs == []
+    assert elapsed >= 0.3
+
+
+def test_incremental_fetches_leave_out_jobs_in_progress(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job_ids = add_jobs(backend, 2)
+            backend._apply_update(job_ids[0], {"status": "in_progress"})
+            incremental = await fetch_jobs(session, updated_since=EPOCH + timedelta(seconds=1), wait_seconds=0.3)
+            full = await fetch_jobs(session)
+            return job_ids, incremental, full
+
+    job_ids, incremental, full = asyncio.run(scenario())
+    # Running jobs are still seen, and checked for being stuck, by a full fetch
+    assert incremental == []
+    assert sorted(job.id for job in full) == job_ids
+
+
+def test_claim_job_reports_409_as_owned_elsewhere(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            first = await claim_job(session, job_id)
+            second = await claim_job(session, job_id)
+            with pytest.raises(ApiError) as missing:
+                await claim_job(session, "no-such-job")
+            return first, second, missing.value
+
+    first, second, missing = asyncio.run(scenario())
+    assert first is True
+    assert second is False
+    assert missing.status_code == 404
+
+
+def test_claim_job_raises_on_server_errors(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch, api_error_rate=1.0) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            with pytest.raises(ApiError) as error:
+                await claim_job(session, job_id)
+            return backend.jobs[job_id], error.value
+
+    job, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert job["status"] == "created"
+
+
+def test_injected_conflicts_read_as_owned_elsewhere(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch, conflict_rate=1.0) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            return await claim_job(session, job_id), backend.jobs[job_id], backend.conflicts
+
+    claimed, job, conflicts = asyncio.run(scenario())
+    assert claimed is False
+    assert job["ownerId"] is None
+    assert conflicts == 1
+
+
+def test_failed_fetches_return_nothing(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch, api_error_rate=1.0) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            return await fetch_jobs(session), await fetch_assets(session, [backend.jobs[job_id]["assetId"]])
+
+    assert asyncio.run(scenario()) == ([], {})
+
+
+def test_heartbeats_change_jobs_but_not_incremental_fetches(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            assert await claim_job(session, job_id)
+            claimed_at = backend.jobs[job_id]["updatedAt"]
+            await asyncio.sleep(0.01)
+            lost = await update_jobs_bulk(session, [job_id], [])
+            return claimed_at, backend.jobs[job_id], lost, await fetch_jobs(session, updated_since=EPOCH)
+
+    claimed_at, job, lost, fetched = asyncio.run(scenario())
+    assert lost == []
+    assert job["ownerId"] == config.INSTANCE_ID
+    assert job["updatedAt"] > claimed_at
+    assert fetched == []
+
+
+def test_appended_chunks_are_applied_once_and_in_order(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            asset_id = backend.jobs[job_id]["assetId"]
+            await reset_asset_content(session, asset_id)
+            await append_asset_content(session, asset_id, 0, "first", 1)
+            await append_asset_content(session, asset_id, 1, " second", 1)
+            # A retry of a chunk whose response was lost
+            await append_asset_content(session, asset_id, 1, " second", 1)
+            with pytest.raises(ApiError):
+                await append_asset_content(session, asset_id, 3, " fourth", 1)
+            return dict(backend.assets[asset_id])
+
+    asset = asyncio.run(scenario())
+    assert asset["content"] == "first second"
+    assert asset["tokenCount"] == 2
+    assert asset["contentChunkCount"] == 2
+    assert not asset["contentComplete"]
+
+
+def test_final_content_replaces_appended_chunks(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            [job_id] = add_jobs(backend, 1)
+            asset_id = backend.jobs[job_id]["assetId"]
+            await reset_asset_content(session, asset_id)
+            await append_asset_content(session, asset_id, 0, "draft", 1)
+            await update_asset_content(session, asset_id, "final text", 2)
+            # A late append must not touch the final content
+            await append_asset_content(session, asset_id, 0, "draft", 1)
+            return dict(backend.assets[asset_id])
+
+    asset = asyncio.run(scenario())
+    assert asset["content"] == "final text"
+    assert asset["tokenCount"] == 2
+    assert asset["contentChunkCount"] == 0
+    assert asset["contentComplete"]
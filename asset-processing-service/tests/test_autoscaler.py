@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+from asset_processing_service import autoscaler as autoscaler_module
+from asset_processing_service.autoscaler import WorkerAutoscaler
+from asset_processing_service.config import config
+from asset_processing_service.media_processor import transcription_request_stats
+from asset_processing_service.stage_pools import StagePool
+
+
+@pytest.fixture
+def scaling(monkeypatch):
+    monkeypatch.setattr(config, "MIN_NUM_WORKERS", 1)
+    monkeypatch.setattr(config, "MAX_NUM_WORKERS", 6)
+    monkeypatch.setattr(config, "AUTOSCALE_STEP", 2)
+    monkeypatch.setattr(config, "AUTOSCALE_MAX_RATE_LIMITED_RATIO", 0.05)
+    monkeypatch.setattr(config, "AUTOSCALE_MAX_STAGE_WAIT_RATIO", 1.0)
+    monkeypatch.setattr(config, "FAST_LANE_WORKERS", 0)
+    pool = StagePool("test", 1)
+    monkeypatch.setattr(autoscaler_module, "STAGE_POOLS", [pool])
+    return pool
+
+
+def make_autoscaler(queued: int = 0, target: int = 2, busy: int = 0) -> WorkerAutoscaler:
+    scheduler = SimpleNamespace(qsize=lambda: queued, fast_lane_size=lambda: 0)
+    autoscaler = WorkerAutoscaler(scheduler, spawn_worker=lambda worker_id: None)
+    autoscaler.target = target
+    autoscaler.busy_workers = busy
+    return autoscaler
+
+
+def record_transcription_requests(monkeypatch, requests: int, rate_limited: int) -> None:
+    monkeypatch.setitem(transcription_request_stats, "requests", transcription_request_stats["requests"] + requests)
+    monkeypatch.setitem(
+        transcription_request_stats, "rate_limited", transcription_request_stats["rate_limited"] + rate_limited
+    )
+
+
+def test_starts_with_the_maximum_number_of_workers(scaling):
+    autoscaler = WorkerAutoscaler(SimpleNamespace(), spawn_worker=lambda worker_id: None)
+    assert autoscaler.target == 6
+
+
+def test_queued_jobs_grow_a_busy_pool_by_a_step(scaling):
+    assert make_autoscaler(queued=5, target=2, busy=2)._next_target()[0] == 4
+    assert make_autoscaler(queued=1, target=2, busy=2)._next_target()[0] == 3
+    assert make_autoscaler(queued=5, target=5, busy=5)._next_target()[0] == 6
+
+
+def test_queued_jobs_do_not_grow_a_pool_with_idle_workers(scaling):
+    assert make_autoscaler(queued=5, target=4, busy=3)._next_target()[0] == 4
+
+
+def test_idle_workers_shrink_the_pool_down_to_the_minimum(scaling):
+    assert make_autoscaler(queued=0, target=4, busy=1)._next_target()[0] == 3
+    assert make_autoscaler(queued=0, target=4, busy=3)._next_target()[0] == 3
+    assert make_autoscaler(queued=0, target=1, busy=0)._next_target()[0] == 1
+
+
+def test_rate_limited_transcriptions_shrink_the_pool_despite_queued_jobs(scaling, monkeypatch):
+    autoscaler = make_autoscaler(queued=5, target=4, busy=4)
+    record_transcription_requests(monkeypatch, requests=10, rate_limited=3)
+    target, reason = autoscaler._next_target()
+    assert target == 3
+    assert "rate limited" in reason
+
+    # The ratio is taken per interval, so the next one without 429s grows again
+    autoscaler.target = target
+    autoscaler.busy_workers = target
+    record_transcription_requests(monkeypatch, requests=10, rate_limited=0)
+    assert autoscaler._next_target()[0] == 5
+
+
+def test_a_few_rate_limited_transcriptions_are_tolerated(scaling, monkeypatch):
+    autoscaler = make_autoscaler(queued=5, target=4, busy=4)
+    record_transcription_requests(monkeypatch, requests=100, rate_limited=5)
+    assert autoscaler._next_target()[0] == 6
+
+
+def test_a_saturated_stage_pool_shrinks_the_pool(scaling):
+    autoscaler = make_autoscaler(queued=5, target=4, busy=4)
+    scaling.completed += 3
+    scaling.busy_seconds += 1.0
+    scaling.wait_seconds += 3.0
+    target, reason = autoscaler._next_target()
+    assert target == 3
+    assert "test stage" in reason
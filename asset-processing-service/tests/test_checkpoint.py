@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from asset_processing_service.checkpoint import JobCheckpoint
+from asset_processing_service.config import config
+from tests.helpers import make_asset
+
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "JOB_WORK_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_chunks(checkpoint: JobCheckpoint, count: int):
+    chunks = []
+    for index in range(count):
+        path = os.path.join(checkpoint.job_dir, f"chunk_{index:03d}.mp3")
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        chunks.append({"path": path, "file_name": os.path.basename(path), "size": 5})
+    return chunks
+
+
+def test_completed_stages_are_resumed():
+    asset = make_asset("asset-1")
+    checkpoint = JobCheckpoint.load("job-1", asset)
+    input_path = os.path.join(checkpoint.job_dir, "input.mp3")
+    with open(input_path, "wb") as f:
+        f.write(b"downloaded")
+    checkpoint.mark_downloaded(input_path, 10)
+    chunks = make_chunks(checkpoint, 2)
+    checkpoint.mark_segmented(chunks)
+    checkpoint.save_transcript(0, "first")
+
+    resumed = JobCheckpoint.load("job-1", asset)
+    assert resumed.downloaded_file() == input_path
+    assert resumed.segments() == chunks
+    assert resumed.transcript(0) == "first"
+    assert resumed.transcript(1) is None
+
+
+def test_checkpoint_for_a_different_file_is_discarded():
+    checkpoint = JobCheckpoint.load("job-1", make_asset("asset-1", size=100))
+    checkpoint.save_transcript(0, "first")
+
+    replaced = JobCheckpoint.load("job-1", make_asset("asset-1", size=200))
+    assert replaced.transcript(0) is None
+    assert replaced.segments() is None
+
+
+def test_resegmenting_drops_transcripts_of_the_old_segments():
+    checkpoint = JobCheckpoint.load("job-1", make_asset("asset-1"))
+    checkpoint.mark_segmented(make_chunks(checkpoint, 2))
+    checkpoint.save_transcript(0, "old boundaries")
+
+    checkpoint.mark_segmented(make_chunks(checkpoint, 3))
+    assert checkpoint.transcript(0) is None
+    checkpoint.save_transcript(0, "new boundaries")
+    assert JobCheckpoint.load("job-1", make_asset("asset-1")).transcript(0) == "new boundaries"
+
+
+def test_segments_are_not_resumed_when_a_chunk_file_is_missing():
+    checkpoint = JobCheckpoint.load("job-1", make_asset("asset-1"))
+    chunks = make_chunks(checkpoint, 2)
+    checkpoint.mark_segmented(chunks)
+    os.remove(chunks[1]["path"])
+
+    assert checkpoint.segments() is None
@@ -0,0 +1,78 @@
+import asyncio
+
+from asset_processing_service.api_client import claim_job
+from asset_processing_service.config import config
+from asset_processing_service.heartbeat import HeartbeatAggregator
+from tests.helpers import stub_api
+
+
+def add_job(backend, owner_id=None) -> str:
+    job_id = backend.add_job("input.mp3", "audio", "audio/mpeg", 1000, "project")
+    if owner_id is not None:
+        backend.jobs[job_id].update(status="in_progress", ownerId=owner_id)
+    return job_id
+
+
+def test_lost_leases_are_signalled_per_job(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            owned = add_job(backend)
+            assert await claim_job(session, owned)
+            taken = add_job(backend, owner_id="another-instance")
+
+            heartbeats = HeartbeatAggregator(session)
+            owned_lost = heartbeats.track(owned)
+            taken_lost = heartbeats.track(taken)
+            await heartbeats.flush()
+            return backend, owned, owned_lost.is_set(), taken_lost.is_set()
+
+    backend, owned, owned_lost, taken_lost = asyncio.run(scenario())
+    assert not owned_lost
+    assert taken_lost
+    assert backend.jobs[owned]["leaseExpiresAt"] is not None
+
+
+def test_tracking_a_job_again_keeps_its_lost_lease_event(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            taken = add_job(backend, owner_id="another-instance")
+            heartbeats = HeartbeatAggregator(session)
+            # e.g. the prefetcher tracked it before the worker took the job over
+            first = heartbeats.track(taken)
+            await heartbeats.flush()
+            return first, heartbeats.track(taken)
+
+    first, second = asyncio.run(scenario())
+    assert second is first
+    assert second.is_set()
+
+
+def test_status_updates_are_sent_with_the_next_flush(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            owned = add_job(backend)
+            assert await claim_job(session, owned)
+            taken = add_job(backend, owner_id="another-instance")
+            heartbeats = HeartbeatAggregator(session)
+            await asyncio.gather(
+                heartbeats.update(owned, {"status": "completed"}, owner_id=config.INSTANCE_ID),
+                heartbeats.update(taken, {"status": "completed"}, owner_id=config.INSTANCE_ID),
+                heartbeats.flush(),
+            )
+            return backend.jobs[owned]["status"], backend.jobs[taken]["status"]
+
+    # An update for a job owned by another instance is refused
+    assert asyncio.run(scenario()) == ("completed", "in_progress")
+
+
+def test_failed_flush_keeps_updates_for_the_next_tick(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job_id = add_job(backend)
+            heartbeats = HeartbeatAggregator(session)
+            await backend.stop()
+            await asyncio.gather(heartbeats.update(job_id, {"status": "failed"}), heartbeats.flush())
+            return job_id, heartbeats._pending_updates
+
+    job_id, pending = asyncio.run(scenario())
+    assert pending == {job_id: {"status": "failed", "jobId": job_id}}
@@ -0,0 +1,58 @@
+import asyncio
+
+from asset_processing_service import job_processor
+from asset_processing_service.api_client import update_asset_content
+from asset_processing_service.heartbeat import HeartbeatAggregator
+from asset_processing_service.models import Asset, AssetProcessingJob
+from tests.helpers import stub_api
+
+
+def publish_transcripts(monkeypatch, texts):
+    async def fake_iter_transcriptions(chunks, checkpoint=None):
+        for index, text in enumerate(texts):
+            yield index, text
+
+    async def fake_count_tokens(text):
+        return len(text.split())
+
+    monkeypatch.setattr(job_processor, "iter_transcriptions", fake_iter_transcriptions)
+    monkeypatch.setattr(job_processor, "count_tokens_async", fake_count_tokens)
+
+
+def test_a_failed_claim_leaves_the_job_for_the_next_poll(monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch, api_error_rate=1.0) as (backend, session):
+            job_id = backend.add_job("input.mp3", "audio", "audio/mpeg", 1000, "project")
+            job = AssetProcessingJob(**backend.jobs[job_id])
+            heartbeats = HeartbeatAggregator(session)
+            await job_processor.process_job(session, heartbeats, job)
+            return backend.jobs[job_id]
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "created"
+    assert job["attempts"] == 0
+
+
+def test_a_resumed_job_republishes_its_transcript_without_duplicates(monkeypatch):
+    publish_transcripts(monkeypatch, ["one", "two", "three"])
+
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job_id = backend.add_job("input.mp3", "audio", "audio/mpeg", 1000, "project")
+            asset = Asset(**backend.assets[backend.jobs[job_id]["assetId"]])
+            published = []
+            # As when an instance dies after publishing and another one
+            # resumes the job from its checkpoint
+            for _ in range(2):
+                pieces, token_count = await job_processor.transcribe_and_publish(session, asset, [], None)
+                published.append(dict(backend.assets[asset.id]))
+            await update_asset_content(session, asset.id, "".join(pieces), token_count)
+            return published, backend.assets[asset.id]
+
+    published, final = asyncio.run(scenario())
+    for asset in published:
+        assert asset["content"] == "one\n\ntwo\n\nthree"
+        assert asset["tokenCount"] == 3
+        assert not asset["contentComplete"]
+    assert final["content"] == "one\n\ntwo\n\nthree"
+    assert final["contentComplete"]
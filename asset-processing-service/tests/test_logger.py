@@ -0,0 +1,187 @@
+import json
+import logging
+import queue
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from asset_processing_service import logger as logger_module
+from asset_processing_service.logger import (
+    DrainingQueueListener,
+    DroppingQueueHandler,
+    JsonFormatter,
+    TextFormatter,
+    ThrottleFilter,
+    TruncatingFilter,
+    truncate_traceback,
+)
+
+
+class RecordingHandler(logging.Handler):
+    """
+    Keeps formatted records and the thread each was formatted on. Blocks
+    while `gate` is clear, to let records pile up in the queue.
+    """
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.setFormatter(formatter)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.emitting = threading.Event()
+        self.lines = []
+        self.threads = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emitting.set()
+        self.gate.wait()
+        self.lines.append(self.format(record))
+        self.threads.append(threading.current_thread())
+
+
+@pytest.fixture
+def queued_logger():
+    """
+    A logger wired like setup_logger's, but to its own queue and handler.
+    """
+    log_queue = queue.Queue(maxsize=100)
+    handler = RecordingHandler(TextFormatter())
+    listener = DrainingQueueListener(log_queue, handler)
+    queue_handler = DroppingQueueHandler(log_queue)
+    test_logger = logging.getLogger("tests.logger")
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(queue_handler)
+    listener.start()
+    yield SimpleNamespace(
+        logger=test_logger, queue=log_queue, handler=handler, queue_handler=queue_handler, listener=listener
+    )
+    handler.gate.set()
+    if listener._thread is not None:
+        listener.stop()
+    test_logger.removeHandler(queue_handler)
+
+
+def make_record(message: str, level: int = logging.INFO, throttle: bool = True) -> logging.LogRecord:
+    # Records from one call site share a pathname and line number
+    return logging.makeLogRecord(
+        {
+            "msg": message,
+            "levelno": level,
+            "levelname": logging.getLevelName(level),
+            "pathname": "worker.py",
+            "lineno": 10,
+            "throttle": throttle,
+        }
+    )
+
+
+def test_records_are_formatted_on_the_writer_thread(queued_logger):
+    values = ["before"]
+    queued_logger.logger.info("Value: %s", values)
+    # The message is resolved when logging, so later changes don't show up
+    values[0] = "after"
+    try:
+        raise ValueError("broken")
+    except ValueError:
+        queued_logger.logger.exception("Failed")
+    queued_logger.listener.stop()
+
+    handler = queued_logger.handler
+    assert all(thread is not threading.current_thread() for thread in handler.threads)
+    assert handler.lines[0].endswith("Value: ['before']")
+    assert "Failed\nTraceback" in handler.lines[1]
+    assert handler.lines[1].endswith("ValueError: broken")
+
+
+def test_queued_records_are_written_on_stop(queued_logger):
+    queued_logger.handler.gate.clear()
+    for index in range(50):
+        queued_logger.logger.info("Message %d", index)
+
+    stopping = threading.Thread(target=queued_logger.listener.stop)
+    stopping.start()
+    queued_logger.handler.gate.set()
+    stopping.join(timeout=5)
+
+    assert not stopping.is_alive()
+    assert [line.rsplit(": ", 1)[1] for line in queued_logger.handler.lines] == [f"Message {i}" for i in range(50)]
+
+
+def test_records_are_dropped_and_counted_when_the_queue_is_full(queued_logger):
+    queued_logger.queue.maxsize = 3
+    queued_logger.handler.gate.clear()
+    queued_logger.logger.info("Blocking the writer")
+    assert queued_logger.handler.emitting.wait(timeout=5)
+    for index in range(10):
+        queued_logger.logger.info("Message %d", index)
+    dropped = queued_logger.queue_handler.dropped
+
+    queued_logger.handler.gate.set()
+    queued_logger.queue.join()
+    queued_logger.logger.info("After")
+    queued_logger.listener.stop()
+
+    assert dropped == 7
+    assert [line.rsplit(": ", 1)[1] for line in queued_logger.handler.lines[1:4]] == [f"Message {i}" for i in range(3)]
+    assert queued_logger.handler.lines[-2].endswith("Dropped 7 log messages because the log queue was full")
+    assert queued_logger.handler.lines[-1].endswith("After")
+
+
+def test_throttled_messages_are_suppressed_and_counted(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(logger_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    throttle = ThrottleFilter(interval_seconds=30)
+
+    assert throttle.filter(make_record("Polling"))
+    clock.now = 10
+    assert not throttle.filter(make_record("Polling"))
+    assert not throttle.filter(make_record("Polling"))
+    assert throttle.filter(make_record("Polling", throttle=False))
+    assert throttle.filter(make_record("Polling failed", level=logging.WARNING))
+
+    clock.now = 31
+    record = make_record("Polling")
+    assert throttle.filter(record)
+    assert record.getMessage() == "Polling (2 similar messages suppressed)"
+
+
+def test_long_messages_are_truncated():
+    record = logging.makeLogRecord({"msg": "Payload: %s", "args": ("x" * 100,)})
+    assert TruncatingFilter(max_chars=20).filter(record)
+    assert record.getMessage() == "Payload: xxxxxxxxxxx... [89 more characters]"
+
+    short = logging.makeLogRecord({"msg": "Payload: %s", "args": ("x",)})
+    TruncatingFilter(max_chars=20).filter(short)
+    assert short.getMessage() == "Payload: x"
+
+
+def test_tracebacks_keep_their_end():
+    assert truncate_traceback("0123456789", 4) == "[6 earlier characters]...6789"
+    assert truncate_traceback("0123456789", 0) == "0123456789"
+
+
+def test_json_records_include_the_exception_and_stack():
+    try:
+        raise ValueError("broken")
+    except ValueError:
+        record = logging.getLogger("tests.logger").makeRecord(
+            "tests.logger",
+            logging.ERROR,
+            "worker.py",
+            10,
+            'Failed "%s"',
+            ("job-1",),
+            exc_info=sys.exc_info(),
+            sinfo="Stack (most recent call last):\n  frame",
+        )
+
+    entry = json.loads(JsonFormatter(max_traceback_chars=30).format(record))
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "tests.logger"
+    assert entry["message"] == 'Failed "job-1"'
+    assert entry["exception"].endswith("ValueError: broken")
+    assert entry["exception"].startswith("[")
+    assert entry["stack"] == "Stack (most recent call last):\n  frame"
@@ -0,0 +1,50 @@
+import asyncio
+from collections import defaultdict
+
+from asset_processing_service import main
+from asset_processing_service.admission import ByteBudget
+from asset_processing_service.config import config
+from asset_processing_service.heartbeat import HeartbeatAggregator
+from asset_processing_service.models import AssetProcessingJob
+from asset_processing_service.scheduler import JobScheduler
+from tests.helpers import stub_api
+
+
+def test_a_failing_worker_does_not_fail_a_job_owned_elsewhere(monkeypatch):
+    monkeypatch.setattr(config, "STATUS_UPDATE_FLUSH_DELAY_SECONDS", 0.0)
+
+    async def failing_process_job(session, heartbeats, job, asset, claimed=None):
+        raise RuntimeError("Processing failed")
+
+    monkeypatch.setattr(main, "process_job", failing_process_job)
+
+    async def run_worker(backend, session, job_id):
+        job = AssetProcessingJob(**backend.jobs[job_id])
+        heartbeats = HeartbeatAggregator(session)
+        scheduler = JobScheduler()
+        pending = {job.id}
+        await scheduler.put(job, None)
+        heartbeat_task = asyncio.create_task(heartbeats.run())
+        worker_task = asyncio.create_task(
+            main.worker(session, heartbeats, 0, scheduler, ByteBudget(0, 0), pending, defaultdict(asyncio.Lock))
+        )
+        while pending:
+            await asyncio.sleep(0.01)
+        worker_task.cancel()
+        heartbeat_task.cancel()
+        await asyncio.gather(worker_task, heartbeat_task, return_exceptions=True)
+        return backend.jobs[job_id]
+
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            owned = backend.add_job("input.mp3", "audio", "audio/mpeg", 1000, "project")
+            backend.jobs[owned].update(status="in_progress", ownerId=config.INSTANCE_ID)
+            taken = backend.add_job("input.mp3", "audio", "audio/mpeg", 1000, "project")
+            backend.jobs[taken].update(status="in_progress", ownerId="another-instance")
+            return await run_worker(backend, session, owned), await run_worker(backend, session, taken)
+
+    owned, taken = asyncio.run(scenario())
+    assert owned["status"] == "failed"
+    assert owned["attempts"] == 1
+    assert taken["status"] == "in_progress"
+    assert taken["attempts"] == 0
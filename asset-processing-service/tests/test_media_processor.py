@@ -0,0 +1,394 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from openai import APITimeoutError, BadRequestError, RateLimitError
+import pytest
+
+from asset_processing_service import media_processor
+from asset_processing_service.config import config
+from asset_processing_service.media_processor import (
+    TranscriptionLatencyTracker,
+    chunk_deadline_seconds,
+    get_transcription_semaphore,
+    iter_transcriptions,
+    parse_silencedetect_output,
+    silence_aligned_split_points,
+    send_hedged_transcription_request,
+    send_transcription_request,
+    silence_search_windows,
+    transcribe_with_retry,
+)
+from asset_processing_service.metrics import hedged_transcriptions_total, inflight_transcriptions
+from tests.helpers import stub_api
+
+SILENCEDETECT_OUTPUT = """
+  Duration: 00:10:00.05, start: 0.000000, bitrate: 64 kb/s
+[silencedetect @ 0x1] silence_start: -0.0123
+[silencedetect @ 0x1] silence_end: 1.5 | silence_duration: 1.51
+size=N/A time=00:03:00.00 bitrate=N/A speed= 500x
+[silencedetect @ 0x1] silence_start: 199
+[silencedetect @ 0x1] silence_end: 200 | silence_duration: 1
+[silencedetect @ 0x1] silence_start: 598.5
+size=N/A time=00:09:59.50 bitrate=N/A speed= 520x
+"""
+
+
+@pytest.fixture
+def chunking(monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_TARGET_SECONDS", 180.0)
+    monkeypatch.setattr(config, "CHUNK_SILENCE_SEARCH_SECONDS", 30.0)
+
+
+def test_parse_silencedetect_output():
+    duration, silences = parse_silencedetect_output(SILENCEDETECT_OUTPUT)
+
+    # The last progress line wins over the header, and an open silence runs to the end
+    assert duration == 599.5
+    assert silences == [(0.0, 1.5), (199.0, 200.0), (598.5, 599.5)]
+
+
+def test_parse_silencedetect_output_without_times():
+    assert parse_silencedetect_output("") == (0.0, [])
+
+
+def test_cuts_move_to_the_nearest_silence(chunking):
+    silences = [(140.0, 141.0), (185.0, 186.0), (199.0, 200.0), (370.0, 372.0)]
+
+    # No silence near the last target, so that cut stays on it
+    assert silence_aligned_split_points(600.0, silences, max_chunk_seconds=1000) == [185.5, 371.0, 540.0]
+
+
+def test_cuts_ignore_silences_outside_the_search_window(chunking):
+    silences = [(100.0, 101.0), (260.0, 262.0)]
+
+    assert silence_aligned_split_points(400.0, silences, max_chunk_seconds=1000) == [180.0, 360.0]
+
+
+def test_chunks_never_exceed_the_maximum_length(chunking):
+    silences = [(95.0, 96.0), (205.0, 206.0)]
+    split_points = silence_aligned_split_points(300.0, silences, max_chunk_seconds=100)
+
+    boundaries = [0.0, *split_points, 300.0]
+    assert all(end - start <= 100 for start, end in zip(boundaries, boundaries[1:]))
+    assert split_points[0] == 95.5
+
+
+def test_short_input_is_not_split(chunking):
+    assert silence_aligned_split_points(200.0, [(100.0, 101.0)], max_chunk_seconds=1000) == []
+
+
+def test_search_windows_cover_every_possible_cut(chunking):
+    windows = silence_search_windows(600.0, max_chunk_seconds=1000)
+    assert windows == [(150.0, 60.0), (330.0, 60.0), (510.0, 60.0)]
+
+    # With a silence at every second, each cut still lands inside a window
+    silences = [(second, second + 0.5) for second in range(600)]
+    split_points = silence_aligned_split_points(600.0, silences, max_chunk_seconds=1000)
+    assert all(
+        any(start <= point <= start + length for start, length in windows) for point in split_points
+    )
+
+
+class TransientError(Exception):
+    pass
+
+
+class FakeCheckpoint:
+    def __init__(self):
+        self.transcripts: Dict[int, str] = {}
+
+    def transcript(self, index: int) -> Optional[str]:
+        return self.transcripts.get(index)
+
+    def save_transcript(self, index: int, text: str) -> None:
+        self.transcripts[index] = text
+
+
+@pytest.fixture
+def transcription(monkeypatch):
+    """
+    Replaces the API call with a per-chunk script: each chunk's entry lists
+    what its successive calls do (a delay in seconds, or an exception).
+    """
+    scripts: Dict[int, List] = {}
+    calls: Dict[int, int] = {}
+    finished: List[int] = []
+
+    async def fake_transcribe_with_retry(index: int, chunk: dict) -> str:
+        attempt = calls.get(index, 0)
+        calls[index] = attempt + 1
+        script = scripts.get(index, [0.0])
+        outcome = script[min(attempt, len(script) - 1)]
+        if isinstance(outcome, Exception):
+            raise outcome
+        await asyncio.sleep(outcome)
+        finished.append(index)
+        return f"text {index}"
+
+    monkeypatch.setattr(media_processor, "transcribe_with_retry", fake_transcribe_with_retry)
+    monkeypatch.setattr(media_processor, "is_retryable_transcription_error", lambda e: isinstance(e, TransientError))
+    monkeypatch.setattr(media_processor.transcription_cache, "max_bytes", 0)
+    monkeypatch.setattr(config, "TRANSCRIPTION_CHUNK_ATTEMPTS", 2)
+    return scripts, calls, finished
+
+
+def make_chunks(count: int) -> List[dict]:
+    return [{"file_name": f"chunk_{index:03d}.mp3", "data": b""} for index in range(count)]
+
+
+async def collect(chunks: List[dict], checkpoint: Optional[FakeCheckpoint] = None, received: Optional[list] = None):
+    received = [] if received is None else received
+    async for index, text in iter_transcriptions(chunks, checkpoint):
+        received.append((index, text))
+    return received
+
+
+def test_transcripts_are_yielded_in_chunk_order(transcription):
+    scripts, _, finished = transcription
+    scripts.update({0: [0.06], 1: [0.04], 2: [0.02], 3: [0.0]})
+
+    received = asyncio.run(collect(make_chunks(4)))
+
+    assert received == [(index, f"text {index}") for index in range(4)]
+    # All chunks ran concurrently, so the last ones finished first
+    assert finished == [3, 2, 1, 0]
+
+
+def test_checkpointed_chunks_are_not_transcribed_again(transcription):
+    _, calls, _ = transcription
+    checkpoint = FakeCheckpoint()
+    checkpoint.transcripts[1] = "saved 1"
+
+    received = asyncio.run(collect(make_chunks(3), checkpoint))
+
+    assert received == [(0, "text 0"), (1, "saved 1"), (2, "text 2")]
+    assert 1 not in calls
+    assert checkpoint.transcripts == {0: "text 0", 1: "saved 1", 2: "text 2"}
+
+
+def test_a_chunk_failing_with_a_retryable_error_is_transcribed_again(transcription):
+    scripts, calls, _ = transcription
+    scripts[1] = [TransientError("rate limited"), 0.0]
+
+    received = asyncio.run(collect(make_chunks(3)))
+
+    assert [index for index, _ in received] == [0, 1, 2]
+    assert calls == {0: 1, 1: 2, 2: 1}
+
+
+def test_chunk_attempts_are_limited(transcription):
+    scripts, calls, _ = transcription
+    scripts[1] = [TransientError("rate limited")]
+    received = []
+
+    with pytest.raises(TransientError):
+        asyncio.run(collect(make_chunks(3), received=received))
+
+    assert received == [(0, "text 0")]
+    assert calls[1] == 2
+
+
+def test_other_chunks_finish_and_are_checkpointed_before_a_failure_is_raised(transcription):
+    scripts, calls, _ = transcription
+    scripts.update({1: [ValueError("corrupt audio")], 2: [0.05]})
+    checkpoint = FakeCheckpoint()
+    received = []
+
+    with pytest.raises(ValueError):
+        asyncio.run(collect(make_chunks(3), checkpoint, received))
+
+    assert received == [(0, "text 0")]
+    # Non-retryable errors are not re-attempted
+    assert calls[1] == 1
+    assert checkpoint.transcripts == {0: "text 0", 2: "text 2"}
+
+
+@pytest.fixture
+def retry_delays(monkeypatch):
+    """
+    Makes retries fast and records each backoff delay the real policy picks.
+    """
+    monkeypatch.setattr(config, "TRANSCRIPTION_MAX_RETRIES", 3)
+    monkeypatch.setattr(config, "TRANSCRIPTION_RETRY_BASE_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(config, "TRANSCRIPTION_RETRY_MAX_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGING", False)
+    delays: List[float] = []
+    real_retry_delay = media_processor.transcription_retry_delay
+
+    def recording_retry_delay(error: Exception, attempt: int) -> float:
+        delay = real_retry_delay(error, attempt)
+        delays.append(delay)
+        return delay
+
+    monkeypatch.setattr(media_processor, "transcription_retry_delay", recording_retry_delay)
+    return delays
+
+
+def transcribe_against_stub(monkeypatch, failure_statuses: List[int]):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, _):
+            backend.transcription_failure_statuses = list(failure_statuses)
+            try:
+                return await transcribe_with_retry(0, {"file_name": "chunk_000.mp3", "data": b"audio"}), backend
+            except Exception as e:
+                return e, backend
+
+    return asyncio.run(scenario())
+
+
+def test_rate_limited_requests_are_retried_after_retry_after(monkeypatch, retry_delays):
+    rate_limited_before = media_processor.transcription_request_stats["rate_limited"]
+
+    text, backend = transcribe_against_stub(monkeypatch, [429, 429])
+
+    assert text == "Transcript of chunk_000.mp3 (5 bytes)."
+    assert backend.transcription_requests == 3
+    # The stub asks for 0.5s, capped at the configured maximum
+    assert retry_delays == [0.05, 0.05]
+    assert media_processor.transcription_request_stats["rate_limited"] == rate_limited_before + 2
+
+
+def test_server_errors_back_off_exponentially(monkeypatch, retry_delays):
+    text, backend = transcribe_against_stub(monkeypatch, [500, 503, 502])
+
+    assert text.startswith("Transcript of chunk_000.mp3")
+    assert backend.transcription_requests == 4
+    # Base delay doubled per attempt, with up to 50% jitter taken off
+    for attempt, delay in enumerate(retry_delays):
+        assert 0.01 * 2 ** attempt * 0.5 <= delay <= 0.01 * 2 ** attempt
+    assert len(retry_delays) == 3
+
+
+def test_retries_give_up_at_the_limit(monkeypatch, retry_delays):
+    error, backend = transcribe_against_stub(monkeypatch, [429] * 10)
+
+    assert isinstance(error, RateLimitError)
+    assert backend.transcription_requests == 4
+    assert len(retry_delays) == 3
+
+
+def test_client_errors_are_not_retried(monkeypatch, retry_delays):
+    error, backend = transcribe_against_stub(monkeypatch, [400])
+
+    assert isinstance(error, BadRequestError)
+    assert not media_processor.is_retryable_transcription_error(error)
+    assert backend.transcription_requests == 1
+    assert retry_delays == []
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """
+    A fresh latency tracker that hedges requests slower than the median of
+    its samples, after 0.2s for a one second chunk.
+    """
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGING", True)
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGE_PERCENTILE", 0.5)
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGE_MIN_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(config, "MAX_CONCURRENT_TRANSCRIPTIONS", 2)
+    tracker = TranscriptionLatencyTracker()
+    monkeypatch.setattr(media_processor, "transcription_latency", tracker)
+    for latency in [0.1, 0.2, 0.3]:
+        tracker.record({"duration": 1.0}, latency)
+    return tracker
+
+
+def hedged_against_stub(monkeypatch, latencies: List[float]):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, _):
+            backend.transcription_latencies = list(latencies)
+            started = asyncio.get_running_loop().time()
+            text = await send_hedged_transcription_request(0, {"file_name": "chunk_000.mp3", "data": b"audio", "duration": 1.0})
+            elapsed = asyncio.get_running_loop().time() - started
+            in_flight = inflight_transcriptions.samples()
+            # Both slots are free again, so the losing request isn't holding one
+            semaphore = get_transcription_semaphore()
+            for _ in range(config.MAX_CONCURRENT_TRANSCRIPTIONS):
+                await asyncio.wait_for(semaphore.acquire(), timeout=0.1)
+            return text, elapsed, backend.transcription_requests, in_flight
+
+    return asyncio.run(scenario())
+
+
+def test_hedge_delay_follows_the_latency_percentile(hedging, monkeypatch):
+    assert hedging.hedge_delay({"duration": 1.0}) == 0.2
+    # Latency is tracked per second of audio
+    assert hedging.hedge_delay({"duration": 10.0}) == pytest.approx(2.0)
+    assert hedging.hedge_delay({"duration": 0.1}) == 0.05
+    assert hedging.hedge_delay({}) is None
+
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGE_MIN_SAMPLES", 4)
+    assert hedging.hedge_delay({"duration": 1.0}) is None
+
+
+def test_requests_faster_than_the_percentile_are_not_hedged(hedging, monkeypatch):
+    text, _, requests, _ = hedged_against_stub(monkeypatch, [0.05])
+
+    assert text.startswith("Transcript of chunk_000.mp3")
+    assert requests == 1
+
+
+def test_a_slow_request_is_hedged_and_the_loser_cancelled(hedging, monkeypatch):
+    hedge_wins = 'asset_processing_hedged_transcriptions_total{winner="hedge"}'
+    wins_before = [line for line in hedged_transcriptions_total.samples() if line.startswith(hedge_wins)]
+
+    text, elapsed, requests, in_flight = hedged_against_stub(monkeypatch, [1.0, 0.0])
+
+    assert text.startswith("Transcript of chunk_000.mp3")
+    assert requests == 2
+    assert elapsed < 0.8
+    wins_after = [line for line in hedged_transcriptions_total.samples() if line.startswith(hedge_wins)]
+    assert wins_after != wins_before
+    # The losing request was cancelled as soon as the hedge answered
+    assert in_flight == ["asset_processing_inflight_transcriptions 0"]
+
+
+def test_deadlines_scale_with_chunk_duration(monkeypatch):
+    monkeypatch.setattr(config, "TRANSCRIPTION_DEADLINE_BASE_SECONDS", 30)
+    monkeypatch.setattr(config, "TRANSCRIPTION_DEADLINE_SECONDS_PER_AUDIO_SECOND", 0.5)
+    monkeypatch.setattr(config, "TRANSCRIPTION_TIMEOUT_SECONDS", 300)
+
+    assert chunk_deadline_seconds({"duration": 60}) == 60
+    assert chunk_deadline_seconds({"duration": 300}) == 180
+    assert chunk_deadline_seconds({"duration": 1000}) == 300
+    assert chunk_deadline_seconds({}) == 300
+
+
+def test_requests_past_their_deadline_time_out(monkeypatch):
+    monkeypatch.setattr(config, "TRANSCRIPTION_DEADLINE_BASE_SECONDS", 0.1)
+    monkeypatch.setattr(config, "TRANSCRIPTION_DEADLINE_SECONDS_PER_AUDIO_SECOND", 0.1)
+
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, _):
+            # 0.4s is within a 5 second chunk's deadline but not a 1 second one's
+            backend.transcription_latencies = [0.4, 0.4]
+            long_chunk = await send_transcription_request({"file_name": "long.mp3", "data": b"audio", "duration": 5.0})
+            try:
+                await send_transcription_request({"file_name": "short.mp3", "data": b"audio", "duration": 1.0})
+            except Exception as e:
+                return long_chunk, e
+
+    long_chunk, error = asyncio.run(scenario())
+    assert long_chunk.startswith("Transcript of long.mp3")
+    assert isinstance(error, APITimeoutError)
+    assert media_processor.is_retryable_transcription_error(error)
+
+
+def test_only_failed_chunks_are_sent_again(monkeypatch):
+    monkeypatch.setattr(config, "TRANSCRIPTION_MAX_RETRIES", 0)
+    monkeypatch.setattr(config, "TRANSCRIPTION_CHUNK_ATTEMPTS", 2)
+    monkeypatch.setattr(config, "TRANSCRIPTION_HEDGING", False)
+    # One request at a time, so the first one sent is chunk 0's
+    monkeypatch.setattr(config, "MAX_CONCURRENT_TRANSCRIPTIONS", 1)
+    monkeypatch.setattr(media_processor.transcription_cache, "max_bytes", 0)
+
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, _):
+            backend.transcription_failure_statuses = [503]
+            chunks = [{"file_name": f"chunk_{index:03d}.mp3", "data": b"audio"} for index in range(3)]
+            return await collect(chunks), backend.transcribed_files
+
+    received, transcribed_files = asyncio.run(scenario())
+    assert [index for index, _ in received] == [0, 1, 2]
+    assert sorted(transcribed_files) == ["chunk_000.mp3", "chunk_000.mp3", "chunk_001.mp3", "chunk_002.mp3"]
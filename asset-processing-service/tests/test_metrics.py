@@ -0,0 +1,104 @@
+import asyncio
+import re
+import socket
+
+import aiohttp
+import pytest
+
+from asset_processing_service import metrics
+from asset_processing_service.config import config
+from asset_processing_service.metrics import Counter, Gauge, Histogram
+
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\\\|\\"|\\n)*"'
+SAMPLE = re.compile(rf"^[a-zA-Z_:][a-zA-Z0-9_:]*(?:\{{{LABEL}(?:,{LABEL})*\}})? -?(?:[0-9.e+-]+|\+Inf|NaN)$")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = []
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    return registry
+
+
+def assert_well_formed(text: str) -> None:
+    assert text.endswith("\n")
+    typed = set()
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, type_name = line.split(" ")
+            assert type_name in ["counter", "gauge", "histogram"]
+            typed.add(name)
+            continue
+        assert SAMPLE.match(line), line
+        name = line.split("{")[0].split(" ")[0]
+        assert name in typed or re.sub(r"_(bucket|sum|count)$", "", name) in typed, line
+
+
+def test_histogram_buckets_are_cumulative_and_end_with_inf(registry):
+    histogram = Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(2, 1))
+    for value in [0.5, 1, 3]:
+        histogram.observe(value, stage="transcode")
+
+    assert histogram.render().splitlines() == [
+        "# HELP stage_seconds Stage time.",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="transcode",le="1"} 2',
+        'stage_seconds_bucket{stage="transcode",le="2"} 2',
+        'stage_seconds_bucket{stage="transcode",le="+Inf"} 3',
+        'stage_seconds_sum{stage="transcode"} 4.5',
+        'stage_seconds_count{stage="transcode"} 3',
+    ]
+
+
+def test_label_values_are_escaped(registry):
+    counter = Counter("retries_total", "Retries.", ["operation"])
+    counter.inc(operation='say "hi"\\\nbye')
+
+    assert counter.samples() == ['retries_total{operation="say \\"hi\\"\\\\\\nbye"} 1']
+    assert_well_formed(metrics.render_metrics())
+
+
+def test_rendered_metrics_are_well_formed(registry):
+    Histogram("bytes", "Bytes.", ["stage"], buckets=metrics.BYTES_BUCKETS).observe(5000, stage="download")
+    Counter("jobs_total", "Jobs.", ["outcome"]).inc(outcome="completed")
+    Counter("unused_total", "Never incremented.", ["outcome"])
+    gauge = Gauge("depth", "Depth.", ["lane"])
+    gauge.set_function(lambda: 3, lane="fast")
+    Gauge("workers", "Workers.").inc()
+
+    text = metrics.render_metrics()
+    assert_well_formed(text)
+    assert 'depth{lane="fast"} 3' in text
+    assert "workers 1" in text
+
+
+def test_metrics_endpoint_serves_the_registry(registry, monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(config, "METRICS_HOST", "127.0.0.1")
+    monkeypatch.setattr(config, "METRICS_PORT", port)
+    Counter("jobs_total", "Jobs.", ["outcome"]).inc(outcome="completed")
+
+    async def scenario():
+        runner = await metrics.start_metrics_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    return response.status, response.content_type, await response.text()
+        finally:
+            await runner.cleanup()
+
+    status, content_type, text = asyncio.run(scenario())
+    assert status == 200
+    assert content_type == "text/plain"
+    assert_well_formed(text)
+    assert 'jobs_total{outcome="completed"} 1' in text
+
+
+def test_metrics_endpoint_is_disabled_by_port_zero(monkeypatch):
+    monkeypatch.setattr(config, "METRICS_PORT", 0)
+    assert asyncio.run(metrics.start_metrics_server()) is None
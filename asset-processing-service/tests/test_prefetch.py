@@ -0,0 +1,162 @@
+import asyncio
+import os
+from typing import Set
+
+import pytest
+
+from asset_processing_service.checkpoint import JobCheckpoint
+from asset_processing_service.config import config
+from asset_processing_service.models import Asset, AssetProcessingJob
+from asset_processing_service.prefetch import DownloadPrefetcher
+from tests.helpers import MB, stub_api
+
+
+class FakeHeartbeats:
+    def __init__(self):
+        self.tracked: Set[str] = set()
+
+    def track(self, job_id: str) -> asyncio.Event:
+        self.tracked.add(job_id)
+        return asyncio.Event()
+
+    def untrack(self, job_id: str) -> None:
+        self.tracked.discard(job_id)
+
+
+@pytest.fixture
+def media_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "JOB_WORK_DIR", str(tmp_path / "jobs"))
+    path = tmp_path / "input.mp3"
+    path.write_bytes(b"audio" * 100)
+    return str(path)
+
+
+def add_job(backend, media_file: str, size: int = MB):
+    # The asset's recorded size is what the budget goes by
+    job_id = backend.add_job(media_file, "audio", "audio/mpeg", size, "project")
+    return AssetProcessingJob(**backend.jobs[job_id]), Asset(**backend.assets[backend.jobs[job_id]["assetId"]])
+
+
+def downloaded_file(job: AssetProcessingJob, asset: Asset):
+    if not os.path.isdir(os.path.join(config.JOB_WORK_DIR, job.id)):
+        return None
+    return JobCheckpoint.load(job.id, asset).downloaded_file()
+
+
+async def wait_until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+def test_a_job_is_claimed_before_it_is_downloaded(media_file, monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job, asset = add_job(backend, media_file)
+            heartbeats = FakeHeartbeats()
+            prefetcher = DownloadPrefetcher(session, heartbeats, max_bytes=10 * MB, concurrency=1)
+            prefetcher.submit(job, asset)
+            await wait_until(lambda: prefetcher.completed == 1)
+            claimed = await prefetcher.take(job.id)
+            return claimed, backend.jobs[job.id], heartbeats.tracked, downloaded_file(job, asset)
+
+    claimed, backend_job, tracked, path = asyncio.run(scenario())
+    assert claimed is True
+    assert backend_job["status"] == "in_progress"
+    assert backend_job["ownerId"] == config.INSTANCE_ID
+    assert tracked == {backend_job["id"]}
+    with open(path, "rb") as f:
+        assert f.read() == b"audio" * 100
+
+
+def test_a_job_claimed_elsewhere_is_not_downloaded(media_file, monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch, conflict_rate=1.0) as (backend, session):
+            job, asset = add_job(backend, media_file)
+            heartbeats = FakeHeartbeats()
+            prefetcher = DownloadPrefetcher(session, heartbeats, max_bytes=10 * MB, concurrency=1)
+            prefetcher.submit(job, asset)
+            await wait_until(lambda: prefetcher.stats()["waiting"] == prefetcher.stats()["downloading"] == 0)
+            claimed = await prefetcher.take(job.id)
+            return claimed, heartbeats.tracked, downloaded_file(job, asset), prefetcher.stats()
+
+    claimed, tracked, path, stats = asyncio.run(scenario())
+    assert claimed is False
+    assert not tracked
+    assert path is None
+    assert stats["reserved_bytes"] == 0
+    assert stats["completed"] == 0
+
+
+def test_a_failed_claim_leaves_the_claim_to_the_worker(media_file, monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch, api_error_rate=1.0) as (backend, session):
+            job, asset = add_job(backend, media_file)
+            prefetcher = DownloadPrefetcher(session, FakeHeartbeats(), max_bytes=10 * MB, concurrency=1)
+            prefetcher.submit(job, asset)
+            await wait_until(lambda: prefetcher.failed == 1)
+            return await prefetcher.take(job.id), downloaded_file(job, asset)
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_prefetching_stops_at_the_byte_budget(media_file, monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            (first, first_asset), (second, second_asset) = add_job(backend, media_file), add_job(backend, media_file)
+            prefetcher = DownloadPrefetcher(session, FakeHeartbeats(), max_bytes=MB + MB // 2, concurrency=2)
+            prefetcher.submit(first, first_asset)
+            prefetcher.submit(second, second_asset)
+            await wait_until(lambda: prefetcher.completed == 1)
+            await asyncio.sleep(0.1)
+            held_back = (prefetcher.stats(), backend.jobs[second.id]["status"], downloaded_file(second, second_asset))
+
+            # Taking the first job frees its share of the budget
+            await prefetcher.take(first.id)
+            await wait_until(lambda: prefetcher.completed == 2)
+            return held_back, await prefetcher.take(second.id)
+
+    (stats, second_status, second_path), second_claimed = asyncio.run(scenario())
+    assert stats["reserved_bytes"] == MB
+    assert stats["waiting"] == 1
+    assert second_status == "created"
+    assert second_path is None
+    assert second_claimed is True
+
+
+def test_a_job_larger_than_the_budget_is_prefetched_alone(media_file, monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            job, asset = add_job(backend, media_file, size=10 * MB)
+            prefetcher = DownloadPrefetcher(session, FakeHeartbeats(), max_bytes=MB, concurrency=1)
+            prefetcher.submit(job, asset)
+            await wait_until(lambda: prefetcher.completed == 1)
+            return await prefetcher.take(job.id)
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_close_gives_up_jobs_that_were_never_taken(media_file, monkeypatch):
+    async def scenario():
+        async with stub_api(monkeypatch) as (backend, session):
+            (taken, taken_asset), (untaken, untaken_asset) = add_job(backend, media_file), add_job(backend, media_file)
+            heartbeats = FakeHeartbeats()
+            prefetcher = DownloadPrefetcher(session, heartbeats, max_bytes=10 * MB, concurrency=2)
+            prefetcher.submit(taken, taken_asset)
+            prefetcher.submit(untaken, untaken_asset)
+            await wait_until(lambda: prefetcher.completed == 2)
+
+            assert await prefetcher.take(taken.id) is True
+            await prefetcher.close()
+            return (
+                heartbeats.tracked == {taken.id},
+                downloaded_file(taken, taken_asset),
+                os.path.exists(os.path.join(config.JOB_WORK_DIR, untaken.id)),
+                await prefetcher.take(untaken.id),
+            )
+
+    only_taken_tracked, taken_path, untaken_dir_exists, untaken_claim = asyncio.run(scenario())
+    # The taken job now belongs to its worker, which keeps tracking it
+    assert only_taken_tracked
+    assert taken_path is not None
+    assert not untaken_dir_exists
+    assert untaken_claim is None
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from asset_processing_service import scheduler as scheduler_module
+from asset_processing_service.config import config
+from asset_processing_service.scheduler import JobScheduler
+from tests.helpers import MB, make_asset, make_job
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Only the scheduler's view of time is faked; the event loop keeps the real clock
+    fake_time = SimpleNamespace(now=1000.0)
+    fake_time.monotonic = lambda: fake_time.now
+    monkeypatch.setattr(scheduler_module, "time", fake_time)
+    monkeypatch.setattr(config, "SCHEDULER_AUDIO_BYTES_PER_SECOND", float(MB))
+    monkeypatch.setattr(config, "SCHEDULER_AGING_RATE", 0.5)
+    monkeypatch.setattr(config, "SCHEDULER_PROJECT_SHARE_PENALTY_SECONDS", 300.0)
+    return fake_time
+
+
+async def put(scheduler: JobScheduler, job_id: str, **asset_fields) -> None:
+    await scheduler.put(make_job(job_id), make_asset(f"asset-{job_id}", **asset_fields))
+
+
+async def take_all(scheduler: JobScheduler):
+    job_ids = []
+    while scheduler.qsize():
+        entry = await scheduler.get()
+        scheduler.task_done(entry)
+        job_ids.append(entry.job.id)
+    return job_ids
+
+
+def test_shortest_expected_job_runs_first(clock):
+    async def scenario():
+        scheduler = JobScheduler()
+        await put(scheduler, "large", size=30 * MB)
+        await put(scheduler, "small", size=10 * MB)
+        await put(scheduler, "medium", size=20 * MB)
+        return await take_all(scheduler)
+
+    assert asyncio.run(scenario()) == ["small", "medium", "large"]
+
+
+def test_text_jobs_use_the_fast_lane(clock):
+    async def scenario():
+        scheduler = JobScheduler()
+        await put(scheduler, "audio", size=MB)
+        await put(scheduler, "text", file_type="text", size=100 * MB)
+        assert scheduler.fast_lane_size() == 1
+
+        first = await scheduler.get(fast_lane_only=True)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.get(fast_lane_only=True), timeout=0.05)
+        return first.job.id
+
+    assert asyncio.run(scenario()) == "text"
+
+
+def test_aging_lets_a_large_job_overtake_newer_small_ones(clock):
+    async def scenario(wait_seconds: float):
+        scheduler = JobScheduler()
+        clock.now = 1000.0
+        await put(scheduler, "large", size=100 * MB)
+        clock.now += wait_seconds
+        await put(scheduler, "small", size=10 * MB)
+        return await take_all(scheduler)
+
+    # The large job's 90s of extra cost is worth 180s of waiting at 0.5/s
+    assert asyncio.run(scenario(wait_seconds=100)) == ["small", "large"]
+    assert asyncio.run(scenario(wait_seconds=200)) == ["large", "small"]
+
+
+def test_projects_with_running_jobs_yield_to_others(clock):
+    async def scenario():
+        scheduler = JobScheduler()
+        await put(scheduler, "a1", size=10 * MB, project_id="a")
+        await put(scheduler, "a2", size=20 * MB, project_id="a")
+        await put(scheduler, "b1", size=60 * MB, project_id="b")
+
+        a1 = await scheduler.get()
+        # Project a now has a job running, so b's larger job goes next
+        b1 = await scheduler.get()
+        scheduler.task_done(a1)
+        a2 = await scheduler.get()
+        return [a1.job.id, b1.job.id, a2.job.id]
+
+    assert asyncio.run(scenario()) == ["a1", "b1", "a2"]
+
+
+def test_get_returns_none_once_the_worker_should_exit(clock):
+    async def scenario():
+        scheduler = JobScheduler()
+        retire = False
+        waiter = asyncio.create_task(scheduler.get(should_exit=lambda: retire))
+        await asyncio.sleep(0)
+        retire = True
+        await scheduler.wake_all()
+        return await asyncio.wait_for(waiter, timeout=1)
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,111 @@
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from asset_processing_service.stage_pools import StagePool
+
+
+async def wait_until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def gate():
+    # Blocks pool threads until set; set on teardown so no thread outlives a test
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_cancelling_a_waiter_gives_its_place_to_the_next_one(gate):
+    async def scenario():
+        pool = StagePool("test", 1)
+        blocker = asyncio.create_task(pool.run(gate.wait))
+        cancelled = asyncio.create_task(pool.run(lambda: "cancelled"))
+        waiting = asyncio.create_task(pool.run(lambda: "ran"))
+        await wait_until(lambda: pool.queued == 2)
+
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        queued_after_cancel = pool.queued
+        gate.set()
+        result = await waiting
+        await blocker
+        pool.shutdown()
+        return queued_after_cancel, result, pool.stats()
+
+    queued_after_cancel, result, stats = asyncio.run(scenario())
+    assert queued_after_cancel == 1
+    assert result == "ran"
+    assert stats["queued"] == 0
+    assert stats["running"] == 0
+    assert stats["completed"] == 2
+
+
+def test_a_cancelled_thread_holds_its_slot_until_it_stops(gate):
+    async def scenario():
+        pool = StagePool("test", 1)
+        running = asyncio.create_task(pool.run(gate.wait))
+        await wait_until(lambda: pool.running == 1)
+
+        running.cancel()
+        await asyncio.sleep(0.05)
+        # The thread can't be interrupted, so the slot stays taken
+        held = (running.done(), pool.running)
+        gate.set()
+        await asyncio.gather(running, return_exceptions=True)
+        result = await pool.run(lambda: "ran")
+        pool.shutdown()
+        return held, running.cancelled(), result, pool.running
+
+    held, cancelled, result, running_after = asyncio.run(scenario())
+    assert held == (False, 1)
+    assert cancelled
+    assert result == "ran"
+    assert running_after == 0
+
+
+def test_a_cancelled_process_is_killed_and_frees_its_slot():
+    async def scenario():
+        pool = StagePool("test", 1)
+        process = asyncio.create_task(pool.run_process([sys.executable, "-c", "import time; time.sleep(30)"]))
+        await wait_until(lambda: pool.running == 1)
+        await asyncio.sleep(0.1)
+
+        started = time.monotonic()
+        process.cancel()
+        await asyncio.gather(process, return_exceptions=True)
+        cancel_seconds = time.monotonic() - started
+        returncode, stdout, _ = await pool.run_process([sys.executable, "-c", "print('ran')"])
+        return cancel_seconds, returncode, stdout, pool.stats()
+
+    cancel_seconds, returncode, stdout, stats = asyncio.run(scenario())
+    assert cancel_seconds < 5
+    assert (returncode, stdout.strip()) == (0, b"ran")
+    assert stats["running"] == 0
+    assert stats["completed"] == 2
+
+
+def test_a_saturated_pool_does_not_hold_up_another(gate):
+    async def scenario():
+        ffmpeg_pool = StagePool("ffmpeg", 1)
+        probe_pool = StagePool("probe", 1)
+        busy = [asyncio.create_task(ffmpeg_pool.run(gate.wait)) for _ in range(3)]
+        await wait_until(lambda: ffmpeg_pool.queued == 2)
+
+        result = await asyncio.wait_for(probe_pool.run(lambda: "probed"), timeout=5)
+        ffmpeg_stats = ffmpeg_pool.stats()
+        gate.set()
+        await asyncio.gather(*busy)
+        ffmpeg_pool.shutdown()
+        probe_pool.shutdown()
+        return result, ffmpeg_stats
+
+    result, ffmpeg_stats = asyncio.run(scenario())
+    assert result == "probed"
+    assert ffmpeg_stats["running"] == 1
+    assert ffmpeg_stats["queued"] == 2
@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+from asset_processing_service import metrics, transcription_cache as transcription_cache_module
+from asset_processing_service.metrics import Counter
+from asset_processing_service.transcription_cache import TranscriptionCache
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    async def scenario():
+        cache = TranscriptionCache(str(tmp_path), max_bytes=250, namespace="test")
+
+        key_a, _ = await cache.lookup({"data": b"chunk a"})
+        key_b, _ = await cache.lookup({"data": b"chunk b"})
+        await cache.store(key_a, "a" * 100)
+        await cache.store(key_b, "b" * 100)
+        os.utime(cache._entry_path(key_a), (1000, 1000))
+        os.utime(cache._entry_path(key_b), (2000, 2000))
+
+        # Reading a marks it as recently used, leaving b the oldest
+        assert await cache.lookup({"data": b"chunk a"}) == (key_a, "a" * 100)
+
+        key_c, _ = await cache.lookup({"data": b"chunk c"})
+        await cache.store(key_c, "c" * 100)
+        return cache, key_a, key_b, key_c
+
+    cache, key_a, key_b, key_c = asyncio.run(scenario())
+    assert os.path.exists(cache._entry_path(key_a))
+    assert not os.path.exists(cache._entry_path(key_b))
+    assert os.path.exists(cache._entry_path(key_c))
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "size_bytes": 200}
+
+
+def test_rewriting_an_entry_does_not_grow_the_cache(tmp_path):
+    async def scenario():
+        cache = TranscriptionCache(str(tmp_path), max_bytes=1000, namespace="test")
+        key_a, _ = await cache.lookup({"data": b"chunk a"})
+        key_b, _ = await cache.lookup({"data": b"chunk b"})
+        await cache.store(key_a, "a" * 100)
+        await cache.store(key_b, "b" * 100)
+        # Same chunk transcribed again, e.g. by two jobs sharing the audio
+        await cache.store(key_a, "a" * 100)
+        await cache.store(key_a, "a" * 120)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.stats()["size_bytes"] == 220
+    assert cache.evictions == 0
+
+
+def test_keys_depend_on_the_namespace(tmp_path):
+    async def scenario():
+        whisper = TranscriptionCache(str(tmp_path), max_bytes=1000, namespace="whisper-1")
+        other = TranscriptionCache(str(tmp_path), max_bytes=1000, namespace="other-model")
+        key, _ = await whisper.lookup({"data": b"chunk"})
+        await whisper.store(key, "transcript")
+        return await other.lookup({"data": b"chunk"})
+
+    _, text = asyncio.run(scenario())
+    assert text is None
+
+
+def test_disabled_cache_skips_lookups(tmp_path):
+    cache = TranscriptionCache(str(tmp_path), max_bytes=0, namespace="test")
+    assert asyncio.run(cache.lookup({"data": b"chunk"})) == (None, None)
+    assert os.listdir(tmp_path) == []
+
+
+def test_lookups_and_evictions_are_exported_as_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    lookups = Counter("lookups_total", "Lookups.", ["result"])
+    evictions = Counter("evictions_total", "Evictions.")
+    monkeypatch.setattr(transcription_cache_module, "transcription_cache_lookups_total", lookups)
+    monkeypatch.setattr(transcription_cache_module, "transcription_cache_evictions_total", evictions)
+
+    async def scenario():
+        cache = TranscriptionCache(str(tmp_path), max_bytes=150, namespace="test")
+        key_a, _ = await cache.lookup({"data": b"chunk a"})
+        await cache.store(key_a, "a" * 100)
+        await cache.lookup({"data": b"chunk a"})
+        key_b, _ = await cache.lookup({"data": b"chunk b"})
+        await cache.store(key_b, "b" * 100)
+
+    asyncio.run(scenario())
+    assert sorted(lookups.samples()) == ['lookups_total{result="hit"} 1', 'lookups_total{result="miss"} 2']
+    assert evictions.samples() == ["evictions_total 1"]
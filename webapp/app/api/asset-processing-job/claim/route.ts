@@ -0,0 +1,82 @@
+import { db } from "@/server/db"
+import { assetProcessingJobTable } from "@/server/db/schema"
+import { and, eq, inArray, lt, or } from "drizzle-orm"
+import { NextRequest, NextResponse } from "next/server";
+import { z } from "zod";
+
+
+const claimAssetJobSchema = z.object({
+  ownerId: z.string().min(1),
+  leaseSeconds: z.number().positive(),
+});
+
+
+// Atomically moves a job to in_progress for one owner. The conditional
+// UPDATE only matches claimable jobs, so when several service instances
+// race for the same job exactly one of them gets the row back.
+export async function POST(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const jobId = searchParams.get("jobId");
+
+    if (!jobId) {
+      return NextResponse.json(
+        { error: "Missing jobId parameter" },
+        { status: 400 }
+      );
+    }
+
+    const body = await request.json();
+    const validationResult = claimAssetJobSchema.safeParse(body);
+
+    if (!validationResult.success) {
+      return NextResponse.json(
+        {
+          error: "Invalid request body",
+          errors: validationResult.error.errors,
+        },
+        { status: 400 }
+      );
+    }
+
+    const { ownerId, leaseSeconds } = validationResult.data;
+    const now = new Date();
+
+    const claimedJob = await db
+      .update(assetProcessingJobTable)
+      .set({
+        status: "in_progress",
+        ownerId,
+        leaseExpiresAt: new Date(now.getTime() + leaseSeconds * 1000),
+        lastHeartBeat: now,
+      })
+      .where(
+        and(
+          eq(assetProcessingJobTable.id, jobId),
+          or(
+            inArray(assetProcessingJobTable.status, ["created", "failed"]),
+            and(
+              eq(assetProcessingJobTable.status, "in_progress"),
+              lt(assetProcessingJobTable.leaseExpiresAt, now)
+            )
+          )
+        )
+      )
+      .returning();
+
+    if (claimedJob.length === 0) {
+      return NextResponse.json(
+        { error: "Job is not available to claim" },
+        { status: 409 }
+      );
+    }
+
+    return NextResponse.json(claimedJob[0]);
+  } catch (error) {
+    console.error("Error claiming asset processing job", error);
+    return NextResponse.json(
+      { error: "Error claiming asset processing job" },
+      { status: 500 }
+    );
+  }
+}
@@ -1,9 +1,10 @@
 import { db } from "@/server/db"
 import { assetProcessingJobTable } from "@/server/db/schema"
-import { eq, inArray } from "drizzle-orm"
+import { and, asc, eq, inArray, sql } from "drizzle-orm"
 import { NextRequest, NextResponse } from "next/server";
 import { z } from "zod";
 
+export const maxDuration = 30; // seconds, long-polling GET waits up to 25
 
 const updateAssetJobSchema = z.object({
   status: z
@@ -18,20 +19,88 @@ const updateAssetJobSchema = z.object({
   errorMessage: z.string().optional(),
   attempts: z.number().optional(),
   lastHeartBeat: z.string().optional(),
+  ownerId: z.string().optional(),
+  leaseSeconds: z.number().positive().optional(),
 });
 
+type UpdateAssetJob = z.infer<typeof updateAssetJobSchema>;
 
-export async function GET() {
-  try {
-    const availableJobs = await db
+
+const MAX_JOBS_LIMIT = 500;
+const MAX_WAIT_SECONDS = 25;
+const LONG_POLL_INTERVAL_MS = 500;
+
+const fetchJobsQuerySchema = z.object({
+  updatedSince: z.string().datetime({ offset: true }).optional(),
+  limit: z.coerce.number().int().positive().max(MAX_JOBS_LIMIT).optional(),
+  wait: z.coerce.number().min(0).max(MAX_WAIT_SECONDS).optional(),
+});
+
+
+async function selectAvailableJobs(updatedSince?: Date, limit?: number) {
+  if (!updatedSince) {
+    return db
       .select()
       .from(assetProcessingJobTable)
       .where(
-        inArray(
-          assetProcessingJobTable.status,
-          ["created", "failed", "in_progress", ]
-        )
-      ).execute();
+        inArray(assetProcessingJobTable.status, ["created", "failed", "in_progress"])
+      )
+      .execute();
+  }
+
+  // Every heartbeat bumps updatedAt, so in_progress jobs are left out of
+  // incremental fetches; otherwise each long-poll would return every running
+  // job again and never wait. Stuck jobs are found by the full fetch.
+  const statusFilter = inArray(assetProcessingJobTable.status, ["created", "failed"]);
+
+  // updatedAt is stored with microsecond precision but serialized with
+  // millisecond precision, so compare at millisecond precision to keep the
+  // cursor from returning the same row again.
+  const query = db
+    .select()
+    .from(assetProcessingJobTable)
+    .where(
+      and(
+        statusFilter,
+        sql`date_trunc('milliseconds', ${assetProcessingJobTable.updatedAt}) > ${updatedSince.toISOString()}`
+      )
+    )
+    .orderBy(asc(assetProcessingJobTable.updatedAt));
+
+  return limit ? query.limit(limit).execute() : query.execute();
+}
+
+
+export async function GET(request: NextRequest) {
+  const { searchParams } = new URL(request.url);
+  const queryResult = fetchJobsQuerySchema.safeParse({
+    updatedSince: searchParams.get("updatedSince") ?? undefined,
+    limit: searchParams.get("limit") ?? undefined,
+    wait: searchParams.get("wait") ?? undefined,
+  });
+
+  if (!queryResult.success) {
+    return NextResponse.json(
+      {
+        error: "Invalid query parameters",
+        errors: queryResult.error.errors,
+      },
+      { status: 400 }
+    );
+  }
+
+  const { updatedSince, limit, wait } = queryResult.data;
+  const cursor = updatedSince ? new Date(updatedSince) : undefined;
+  const deadline = Date.now() + (wait ?? 0) * 1000;
+
+  try {
+    let availableJobs = await selectAvailableJobs(cursor, limit);
+
+    // Long-poll: hold the request open until a job changes or the wait expires
+    while (availableJobs.length === 0 && Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, LONG_POLL_INTERVAL_MS));
+      availableJobs = await selectAvailableJobs(cursor, limit);
+    }
 
     return NextResponse.json(availableJobs);
   } catch (err) {
@@ -48,15 +117,13 @@ export async function PATCH(request: NextRequest) {
   try {
     const { searchParams } = new URL(request.url);
     const jobId = searchParams.get("jobId");
+    const body = await request.json();
 
+    // Without a jobId the body is a batch of heartbeats and status updates
     if (!jobId) {
-      return NextResponse.json(
-        { error: "Missing jobId parameter" },
-        { status: 400 }
-      );
+      return await bulkUpdateJobs(body);
     }
 
-    const body = await request.json();
     const validationResult = updateAssetJobSchema.safeParse(body);
 
     if (!validationResult.success) {
@@ -69,25 +136,21 @@ export async function PATCH(request: NextRequest) {
       );
     }
 
-    const { status, errorMessage, attempts, lastHeartBeat } =
-      validationResult.data;
+    const update = validationResult.data;
+    const updatedJob = await updateJob(jobId, update);
 
-    const updatedJob = await db
-      .update(assetProcessingJobTable)
-      .set({
-        status,
-        errorMessage,
-        attempts,
-        lastHeartBeat: lastHeartBeat ? new Date(lastHeartBeat) : undefined,
-      })
-      .where(eq(assetProcessingJobTable.id, jobId))
-      .returning();
+    if (!updatedJob && update.ownerId && (await jobExists(jobId))) {
+      return NextResponse.json(
+        { error: "Job is leased by another owner" },
+        { status: 409 }
+      );
+    }
 
-    if (updatedJob.length === 0) {
+    if (!updatedJob) {
       return NextResponse.json({ error: "Job not found" }, { status: 404 });
     }
 
-    return NextResponse.json(updatedJob[0]);
+    return NextResponse.json(updatedJob);
   } catch (error) {
     console.error("Error updating asset processing job", error);
     return NextResponse.json(
@@ -96,3 +159,118 @@ export async function PATCH(request: NextRequest) {
     );
   }
 }
+
+
+const MAX_BULK_JOBS = 1000;
+
+const bulkUpdateAssetJobsSchema = z.object({
+  ownerId: z.string().optional(),
+  leaseSeconds: z.number().positive().optional(),
+  heartbeats: z.array(z.string()).max(MAX_BULK_JOBS).default([]),
+  updates: z
+    .array(updateAssetJobSchema.extend({ jobId: z.string() }))
+    .max(MAX_BULK_JOBS)
+    .default([]),
+});
+
+
+// Heartbeats for every live job of a service instance are applied with a
+// single UPDATE, renewing the instance's leases. Jobs whose lease now
+// belongs to someone else are reported back as lost.
+async function bulkUpdateJobs(body: unknown) {
+  const validationResult = bulkUpdateAssetJobsSchema.safeParse(body);
+
+  if (!validationResult.success) {
+    return NextResponse.json(
+      {
+        error: "Invalid request body",
+        errors: validationResult.error.errors,
+      },
+      { status: 400 }
+    );
+  }
+
+  const { ownerId, leaseSeconds, heartbeats, updates } = validationResult.data;
+  const now = new Date();
+  const lostJobIds: string[] = [];
+
+  if (heartbeats.length > 0) {
+    const beatJobs = await db
+      .update(assetProcessingJobTable)
+      .set({
+        lastHeartBeat: now,
+        leaseExpiresAt:
+          ownerId && leaseSeconds
+            ? new Date(now.getTime() + leaseSeconds * 1000)
+            : undefined,
+      })
+      .where(
+        ownerId
+          ? and(
+              inArray(assetProcessingJobTable.id, heartbeats),
+              eq(assetProcessingJobTable.ownerId, ownerId)
+            )
+          : inArray(assetProcessingJobTable.id, heartbeats)
+      )
+      .returning({ id: assetProcessingJobTable.id });
+
+    const beatJobIds = new Set(beatJobs.map((job) => job.id));
+    lostJobIds.push(...heartbeats.filter((id) => !beatJobIds.has(id)));
+  }
+
+  const updatedJobs = await Promise.all(
+    updates.map(({ jobId, ...update }) =>
+      updateJob(jobId, { lastHeartBeat: now.toISOString(), ...update })
+    )
+  );
+  updates.forEach(({ jobId }, index) => {
+    if (!updatedJobs[index]) {
+      lostJobIds.push(jobId);
+    }
+  });
+
+  return NextResponse.json({ lostJobIds });
+}
+
+
+async function updateJob(jobId: string, update: UpdateAssetJob) {
+  const { status, errorMessage, attempts, lastHeartBeat, ownerId, leaseSeconds } =
+    update;
+
+  // When an owner is given the update only applies while it still holds
+  // the lease, which also renews the lease on every heartbeat.
+  const updatedJob = await db
+    .update(assetProcessingJobTable)
+    .set({
+      status,
+      errorMessage,
+      attempts,
+      lastHeartBeat: lastHeartBeat ? new Date(lastHeartBeat) : undefined,
+      leaseExpiresAt:
+        ownerId && leaseSeconds
+          ? new Date(Date.now() + leaseSeconds * 1000)
+          : undefined,
+    })
+    .where(
+      ownerId
+        ? and(
+            eq(assetProcessingJobTable.id, jobId),
+            eq(assetProcessingJobTable.ownerId, ownerId)
+          )
+        : eq(assetProcessingJobTable.id, jobId)
+    )
+    .returning();
+
+  return updatedJob[0];
+}
+
+
+async function jobExists(jobId: string) {
+  const existingJob = await db
+    .select({ id: assetProcessingJobTable.id })
+    .from(assetProcessingJobTable)
+    .where(eq(assetProcessingJobTable.id, jobId))
+    .execute();
+
+  return existingJob.length > 0;
+}
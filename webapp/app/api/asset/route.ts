@@ -1,19 +1,60 @@
 import { db } from "@/server/db"
 import { assetTable } from "@/server/db/schema"
-import { eq } from "drizzle-orm";
+import { and, eq, inArray, sql } from "drizzle-orm";
 import { NextRequest, NextResponse } from "next/server";
 import { URL } from "url";
 import { z } from "zod";
 
 
-const updateAssetSchema = z.object({
+const MAX_BULK_ASSET_IDS = 500;
+
+// Replaces the content. `complete: false` starts a progressive update that
+// chunks are then appended to.
+const replaceContentSchema = z.object({
   content: z.string(),
   tokenCount: z.number(),
+  complete: z.boolean().optional(),
+});
+
+// Appends one transcript chunk. Chunks must arrive in order; resending a
+// chunk that was already applied is a no-op, so retries are safe.
+const appendContentSchema = z.object({
+  append: z.string(),
+  tokenCountDelta: z.number(),
+  chunkIndex: z.number().int().min(0),
 });
 
 export async function GET(request: NextRequest) {
   const { searchParams } = new URL(request.url)
   const assetId = searchParams.get("assetId")
+  const assetIds = searchParams.get("assetIds")
+
+  // Bulk lookup: comma-separated ids, returns the assets that exist
+  if (assetIds) {
+    const ids = assetIds.split(",").filter((id) => id.length > 0);
+    if (ids.length > MAX_BULK_ASSET_IDS) {
+      return NextResponse.json(
+        {error: `At most ${MAX_BULK_ASSET_IDS} assetIds per request`},
+        {status: 400},
+      );
+    }
+
+    try {
+      const assets = await db
+        .select()
+        .from(assetTable)
+        .where(inArray(assetTable.id, ids))
+        .execute();
+
+      return NextResponse.json(assets);
+    } catch (err) {
+      console.error("Error fetching assets: %s", err);
+      return NextResponse.json(
+        {error: "Error fetching assets"},
+        {status: 500},
+      );
+    }
+  }
 
   if (!assetId) {
     return NextResponse.json(
@@ -60,9 +101,10 @@ export async function PATCH(request: NextRequest) {
   }
 
   const body = await request.json();
-  const updatedAsset = updateAssetSchema.safeParse(body);
+  const appendedContent = appendContentSchema.safeParse(body);
+  const replacedContent = replaceContentSchema.safeParse(body);
 
-  if (!updatedAsset.success) {
+  if (!appendedContent.success && !replacedContent.success) {
     return NextResponse.json(
       {error: "Invalid request body"},
       {status: 400},
@@ -70,9 +112,19 @@ export async function PATCH(request: NextRequest) {
   }
 
   try {
+    if (appendedContent.success) {
+      return await appendContent(assetId, appendedContent.data);
+    }
+
+    const { content, tokenCount, complete } = replacedContent.data!;
     await db
       .update(assetTable)
-      .set(updatedAsset.data)
+      .set({
+        content,
+        tokenCount,
+        contentChunkCount: 0,
+        contentComplete: complete ?? true,
+      })
       .where(eq(assetTable.id, assetId))
       .execute();
       return NextResponse.json({success: true});
@@ -84,3 +136,49 @@ export async function PATCH(request: NextRequest) {
     );
   }
 }
+
+async function appendContent(
+  assetId: string,
+  { append, tokenCountDelta, chunkIndex }: z.infer<typeof appendContentSchema>
+) {
+  const updated = await db
+    .update(assetTable)
+    .set({
+      content: sql`coalesce(${assetTable.content}, '') || ${append}`,
+      tokenCount: sql`coalesce(${assetTable.tokenCount}, 0) + ${tokenCountDelta}`,
+      contentChunkCount: sql`${assetTable.contentChunkCount} + 1`,
+    })
+    .where(
+      and(
+        eq(assetTable.id, assetId),
+        eq(assetTable.contentChunkCount, chunkIndex),
+        eq(assetTable.contentComplete, false)
+      )
+    )
+    .returning({ id: assetTable.id });
+
+  if (updated.length > 0) {
+    return NextResponse.json({ success: true, applied: true });
+  }
+
+  const [asset] = await db
+    .select({
+      contentChunkCount: assetTable.contentChunkCount,
+      contentComplete: assetTable.contentComplete,
+    })
+    .from(assetTable)
+    .where(eq(assetTable.id, assetId));
+
+  if (!asset) {
+    return NextResponse.json({ error: "Asset not found" }, { status: 404 });
+  }
+
+  if (asset.contentComplete || asset.contentChunkCount > chunkIndex) {
+    return NextResponse.json({ success: true, applied: false });
+  }
+
+  return NextResponse.json(
+    { error: `Expected chunk ${asset.contentChunkCount}, got ${chunkIndex}` },
+    { status: 409 }
+  );
+}
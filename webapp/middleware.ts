@@ -11,6 +11,7 @@ const isPublicRoute = createRouteMatcher([
 ])
 const isSecureRoute = createRouteMatcher([
   "/api/asset-processing-job",
+  "/api/asset-processing-job/claim",
   "/api/asset",
 ]);
 
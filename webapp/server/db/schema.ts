@@ -7,6 +7,7 @@ import {
   varchar,
   bigint,
   integer,
+  boolean,
 } from "drizzle-orm/pg-core";
 
 export const projectsTable = pgTable("projects", {
@@ -41,6 +42,9 @@ export const assetTable = pgTable("assets", {
   size: bigint("size", { mode: "number" }).notNull(),
   content: text("content").default(""),
   tokenCount: integer("token_count").default(0),
+  // Transcripts are published chunk by chunk while a job runs
+  contentChunkCount: integer("content_chunk_count").notNull().default(0),
+  contentComplete: boolean("content_complete").notNull().default(false),
   createdAt: timestamp("created_at").notNull().defaultNow(),
   updatedAt: timestamp("updated_at")
     .notNull()
@@ -68,6 +72,8 @@ export const assetProcessingJobTable = pgTable("asset_processing_jobs", {
   errorMessage: text("error_message"),
   attempts: integer("attempts").notNull().default(0),
   lastHeartBeat: timestamp("last_heart_beat").notNull().defaultNow(),
+  ownerId: text("owner_id"),
+  leaseExpiresAt: timestamp("lease_expires_at"),
   createdAt: timestamp("created_at").notNull().defaultNow(),
   updatedAt: timestamp("updated_at")
     .notNull()